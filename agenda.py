@@ -0,0 +1,110 @@
+# agenda.py
+# Calendario compartido entre sesiones: eventos ordenados por inicio (bisect) con ventanas por
+# rango en O(log n + k), conteo por día mantenido al insertar, detección de traslapes y eventos
+# recurrentes guardados como regla y expandidos sólo dentro de la ventana consultada.
+
+import heapq
+import itertools
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+class EventStore:
+    """Eventos únicos en listas paralelas ordenadas por inicio; recurrentes como reglas
+    (inicio, duración, cada `every`, hasta `until`). Todo evento ocupa [when, end)."""
+    def __init__(self):
+        self._keys = []             # (inicio, id) ordenado
+        self._events = {}           # id -> evento
+        self._rules = []            # recurrentes
+        self._per_day = Counter()   # fecha -> eventos únicos que empiezan ese día
+        self._longest = timedelta(0)  # duración máxima: cuánto mirar hacia atrás en un rango
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.version = 0            # cambia con cada alta (llave de cachés de la vista)
+
+    def __len__(self):
+        return len(self._events) + len(self._rules)
+
+    def add(self, title:str, when:datetime, minutes:int=60, every_days:int=0, until:date=None,
+            allow_overlap:bool=True):
+        """Agrega un evento (recurrente si `every_days`); regresa (evento, traslapes).
+        Con traslapes y `allow_overlap=False` no lo agrega y el evento es None."""
+        ev = {"title": title, "when": when, "end": when + timedelta(minutes=minutes),
+              "every": timedelta(days=every_days) if every_days else None,
+              "until": datetime.combine(until, datetime.max.time()) if until else None}
+        with self._lock:
+            clashes = self._conflicts(ev)
+            if clashes and not allow_overlap:
+                return None, clashes
+            ev["id"] = next(self._ids)
+            if ev["every"]:
+                self._rules.append(ev)
+            else:
+                self._events[ev["id"]] = ev
+                insort(self._keys, (when, ev["id"]))
+                self._per_day[when.date()] += 1
+            self._longest = max(self._longest, ev["end"] - when)
+            self.version += 1
+        return ev, clashes
+
+    # --- consultas
+    def between(self, start:datetime, end:datetime, limit:int=None):
+        """Ocurrencias que se traslapan con [start, end), ordenadas por inicio."""
+        with self._lock:
+            return list(itertools.islice(self._between(start, end), limit))
+
+    def upcoming(self, now:datetime=None, days:int=14, limit:int=50):
+        now = now or datetime.now()
+        return self.between(now, now + timedelta(days=days), limit)
+
+    def day_counts(self, start:date, end:date) -> pd.DataFrame:
+        """Eventos por día de inicio en [start, end) (date, events); sólo días con eventos."""
+        lo, hi = datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+        with self._lock:
+            if len(self._per_day) <= (end - start).days:   # recorre lo que sea más corto
+                counts = Counter({d: n for d, n in self._per_day.items() if start <= d < end})
+            else:
+                counts = Counter({d: self._per_day[d] for d in _days(start, end) if d in self._per_day})
+            for rule in self._rules:
+                counts.update(occ["when"].date() for occ in _expand(rule, lo, hi) if occ["when"] >= lo)
+        days = sorted(counts)
+        return pd.DataFrame({"date": days, "events": [counts[d] for d in days]})
+
+    def conflicts(self, when:datetime, minutes:int=60):
+        with self._lock:
+            return self._conflicts({"when": when, "end": when + timedelta(minutes=minutes), "every": None})
+
+    # --- internos (con el candado tomado)
+    def _between(self, start, end):
+        # un evento que empezó hasta `_longest` antes de `start` aún puede traslaparse
+        i = bisect_left(self._keys, (start - self._longest,))
+        j = bisect_left(self._keys, (end,))
+        single = (self._events[k] for _, k in self._keys[i:j])
+        single = (e for e in single if e["end"] > start)
+        return heapq.merge(single, *(_expand(r, start, end) for r in self._rules), key=lambda e: (e["when"], e["id"]))
+
+    def _conflicts(self, ev):
+        if ev["every"] is None:
+            return list(self._between(ev["when"], ev["end"]))
+        # recurrente: revisa cada ocurrencia nueva contra lo existente en su ventana (sin fin: un año)
+        until = ev["until"] or ev["when"] + timedelta(days=365)
+        out = []
+        for occ in _expand({**ev, "id": 0, "until": until}, ev["when"], until):
+            out += self._between(occ["when"], occ["end"])
+        return list({e["id"]: e for e in out}.values())   # una vez por evento, aunque choque varias veces
+
+def _expand(rule, start:datetime, end:datetime):
+    """Ocurrencias de `rule` que se traslapan con [start, end), generadas bajo demanda."""
+    step, dur = rule["every"], rule["end"] - rule["when"]
+    first = max(0, -(-(start - dur - rule["when"]) // step))   # primera que termina después de `start`
+    when = rule["when"] + first * step
+    while when < end and (rule["until"] is None or when <= rule["until"]):
+        if when + dur > start:
+            yield {**rule, "when": when, "end": when + dur}
+        when += step
+
+def _days(start:date, end:date):
+    return (start + timedelta(days=i) for i in range((end - start).days))
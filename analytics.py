@@ -0,0 +1,421 @@
+# analytics.py
+# Pool de analítica fuera del hilo del script: los pipelines por sección (filtro + estadísticas
+# de KPIs / tabla + página del grid + plan de reabasto) corren en procesos sobre una copia en
+# memoria compartida de las columnas del inventario; los resultados llegan como futures, las
+# secciones se pintan conforme terminan y los trabajos de un rerun anterior de la misma sesión
+# se cancelan.
+
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+import weakref
+from concurrent.futures import CancelledError, Future
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from datagen import sku_labels
+from replenish import PLAN_COLUMNS, plan
+from tables import top_n_positions
+
+COLUMNS = ["sku", "category", "region", "stock", "reorder_point", "daily_demand", "days_cover", "below_reorder"]
+MUTABLE = ["stock", "days_cover", "below_reorder"]   # lo único que tocan los deltas
+
+def _columns(frame:pd.DataFrame):
+    """Columnas como arreglos NumPy (categóricas -> códigos); vistas sin copia cuando se puede."""
+    out = {}
+    for c in COLUMNS:
+        col = frame[c]
+        out[c] = col.cat.codes.to_numpy() if isinstance(col.dtype, pd.CategoricalDtype) else col.to_numpy()
+    return out
+
+# =========================
+# FUENTES DE ARREGLOS
+# =========================
+class LocalFrame:
+    """Arreglos tomados del frame en cada trabajo (sin copia), para el modo en proceso. Con
+    `index` (el InventoryIndex del backend en memoria sobre el mismo frame) el filtro sale de
+    sus bitmaps en lugar de la tabla por código."""
+    shared = False
+
+    def __init__(self, frame:pd.DataFrame, regions, cats, index=None):
+        self.frame = frame
+        self.meta = {"regions": list(regions), "cats": list(cats)}
+        self.index = index
+
+    def arrays(self):
+        return _columns(self.frame)
+
+    def run(self, section:str, params:dict):
+        if self.index is None:
+            return run_section(self.meta, section, params, self.arrays())
+        sel = self.index.rows(params.get("regions"), params.get("cats"))
+        return SECTIONS[section](self.arrays(), self.meta, sel, params)
+
+class QueryView:
+    """Vista filtrada de un motor SQL sin traerla: KPIs por agregado, peores y página del grid por
+    ORDER BY + LIMIT/OFFSET en el motor. Sólo el plan de reabasto (al hacer clic) trae las filas
+    filtradas. Las secciones corren en el hilo del script (el trabajo es del motor)."""
+    shared = False
+    frame = None
+
+    def __init__(self, source, regions, cats):
+        self.source = source
+        self.meta = {"regions": list(regions), "cats": list(cats)}
+
+    def count(self, regions=(), cats=()):
+        return int(self.source.summary(regions, cats)["n"].sum())
+
+    def run(self, section:str, p:dict):
+        regions, cats = p.get("regions") or (), p.get("cats") or ()
+        if section == "kpi":
+            df = self.source.summary(regions, cats)
+            n = int(df["n"].sum())
+            if not n:
+                return {"empty": True}
+            return {"engine": p["engine"], "below": int(df["below"].sum()), "cover": round(float(df["cover_sum"].sum()) / n, 1),
+                    "regions": sorted(map(str, df["region"].unique())), "categories": sorted(map(str, df["category"].unique()))}
+        if section == "table":
+            worst = self.source.rows(regions, cats, "days_cover", True, 3)
+            if worst.empty:
+                return {"empty": True}
+            return {"worst": [[str(r.sku), str(r.region), str(r.category), round(float(r.days_cover), 1)] for r in worst.itertuples()]}
+        if section == "grid":
+            return self.source.rows(regions, cats, p["sort_col"], p["ascending"], p["size"], p["page"] * p["size"])
+        if section == "plan":
+            return _plan(_columns(self.source.inventory(regions, cats)), self.meta, None, p)
+        raise KeyError(section)
+
+class SharedFrame:
+    """Copia de las columnas en un solo bloque de memoria compartida. Los procesos se adjuntan
+    por nombre (sin copiar); `refresh_rows` replica en O(filas) los cambios de `apply_deltas`."""
+    shared = True
+
+    def __init__(self, frame:pd.DataFrame, regions, cats):
+        self.frame = frame
+        cols = _columns(frame)
+        layout, offset = [], 0
+        for c in COLUMNS:
+            arr = np.ascontiguousarray(cols[c])
+            if arr.dtype == object or arr.dtype.kind in "OUT":  # texto (SKU de un motor real): no va a memoria compartida
+                raise TypeError(f"columna {c} no es numérica")
+            offset = -(-offset // 8) * 8
+            layout.append((c, arr.dtype.str, offset))
+            offset += arr.nbytes
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, offset))
+        self._release = weakref.finalize(self, _unlink, self.shm)   # también al salir del proceso
+        self.meta = {"regions": list(regions), "cats": list(cats), "shm": self.shm.name,
+                     "rows": len(frame), "layout": layout}
+        self._views = _views(self.shm, self.meta)
+        for c in COLUMNS:
+            self._views[c][:] = cols[c]
+        self.nbytes = offset
+
+    def arrays(self):
+        return self._views
+
+    def run(self, section:str, params:dict):
+        return run_section(self.meta, section, params, self._views)
+
+    def refresh_rows(self, frame:pd.DataFrame, pos):
+        """Copia las columnas mutables de `frame` en las filas `pos`."""
+        for c in MUTABLE:
+            self._views[c][pos] = frame[c].to_numpy()[pos]
+
+    def close(self):
+        self._views = None
+        self.shm.close()
+        self._release()
+
+def _unlink(shm):
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+def _views(shm, meta):
+    return {c: np.ndarray((meta["rows"],), dtype=np.dtype(dt), buffer=shm.buf, offset=off)
+            for c, dt, off in meta["layout"]}
+
+_ATTACHED = {}   # en el proceso trabajador: nombre -> (shm, vistas)
+
+def _open_shared(name:str):
+    """Adjunta un bloque ajeno. El dueño (la app) es quien lo borra: el resource tracker de este
+    proceso no debe hacerlo al salir (antes de 3.13 se registra al adjuntar y hay que quitarlo)."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix":
+        resource_tracker.unregister("/" + shm.name, "shared_memory")
+    return shm
+
+def _attach(meta):
+    hit = _ATTACHED.get(meta["shm"])
+    if hit is None:
+        shm = _open_shared(meta["shm"])
+        for name in list(_ATTACHED)[:-1]:  # conserva a lo más dos snapshots adjuntos
+            old, _ = _ATTACHED.pop(name)
+            old.close()
+        hit = _ATTACHED[meta["shm"]] = (shm, _views(shm, meta))
+    return hit[1]
+
+# =========================
+# PIPELINES POR SECCIÓN
+# =========================
+def _select(cols, meta, regions, cats):
+    """Posiciones de las filas que pasan el filtro (None = todas). Tabla por código sobre las
+    columnas compartidas; en proceso, LocalFrame usa los bitmaps de InventoryIndex."""
+    mask = None
+    for col, names, values in (("region", meta["regions"], regions), ("category", meta["cats"], cats)):
+        if values:
+            lut = np.zeros(len(names) + 1, bool)  # tabla por código (el -1 de nulos cae en el último)
+            lut[[names.index(v) for v in values if v in names]] = True
+            m = lut[cols[col]]
+            mask = m if mask is None else mask & m
+    return None if mask is None else np.flatnonzero(mask)
+
+def _take(arr, sel):
+    return arr if sel is None else arr[sel]
+
+def _kpi(cols, meta, sel, p):
+    below = _take(cols["below_reorder"], sel)
+    if not len(below):
+        return {"empty": True}
+    reg = np.bincount(_take(cols["region"], sel), minlength=len(meta["regions"]))
+    cat = np.bincount(_take(cols["category"], sel), minlength=len(meta["cats"]))
+    return {"engine": p["engine"], "below": int(below.sum()),
+            "cover": round(float(_take(cols["days_cover"], sel).mean(dtype=np.float64)), 1),
+            "regions": sorted(str(meta["regions"][i]) for i in np.flatnonzero(reg)),
+            "categories": sorted(str(meta["cats"][i]) for i in np.flatnonzero(cat))}
+
+def _table(cols, meta, sel, p):
+    cover = _take(cols["days_cover"], sel)
+    if not len(cover):
+        return {"empty": True}
+    top = top_n_positions(pd.Series(cover), 3)
+    rows = top if sel is None else sel[top]
+    skus = cols["sku"][rows]
+    skus = sku_labels(skus) if np.issubdtype(skus.dtype, np.integer) else skus
+    return {"worst": [[str(s), str(meta["regions"][r]), str(meta["cats"][c]), round(float(v), 1)]
+                      for s, r, c, v in zip(skus, cols["region"][rows], cols["category"][rows], cols["days_cover"][rows])]}
+
+def _grid(cols, meta, sel, p):
+    """Posiciones (en el frame base) de la página pedida, ordenada por `sort_col`."""
+    key = pd.Series(_take(cols[p["sort_col"]], sel))
+    stop = (p["page"] + 1) * p["size"]
+    top = top_n_positions(key, stop, p["ascending"])[p["page"] * p["size"]:stop]
+    return top if sel is None else sel[top]
+
+def _plan(cols, meta, sel, p):
+    """Plan de reabasto (replenish.plan) sobre las filas filtradas."""
+    view = {c: _take(cols[c], sel) for c in PLAN_COLUMNS}
+    return plan(view, meta["regions"], meta["cats"], p["capacity"], p["target_days"], p["pack"], p["top"], p["lines"])
+
+SECTIONS = {"kpi": _kpi, "table": _table, "grid": _grid, "plan": _plan}
+
+def run_section(meta, section:str, params:dict, cols=None):
+    """Punto de entrada del trabajador: filtro + pipeline de la sección."""
+    cols = cols if cols is not None else _attach(meta)
+    sel = _select(cols, meta, params.get("regions"), params.get("cats"))
+    return SECTIONS[section](cols, meta, sel, params)
+
+# =========================
+# POOL
+# =========================
+class Jobs:
+    """Futures de un rerun: {sección: Future}. `frame` es el frame al que apuntan las posiciones.
+    Si el pool se rompió (un trabajador murió) o un rerun posterior de la sesión canceló el
+    trabajo, `result` recalcula la sección en el hilo del script."""
+    def __init__(self, frame:pd.DataFrame, futures:dict, inline:dict=None):
+        self.frame = frame
+        self.futures = futures
+        self._inline = inline or {}
+
+    def result(self, section:str, timeout:float=None):
+        try:
+            return self.futures[section].result(timeout)
+        except (BrokenProcessPool, CancelledError):   # pool roto o reemplazado por un rerun más nuevo
+            if section not in self._inline:
+                raise
+            return self._inline[section]()
+
+    def rows(self, section:str, columns:list) -> pd.DataFrame:
+        """Filas de una sección tipo grid: posiciones sobre `frame`, o el frame que resolvió el motor."""
+        res = self.result(section)
+        return res[columns] if isinstance(res, pd.DataFrame) else self.frame[columns].take(res)
+
+    def add(self, other:"Jobs"):
+        """Incorpora (reemplaza) las secciones de otro envío sobre el mismo frame."""
+        self.futures.update(other.futures)
+        self._inline.update(other._inline)
+
+class _WorkerPool:
+    """`workers` procesos `python -m analytics_worker` (no importan app.py: bajo Streamlit
+    `__main__` es el script de la app). Cada uno lo atiende un hilo que le pasa trabajos y
+    recibe resultados por pickle sobre stdin/stdout. Si un proceso muere, sus futures y los
+    pendientes fallan con BrokenProcessPool y el pool ya no acepta trabajos."""
+    def __init__(self, workers:int):
+        self._queue = queue.SimpleQueue()
+        self._broken = None
+        self._closed = False
+        self._procs = [_start_worker() for _ in range(workers)]
+        for i, proc in enumerate(self._procs):
+            threading.Thread(target=self._serve, args=(proc,), name=f"atlas-analytics-{i}", daemon=True).start()
+
+    def submit(self, *job):
+        if self._broken:
+            raise BrokenProcessPool(self._broken)
+        if self._closed:
+            raise RuntimeError("pool cerrado")
+        fut = Future()
+        self._queue.put((fut, job))
+        return fut
+
+    def _serve(self, proc):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            fut, job = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                pickle.dump(job, proc.stdin, pickle.HIGHEST_PROTOCOL)
+                proc.stdin.flush()
+                ok, value = pickle.load(proc.stdout)
+            except (EOFError, OSError, pickle.UnpicklingError):
+                self._broken = f"el trabajador {proc.pid} terminó (código {proc.poll()})"
+                fut.set_exception(BrokenProcessPool(self._broken))
+                self._drain(BrokenProcessPool(self._broken))
+                break
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)
+        _stop_worker(proc)
+
+    def _drain(self, error=None):
+        """Vacía la cola: con `error` fallan los pendientes; sin él se cancelan."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                self._queue.put(None)   # el aviso de cierre es para otro hilo
+                return
+            fut, _ = item
+            if error is None:
+                fut.cancel()
+            elif fut.set_running_or_notify_cancel():
+                fut.set_exception(error)
+
+    def shutdown(self, wait:bool=True, cancel_futures:bool=False):
+        self._closed = True
+        if cancel_futures:
+            self._drain()
+        for _ in self._procs:
+            self._queue.put(None)
+        if wait:
+            for proc in self._procs:
+                proc.wait()
+
+def _start_worker():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), env.get("PYTHONPATH")]))
+    return subprocess.Popen([sys.executable, "-m", "analytics_worker"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+
+def _stop_worker(proc):
+    try:
+        proc.stdin.close()   # EOF: el trabajador sale solo
+    except OSError:
+        pass
+    try:
+        proc.wait(5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+def _run_local(source, section:str, params:dict):
+    """La sección en el hilo del script (sin pasar por el pool)."""
+    return source.run(section, params)
+
+def _done(fn):
+    fut = Future()
+    try:
+        fut.set_result(fn())
+    except Exception as e:
+        fut.set_exception(e)
+    return fut
+
+class AnalyticsPool:
+    """`workers` procesos (intérpretes nuevos: seguro con los hilos de Streamlit); 0 = en el hilo del script,
+    misma lógica. Una sesión sólo conserva los trabajos de su último rerun: los anteriores que
+    aún no arrancan se cancelan. Si un trabajador muere (p.ej. por memoria) el ejecutor se rehace
+    y lo afectado se calcula en el hilo del script."""
+    def __init__(self, workers:int=0):
+        self.workers = workers
+        self._executor = self._new_executor()
+        self._by_session = {}
+        self._lock = threading.Lock()
+        self.submitted = self.cancelled = self.restarts = 0
+
+    def _new_executor(self):
+        return _WorkerPool(self.workers) if self.workers else None
+
+    def _rebuild(self, broken):
+        """Reemplaza `broken` (si nadie lo hizo ya); los siguientes envíos van al ejecutor nuevo."""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._new_executor()
+            self.restarts += 1
+        broken.shutdown(wait=False)   # lo pendiente ya falló con BrokenProcessPool
+
+    def submit(self, session:str, source, requests:dict, replace:bool=True):
+        """`session`: la sesión del runtime de Streamlit (una por pestaña; nunca un id que viaje en
+        la URL, o dos pestañas se cancelarían entre sí). `source`: LocalFrame o SharedFrame;
+        `requests`: {sección: params}. `replace=False` agrega trabajos al rerun en curso sin
+        cancelar los demás."""
+        futures, broken = {}, False
+        with self._lock:
+            executor = self._executor if source.shared else None
+            if executor is not None:
+                current = self._by_session.pop(session, [])
+                if replace:
+                    self.cancelled += sum(f.cancel() for f in current)
+                    current = []
+                try:
+                    for section, params in requests.items():
+                        futures[section] = executor.submit(source.meta, section, params)
+                except BrokenProcessPool:
+                    futures, broken = {}, True
+                self._by_session[session] = current + list(futures.values())
+        if broken:
+            self._rebuild(executor)
+        inline = {section: partial(_run_local, source, section, params) for section, params in requests.items()}
+        if executor is None or broken:
+            futures = {section: _done(fn) for section, fn in inline.items()}
+        for fut in futures.values():
+            fut.add_done_callback(partial(self._watch, executor))
+        self.submitted += len(futures)
+        return Jobs(source.frame, futures, inline)
+
+    def _watch(self, executor, fut):
+        if not fut.cancelled() and isinstance(fut.exception(), BrokenProcessPool):
+            self._rebuild(executor)
+
+    def metrics(self):
+        with self._lock:
+            running = sum(not f.done() for fs in self._by_session.values() for f in fs)
+        return {"workers": self.workers, "submitted": self.submitted, "cancelled": self.cancelled,
+                "restarts": self.restarts, "pending": running}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,33 @@
+# analytics_worker.py
+# Proceso trabajador del pool de analítica (`python -m analytics_worker`): lee trabajos
+# (pickle de los argumentos de analytics.run_section) por stdin y responde (ok, valor) por
+# stdout hasta EOF. No importa app.py; se adjunta a la memoria compartida por nombre.
+
+import os
+import pickle
+import sys
+
+def main():
+    inp = sys.stdin.buffer
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())   # un print perdido no corrompe el canal
+    sys.stdout = sys.stderr
+    from analytics import run_section
+    while True:
+        try:
+            job = pickle.load(inp)
+        except EOFError:
+            return
+        try:
+            reply = (True, run_section(*job))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            data = pickle.dumps(reply, pickle.HIGHEST_PROTOCOL)
+        except Exception as e:   # resultado o excepción que no viaja
+            data = pickle.dumps((False, RuntimeError(f"{type(e).__name__}: {e}")))
+        out.write(data)
+        out.flush()
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,29 @@
 # Tema oscuro, full-width, acciones simuladas con toasts y bitácora.
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
-import numpy as np
 from datetime import datetime, date, time as dt_time, timedelta
 import plotly.express as px
-import plotly.graph_objects as go
+import os
+import uuid
 import time as pytime
 
+from datagen import generate_inventory, memory_report, with_sku_labels, DEFAULT_CATS
+from datasource import open_source, ENGINES
+from cube import build_cube
+from ingest import DeltaJournal, FileDropFeed, DeltaSimulator, LiveInventory, StockSnapshot
+from charts import frame_hash, trend_figure, heat_figure, tree_figure, calendar_figure
+from streaming import StreamRenderer
+from dispatcher import Dispatcher, Outbox, connectors_from_env, idempotency_key
+from logstore import LogStore
+from tables import EXPORT_FORMATS, export_file
+from profiling import REGISTRY as PROFILER
+from analytics import AnalyticsPool, LocalFrame, QueryView, SharedFrame
+from replenish import jira_payloads, parse_capacity, plan_frame
+from agenda import EventStore
+from explainers import ExplainerHub, make_backend, trend_stats, heat_stats, tree_stats
+
 # =========================
 # CONFIG & THEME
 # =========================
@@ -67,95 +83,226 @@ hr.section{{ border:none; height:1px; background:linear-gradient(90deg,{ACCENT},
 # STATE
 # =========================
 def init_state():
-    if "events" not in st.session_state:
-        today = date.today()
-        st.session_state.events = [
-            {"title": "Daily Ops", "when": datetime.combine(today, dt_time(9))},
-            {"title": "Comité Comercial", "when": datetime.combine(today + timedelta(days=1), dt_time(11))},
-            {"title": "Revisión Inventarios", "when": datetime.combine(today + timedelta(days=2), dt_time(10))},
-        ]
-    if "chat_email" not in st.session_state: st.session_state.chat_email = []
-    if "chat_whatsapp" not in st.session_state: st.session_state.chat_whatsapp = []
-    if "activity_log" not in st.session_state: st.session_state.activity_log = []
+    if "session_id" not in st.session_state:  # la sesión del runtime (una por pestaña); no viaja en la URL
+        ctx = get_script_run_ctx()
+        st.session_state.session_id = ctx.session_id if ctx else uuid.uuid4().hex
     if "llm_anim" not in st.session_state: st.session_state.llm_anim = True  # animación on/off
 
+LOG_DIR = os.environ.get("ATLAS_LOG_DIR", os.path.join(".atlas", "log"))
+LOG_CAPACITY = int(os.environ.get("ATLAS_LOG_CAPACITY", 10_000))
+PAGE_SIZE = 25
+GRID_COLS = ["sku","category","region","stock","reorder_point","daily_demand","days_cover"]
+
+@st.cache_resource(show_spinner=False)
+def get_logstore():
+    """Bitácora compartida (ring en memoria + segmentos en disco)."""
+    return LogStore(LOG_DIR, capacity=LOG_CAPACITY)
+
+logstore = get_logstore()
+
 def log(evt:str):
-    st.session_state.activity_log.append({"ts": datetime.now().strftime("%H:%M:%S"), "event": evt})
+    logstore.append(st.session_state.session_id, evt)
+
+def pager(key:str, total:int, size:int=PAGE_SIZE):
+    """Selector de página; devuelve el índice (0 = más recientes)."""
+    pages = max(1, -(-total // size))
+    if pages == 1:
+        return 0
+    return int(st.number_input(f"Página (de {pages})", min_value=1, max_value=pages, value=1, step=1, key=key)) - 1
 
 init_state()
 
+# Instrumentación del rerun (pestaña Diagnóstico oculta: ?diag=1 o ATLAS_DIAG=1)
+DIAG = os.environ.get("ATLAS_DIAG") == "1" or st.query_params.get("diag") == "1"
+prof = PROFILER.start(st.session_state.session_id, measure_payload=DIAG)
+
+def chart(container, fig, name:str):
+    """plotly_chart con medición de bytes y tiempo de serialización."""
+    prof.payload(name, fig)
+    with prof.section(f"{name}_render"):
+        container.plotly_chart(fig, width="stretch")
+
+def table(container, df:pd.DataFrame, name:str, **kw):
+    """st.dataframe con medición de bytes y tiempo de serialización."""
+    prof.payload(name, df)
+    with prof.section(f"{name}_render"):
+        container.dataframe(df, hide_index=True, width="stretch", **kw)
+
 # =========================
-# HELPERS (acciones simuladas + typewriter)
+# HELPERS (acciones en cola + typewriter)
 # =========================
-def schedule_meeting(title:str, d:date, t:dt_time):
+OUTBOX_PATH = os.environ.get("ATLAS_OUTBOX", os.path.join(".atlas", "outbox.db"))
+
+@st.cache_resource(show_spinner=False)
+def get_dispatcher():
+    """Worker de envíos compartido entre sesiones (outbox SQLite durable)."""
+    return Dispatcher(Outbox(OUTBOX_PATH), connectors_from_env()).start()
+
+dispatcher = get_dispatcher()
+
+def enqueue(connector:str, target:str, payload:dict):
+    """Encola y regresa de inmediato; la llave de idempotencia absorbe dobles clics (ventana de 10 s)."""
+    scope = f"{st.session_state.session_id}:{int(pytime.time() // 10)}"
+    return dispatcher.enqueue(connector, target, payload, st.session_state.session_id,
+                              idempotency_key(connector, target, payload, scope))
+
+@st.cache_resource(show_spinner=False)
+def get_agenda():
+    """Calendario del equipo, compartido entre sesiones (índice ordenado + reglas recurrentes)."""
+    store, today = EventStore(), date.today()
+    store.add("Daily Ops", datetime.combine(today, dt_time(8, 30)), 15, every_days=1)
+    store.add("Comité Comercial", datetime.combine(today + timedelta(days=1), dt_time(11)))
+    store.add("Revisión Inventarios", datetime.combine(today + timedelta(days=2), dt_time(10)))
+    return store
+
+agenda = get_agenda()
+
+def schedule_meeting(title:str, d:date, t:dt_time, minutes:int=60, every_days:int=0, until:date=None,
+                     allow_overlap:bool=False):
+    """Alta en el calendario compartido; con traslapes (y sin permitirlos) avisa y no encola nada."""
     when = datetime.combine(d, t)
-    st.session_state.events.append({"title": title, "when": when})
-    st.toast(f"Google Calendar: '{title}' — {when.strftime('%d/%m/%Y %H:%M')}")
-    log(f"Calendar: {title} @ {when.strftime('%d/%m %H:%M')}")
-
-def create_jira_issue(summary:str):
-    key = f"PROD-{np.random.randint(300,499)}"
-    st.toast(f"Jira: ticket creado {key} — {summary}")
-    log(f"Jira: {key} — {summary}")
-    return key
+    ev, clashes = agenda.add(title, when, minutes, every_days, until, allow_overlap)
+    if ev is None:
+        st.warning("Se traslapa con: " + ", ".join(f"{c['title']} ({c['when']:%d/%m %H:%M})" for c in clashes[:5]))
+        return
+    payload = {"title": title, "when": when.isoformat(), "minutes": minutes}
+    if every_days: payload["every_days"] = every_days
+    enqueue("calendar", "primary", payload)
+    st.toast(f"Google Calendar: '{title}' — {when.strftime('%d/%m/%Y %H:%M')} (en cola)")
+    log(f"Calendar: {title} @ {when.strftime('%d/%m %H:%M')}" + (f" (traslapa {len(clashes)})" if clashes else ""))
+
+def create_jira_issue(summary:str, then:dict=None, **fields):
+    """Encola el ticket; `then` encadena una acción con la llave real ({key}) al crearse.
+    `fields`: campos extra del issue (description, labels...)."""
+    payload = {"summary": summary, **fields}
+    if then: payload["then"] = then
+    job_id, _ = enqueue("jira", "PROD", payload)
+    st.toast(f"Jira: ticket en cola (#{job_id}) — {summary}")
+    log(f"Jira: en cola #{job_id} — {summary}")
+    return job_id
 
 def send_slack(channel:str, text:str):
-    st.toast(f"Slack: #{channel} — enviado")
+    enqueue("slack", channel, {"text": text})
+    st.toast(f"Slack: #{channel} — en cola")
     log(f"Slack #{channel}: {text}")
 
 def send_whatsapp(to:str, text:str):
-    st.session_state.chat_whatsapp.append({"ts": datetime.now().strftime("%H:%M"), "to": to, "text": text})
-    st.toast(f"WhatsApp a {to}: enviado")
+    enqueue("whatsapp", to, {"text": text})
+    st.toast(f"WhatsApp a {to}: en cola")
     log(f"WhatsApp a {to}: {text[:60]}")
 
 def send_email(frm:str, to:str, subject:str, body:str):
-    st.session_state.chat_email.append({"ts": datetime.now().strftime("%H:%M"), "from": frm, "to": to, "subject": subject, "body": body})
-    st.toast(f"Correo a {to}: {subject}")
+    enqueue("email", to, {"from": frm, "subject": subject, "body": body})
+    st.toast(f"Correo a {to}: {subject} (en cola)")
     log(f"Mail a {to}: {subject}")
 
-def typewriter(md_text:str, speed:float=0.01):
-    """Escribe markdown con animación, carácter por carácter."""
-    placeholder = st.empty()
-    if not st.session_state.llm_anim:
-        placeholder.markdown(md_text, unsafe_allow_html=True)
-        return
-    acc = ""
-    for ch in md_text:
-        acc += ch
-        placeholder.markdown(acc, unsafe_allow_html=True)
-        pytime.sleep(speed)
+ANIM_FPS = float(os.environ.get("ATLAS_ANIM_FPS", 20))
+renderer = StreamRenderer(st.session_state.setdefault("rendered_hashes", set()),
+                          animate=st.session_state.llm_anim, fps=ANIM_FPS)
+
+def typewriter(source, key:str=None, suffix:str=""):
+    """Reserva el lugar y encola la animación (por palabra/token); se anima en renderer.flush()
+    al final del script. Contenido ya animado (mismo hash) se pinta directo."""
+    renderer.add(st.empty(), source, key=key, suffix=suffix)
 
 # =========================
 # DATA SYNTH (inventarios + serie)
 # =========================
-@st.cache_data(show_spinner=False)
-def make_inventory(seed=7, days=120):
-    rng = np.random.default_rng(seed)
-    regions = ["Centro", "Norte", "Occidente", "Sureste"]
-    cats = ["Abarrotes","Perecederos","Hogar","Electrónica","Farmacia","Moda"]
-    skus = [f"SKU-{i:05d}" for i in range(120, 200)]
-    rows = []
-    for sku in skus:
-        cat = rng.choice(cats); reg = rng.choice(regions)
-        stock = max(0, int(rng.normal(360, 120)))
-        reorder = int(max(50, rng.normal(300, 90)))
-        daily = max(1, int(rng.normal(28, 7)))
-        cover = round(stock / max(1, daily), 1)
-        rows.append([sku, cat, reg, stock, reorder, daily, cover])
-    inv = pd.DataFrame(rows, columns=["sku","category","region","stock","reorder_point","daily_demand","days_cover"])
-    inv["below_reorder"] = (inv["stock"] < inv["reorder_point"]).astype(int)
-
-    end = date.today()
-    dates = pd.date_range(end - timedelta(days=days-1), end, freq="D")
-    ts_rows = []
-    for d in dates:
-        for reg in regions:
-            total_stock = max(5000, int(rng.normal(8200, 1100)))
-            ts_rows.append([d, reg, total_stock])
-    inv_ts = pd.DataFrame(ts_rows, columns=["date","region","total_stock"])
-    return inv, inv_ts, regions, cats
-
-inventory, inv_ts, REGIONS, CATS = make_inventory()
+# Escala configurable por entorno (pruebas de carga): ATLAS_SKUS, ATLAS_REGIONS, ATLAS_DAYS, ATLAS_SEED
+N_SKUS = int(os.environ.get("ATLAS_SKUS", 80))
+N_REGIONS = int(os.environ.get("ATLAS_REGIONS", 4))
+N_DAYS = int(os.environ.get("ATLAS_DAYS", 120))
+SEED = int(os.environ.get("ATLAS_SEED", 7))
+
+@st.cache_resource(show_spinner=False)
+def make_inventory(seed=SEED, days=N_DAYS, n_skus=N_SKUS, regions=N_REGIONS):
+    """Una sola copia compacta (categóricas, int32/float32, SKU como id entero) compartida por
+    todas las sesiones y motores, sin el pickle + copia por llamada de cache_data. Sólo lectura."""
+    return generate_inventory(n_skus=n_skus, regions=regions, categories=DEFAULT_CATS, days=days, seed=seed)
+
+CACHE_TTL = float(os.environ.get("ATLAS_CACHE_TTL", 300))
+CACHE_MB = int(os.environ.get("ATLAS_CACHE_MB", 256))
+
+@st.cache_resource(show_spinner=False)
+def get_source(engine:str):
+    """Un backend (con su pool y caché) por motor, compartido entre sesiones."""
+    return open_source(engine, lambda: make_inventory()[:2], ttl=CACHE_TTL, cache_mb=CACHE_MB)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_cube(engine:str, version):
+    """Cubo de Insights, uno por versión del dataset (agregación empujada al motor)."""
+    return build_cube(get_source(engine))
+
+# Ingesta incremental de movimientos de stock (archivos soltados en ATLAS_DELTA_DIR; ATLAS_DELTA_SIM = filas/s simuladas)
+DELTA_DIR = os.environ.get("ATLAS_DELTA_DIR", os.path.join(".atlas", "deltas"))
+DELTA_SIM = int(os.environ.get("ATLAS_DELTA_SIM", 0))
+REFRESH_S = float(os.environ.get("ATLAS_REFRESH_S", 5))
+
+@st.cache_resource(show_spinner=False)
+def get_journal():
+    """Diario de deltas compartido entre sesiones y motores."""
+    inventory = make_inventory()[0]
+    journal = DeltaJournal(snapshot=StockSnapshot(inventory["sku"].to_numpy(), inventory["stock"].to_numpy()))
+    FileDropFeed(DELTA_DIR, journal).start()
+    if DELTA_SIM:
+        DeltaSimulator(journal, inventory["sku"].to_numpy(), rows=DELTA_SIM).start()
+    return journal
+
+@st.cache_resource(show_spinner=False)
+def get_live(engine:str):
+    """Aplicador de deltas del backend de `engine` (uno por backend: nunca aplica dos veces un lote)."""
+    return LiveInventory(get_source(engine), get_journal(), engine)
+
+def reload_engine(engine:str):
+    """Recarga completa de un backend que el diario dio de baja por atraso (perdió lotes):
+    backend, aplicador, copia del pool y cubos se rehacen desde la fuente, y el aplicador nuevo
+    lo pone al día con el stock vivo del diario (StockSnapshot)."""
+    get_source(engine).close()
+    for cached in (get_source, get_live, get_frame_source):
+        cached.clear(engine)
+    get_cube.clear()
+
+# Pool de analítica (procesos + memoria compartida); "auto" = procesos sólo con catálogos grandes
+WORKERS = os.environ.get("ATLAS_WORKERS", "auto")
+WORKERS = (min(4, os.cpu_count() or 1) if N_SKUS >= 200_000 else 0) if WORKERS == "auto" else int(WORKERS)
+
+@st.cache_resource(show_spinner=False)
+def get_analytics():
+    return AnalyticsPool(WORKERS)
+
+analytics = get_analytics()
+
+@st.cache_resource(show_spinner=False)
+def get_frame_source(engine:str):
+    """Columnas del backend local para el pool: copia en memoria compartida (que replica los deltas)
+    si hay procesos; si no, el frame mismo, filtrado con los bitmaps de su índice."""
+    source, live = get_source(engine), get_live(engine)
+    regions, cats = source.dimensions()
+    frame = source.inv_index.frame
+    if not analytics.workers:
+        return LocalFrame(frame, regions, cats, source.inv_index)
+    return live.add_mirror(lambda: SharedFrame(frame, regions, cats))
+
+# Agenda: opciones de recurrencia (días entre ocurrencias) y filas máximas en "Próximos eventos"
+REPEAT = {"No se repite": 0, "Diario": 1, "Semanal": 7, "Cada 2 semanas": 14}
+AGENDA_ROWS = 200
+
+# Plan de reabasto: cobertura objetivo (días sobre el punto de pedido), empaque, capacidad de
+# recepción por región (unidades por ciclo) y SKUs listados por ticket
+REPLENISH = {"target_days": float(os.environ.get("ATLAS_REPLENISH_DAYS", 14)),
+             "pack": int(os.environ.get("ATLAS_REPLENISH_PACK", 10)),
+             "top": 20, "lines": 20}
+REPLENISH_CAPACITY = os.environ.get("ATLAS_REPLENISH_CAPACITY", "250000")
+
+# Figuras: memoizadas por hash de su entrada; series largas reducidas (LTTB/minmax) y WebGL arriba del umbral
+CHART_POINTS = int(os.environ.get("ATLAS_CHART_POINTS", 500))
+WEBGL_POINTS = int(os.environ.get("ATLAS_WEBGL_POINTS", 1000))
+DOWNSAMPLE = os.environ.get("ATLAS_DOWNSAMPLE", "lttb")
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def cached_figure(name:str, key:str, _build):
+    """Figura por (nombre, hash de entrada), compartida entre sesiones; no se muta después de construirla."""
+    return _build()
 
 # =========================
 # HEADER (branding + saludo + reloj)
@@ -198,9 +345,18 @@ st.markdown('<hr class="section"/>', unsafe_allow_html=True)
 with st.sidebar:
     st.markdown("### ⚙️ Acciones y configuración")
     # DB selector
-    db_engine = st.selectbox("Motor de datos", ["Postgres", "SQL Server", "Spark"], index=0)
+    db_engine = st.selectbox("Motor de datos", list(ENGINES), index=0)
+    # el aplicador va antes que el cubo: al crearse pone al backend al día con el diario
+    if get_live(db_engine).stale:
+        reload_engine(db_engine)
+        live = get_live(db_engine)
+        st.toast(f"{db_engine}: se quedó atrás del diario; recargado y puesto al día ({live.caught_up:,} SKUs con movimientos)")
+    source = get_source(db_engine)
+    REGIONS, CATS = source.dimensions()
+    st.caption(f"Conexión: {source.label}")
     # Animación LLM
     st.session_state.llm_anim = st.toggle("Animar explicaciones LLM", value=st.session_state.llm_anim)
+    renderer.animate = st.session_state.llm_anim
 
     st.markdown("---")
     st.caption("Destinatarios y plantillas")
@@ -241,187 +397,280 @@ with st.sidebar:
     st.caption("Filtros inventario")
     f_region = st.multiselect("Región", REGIONS)
     f_category = st.multiselect("Categoría", CATS)
+    with prof.section("cube"):
+        cube = get_cube(db_engine, source.version())
+    live = get_live(db_engine)
+    with prof.section("ingest"):
+        live.sync(cube)
     st.caption("Ventana tendencias")
-    horizon_days = st.slider("Días", 30, 120, 60, 10)
+    span = max(30, len(cube.dates))  # toda la historia disponible
+    horizon_days = st.slider("Días", 30, span, min(60, span), 10)
+
+# Pipelines por sección (filtro + estadísticas + página del grid) fuera del hilo del script.
+# Backend local: el trabajador filtra sobre las columnas compartidas (sin procesos, con los bitmaps
+# del índice en memoria). Motor SQL: filtros, agregados de KPIs y ORDER BY/LIMIT/OFFSET del grid
+# empujados al motor (consultas parametrizadas + caché TTL).
+with prof.section("filter"):
+    cut = source.max_date() - pd.Timedelta(days=horizon_days-1)
+    if hasattr(source, "inv_index"):
+        frame_src, filt = get_frame_source(db_engine), {"regions": f_region, "cats": f_category}
+        n_view = cube.kpis(f_region, f_category)[0]
+    else:
+        frame_src, filt = QueryView(source, REGIONS, CATS), {"regions": f_region, "cats": f_category}
+        n_view = frame_src.count(f_region, f_category)
+
+def grid_request(sort_col:str, ascending:bool, size:int, page:int):
+    return {**filt, "sort_col": sort_col, "ascending": ascending, "size": size, "page": page}
 
-# Filtros aplicados
-inv_view = inventory.copy()
-if f_region: inv_view = inv_view[inv_view["region"].isin(f_region)]
-if f_category: inv_view = inv_view[inv_view["category"].isin(f_category)]
-cut = inv_ts["date"].max() - pd.Timedelta(days=horizon_days-1)
-inv_ts_view = inv_ts[(inv_ts["date"] >= cut) & (inv_ts["region"].isin(f_region) if f_region else inv_ts["region"].notna())]
+# la página del grid se anticipa con el estado de sus widgets (se corrige abajo si cambió)
+_size = st.session_state.get("grid_size", 50)
+grid_req = grid_request(st.session_state.get("grid_sort", "days_cover"), st.session_state.get("grid_asc", True), _size,
+                        min(int(st.session_state.get("grid_page", 1)), max(1, -(-n_view // _size))) - 1)
+with prof.section("analytics_submit"):
+    jobs = analytics.submit(st.session_state.session_id, frame_src,
+                            {"kpi": {**filt, "engine": db_engine}, "table": filt, "grid": grid_req})
+
+with st.sidebar:
+    with st.expander("Métricas de consulta"), prof.section("sidebar_metrics"):
+        m = source.metrics()
+        total = m["cache_hits"] + m["cache_misses"]
+        st.caption(f"Caché: {m['cache_hits']} hits / {total} consultas · pool {m['connections']}/{m['pool_size']}")
+        if m["queries"]:
+            st.dataframe(pd.DataFrame(m["queries"]).T.round(2), width="stretch")
+        a = analytics.metrics()
+        st.caption(f"Analítica: {a['workers'] or 'en proceso'} trabajadores · {a['submitted']:,} trabajos · "
+                   f"{a['cancelled']:,} cancelados" + (f" · {a['restarts']} reinicios" if a["restarts"] else ""))
+        if live.supported:
+            st.caption(f"Ingesta: {live.rows:,} movimientos en {live.batches:,} lotes · último {live.last_ms:.1f} ms · "
+                       f"{live.journal.backlog()} lotes pendientes")
 
 # =========================
-# FUNCIONES DE EXPLICACIÓN (por sección)
+# EXPLICACIONES (por sección, generadas en paralelo y cacheadas por estadísticas)
 # =========================
-def kpi_explain(inv_df: pd.DataFrame):
-    if inv_df.empty:
-        return "**Explicación del LLM:** Sin datos para KPIs con los filtros actuales."
-    below = int(inv_df["below_reorder"].sum())
-    cover = inv_df["days_cover"].mean()
-    region_txt = ", ".join(sorted(inv_df["region"].unique()))
-    cat_txt = ", ".join(sorted(inv_df["category"].unique()))
-    return (f"**Explicación del LLM:** El sistema **{db_engine}** reporta **{below} SKUs** por debajo del punto de pedido "
-            f"con **{cover:.1f} días** de cobertura promedio. Regiones: _{region_txt or 'todas'}_; Categorías: _{cat_txt or 'todas'}_. "
-            "Recomendación: priorizar reabasto en los SKUs con menor cobertura y revisar parámetros de reorder.")
-
-def table_explain(inv_df: pd.DataFrame):
-    if inv_df.empty:
-        return "**Explicación del LLM:** No hay SKUs coincidentes bajo los filtros."
-    worst = inv_df.sort_values("days_cover").head(3)[["sku","region","category","days_cover"]]
-    lines = "; ".join([f"{r.sku} ({r.region}/{r.category}: {r.days_cover} días)" for r in worst.itertuples()])
-    return (f"**Explicación del LLM:** Top críticos por menor cobertura → {lines}. "
-            "Acción: crear ticket en Jira para reabasto dirigido y notificar a logística en Slack.")
-
-def trend_explain(ts_df: pd.DataFrame, regions_sel):
-    if ts_df.empty:
-        return "**Explicación del LLM:** Sin serie para la ventana seleccionada."
-    change = (ts_df['total_stock'].iloc[-1] - ts_df['total_stock'].iloc[0]) / max(1, ts_df['total_stock'].iloc[0]) * 100
-    region_txt = ", ".join(regions_sel) if regions_sel else "todas las regiones"
-    direction = "alza" if change >= 0 else "baja"
-    return (f"**Explicación del LLM:** En **{region_txt}**, el stock total varió **{change:.1f}%** en **{horizon_days} días**, "
-            f"con sesgo a la **{direction}**. Sugerencia: ajustar frecuencia de reabasto previo a picos semanales.")
-
-def heat_explain(hm_df: pd.DataFrame):
-    if hm_df.empty:
-        return "**Explicación del LLM:** No se observan brechas en la matriz categoría–región."
-    top = hm_df.sort_values("gap_qty", ascending=False).head(1).iloc[0]
-    return (f"**Explicación del LLM:** La mayor brecha está en **{top['category']}** para **{top['region']}**. "
-            "Prioriza asignaciones y revisa lead time de proveedores.")
-
-def tree_explain(by_cat_df: pd.DataFrame):
-    if by_cat_df.empty:
-        return "**Explicación del LLM:** Sin brechas agregadas por categoría."
-    leaders = by_cat_df.head(3)["category"].tolist()
-    return (f"**Explicación del LLM:** Categorías con mayor necesidad de reabasto: **{', '.join(leaders)}**. "
-            "Sugerencia: revisar elasticidad de demanda y cobertura objetivo.")
+@st.cache_resource(show_spinner=False)
+def get_explainer():
+    """Hub compartido entre sesiones: mismo estado de filtros => misma respuesta, sin otra llamada."""
+    return ExplainerHub(make_backend())
+
+explainer = get_explainer()
+
+# Slices del cubo (se usan en Insights y alimentan las explicaciones)
+with prof.section("cube_slices"):
+    ts = cube.trend(f_region, since=cut)
+    heat = cube.heat(f_region, f_category)
+    by_cat = cube.by_category(f_region, f_category)
+
+with prof.section("explain_stats"):
+    explanations = explainer.explain_all({  # kpi / table se agregan al llegar su pipeline
+        "trend": trend_stats(ts, f_region, horizon_days),
+        "heat": heat_stats(heat),
+        "tree": tree_stats(by_cat),
+    })
+
+def explain(section:str):
+    """Encola la explicación de una sección (tokens en streaming) con su llave de caché;
+    si sus estadísticas vienen del pool, espera sólo a ese trabajo."""
+    if section not in explanations:
+        with prof.section(f"wait_{section}"):
+            explanations.update(explainer.explain_all({section: jobs.result(section)}))
+    key, tokens = explanations[section]
+    typewriter(tokens, key=key, suffix="</div>")
 
 # =========================
 # TABS
 # =========================
-tab_agenda, tab_inv, tab_insights, tab_msgs, tab_log = st.tabs(
-    ["📅 Agenda", "📦 Inventarios (DB)", "📊 Insights", "💬 Mensajería", "🗂️ Bitácora"]
+tab_agenda, tab_inv, tab_insights, tab_msgs, tab_log, *tab_diag = st.tabs(
+    ["📅 Agenda", "📦 Inventarios (DB)", "📊 Insights", "💬 Mensajería", "🗂️ Bitácora"] + (["🩺 Diagnóstico"] if DIAG else [])
 )
 
 # -------- Agenda
-with tab_agenda:
+with tab_agenda, prof.section("tab_agenda"):
     a1, a2 = st.columns([2.2, 1.2], gap="large")
     with a1:
         st.markdown('<div class="section-title">Programar reunión</div>', unsafe_allow_html=True)
         mt_title = st.text_input("Título", value="Junta de seguimiento")
         mt_date = st.date_input("Fecha", value=date.today() + timedelta(days=1))
         mt_time = st.time_input("Hora", value=dt_time(9,0))
+        m1, m2, m3 = st.columns(3)
+        mt_minutes = m1.number_input("Duración (min)", 15, 480, 60, 15, key="mt_minutes")
+        mt_every = REPEAT[m2.selectbox("Repetir", list(REPEAT), key="mt_repeat")]
+        mt_until = m3.date_input("Hasta", value=None, key="mt_until", disabled=not mt_every)
         attendees = st.text_input("Invitados (coma separada)", value=f"{email_to}, ops@empresa.mx")
+        mt_overlap = st.toggle("Permitir traslapes", value=False, key="mt_overlap")
         if st.button("➕ Agregar a Google Calendar"):
-            schedule_meeting(mt_title, mt_date, mt_time)
+            schedule_meeting(mt_title, mt_date, mt_time, mt_minutes, mt_every, mt_until, mt_overlap)
     with a2:
         st.markdown('<div class="section-title">Próximos eventos</div>', unsafe_allow_html=True)
-        if st.session_state.events:
-            ev = pd.DataFrame(st.session_state.events).sort_values("when")
-            ev["Fecha"] = ev["when"].dt.strftime("%d/%m/%Y")
-            ev["Hora"] = ev["when"].dt.strftime("%H:%M")
-            st.dataframe(ev[["Fecha","Hora","title"]].rename(columns={"title":"Evento"}), hide_index=True, use_container_width=True)
-            cal = pd.DataFrame([{"date": e["when"].date()} for e in st.session_state.events]).value_counts("date").reset_index(name="events")
-            fig_cal = px.density_heatmap(cal, x="date", y=["Eventos"]*len(cal), z="events", nbinsx=7, color_continuous_scale="Turbo")
-            fig_cal.update_layout(height=140, margin=dict(l=10,r=10,t=10,b=10), xaxis_title="", yaxis_title="")
-            st.plotly_chart(fig_cal, use_container_width=True)
+        window = st.select_slider("Ventana (días)", [1, 7, 14, 30, 90], value=14, key="ag_window")
+        # sólo la ventana: bisect sobre el índice ordenado + recurrentes expandidos en el rango
+        upcoming = agenda.upcoming(datetime.now(), window, limit=AGENDA_ROWS)
+        if upcoming:
+            table(st, pd.DataFrame({"Fecha": [e["when"].strftime("%d/%m/%Y") for e in upcoming],
+                                    "Hora": [f"{e['when']:%H:%M}–{e['end']:%H:%M}" for e in upcoming],
+                                    "Evento": [e["title"] + (" 🔁" if e["every"] else "") for e in upcoming]}), "events")
+            with prof.section("fig_cal"):
+                # la versión del calendario es la llave: sin altas nuevas no se recuentan los días
+                start = date.today()
+                fig_cal = cached_figure("cal", f"{agenda.version}:{start}:{window}",
+                                        lambda: calendar_figure(agenda.day_counts(start, start + timedelta(days=window))))
+            chart(st, fig_cal, "fig_cal")
         else:
-            st.info("Sin eventos programados.")
+            st.info("Sin eventos en la ventana.")
 
 # -------- Inventarios (KPIs + tabla con explicación LLM y animación)
-with tab_inv:
+with tab_inv, prof.section("tab_inv"):
     i1, i2 = st.columns([1.6, 2.4], gap="large")
     with i1:
         st.markdown(f'<div class="section-title">Resumen ({db_engine})</div>', unsafe_allow_html=True)
-        below = int(inv_view["below_reorder"].sum())
-        pct_below = 100 * below / max(1, len(inv_view))
-        avg_cover = inv_view["days_cover"].mean()
-        k1,k2,k3 = st.columns(3)
-        k1.markdown(f'<div class="kpi-card"><div class="kpi-title">SKUs bajo punto de pedido</div><div class="kpi-value">{below:,}</div><div class="kpi-sub">{pct_below:.1f}% del total</div></div>', unsafe_allow_html=True)
-        k2.markdown(f'<div class="kpi-card"><div class="kpi-title">Cobertura prom.</div><div class="kpi-value">{avg_cover:.1f} días</div><div class="kpi-sub">days of cover</div></div>', unsafe_allow_html=True)
-        k3.markdown(f'<div class="kpi-card"><div class="kpi-title">Artefactos</div><div class="kpi-value">CSV / Gráficos</div><div class="kpi-sub">exportables</div></div>', unsafe_allow_html=True)
+
+        @st.fragment(run_every=REFRESH_S if live.supported and REFRESH_S > 0 else None)
+        def kpi_cards():
+            """KPIs desde los acumulados del cubo (O(categorías×regiones)); con ingesta viva se
+            refrescan solos cada REFRESH_S s sin rerun completo."""
+            live.sync(cube)
+            n, below, cover_sum = cube.kpis(f_region, f_category)
+            pct_below = 100 * below / max(1, n)
+            avg_cover = cover_sum / n if n else float("nan")
+            k1,k2,k3 = st.columns(3)
+            k1.markdown(f'<div class="kpi-card"><div class="kpi-title">SKUs bajo punto de pedido</div><div class="kpi-value">{below:,}</div><div class="kpi-sub">{pct_below:.1f}% del total</div></div>', unsafe_allow_html=True)
+            k2.markdown(f'<div class="kpi-card"><div class="kpi-title">Cobertura prom.</div><div class="kpi-value">{avg_cover:.1f} días</div><div class="kpi-sub">days of cover</div></div>', unsafe_allow_html=True)
+            k3.markdown(f'<div class="kpi-card"><div class="kpi-title">Artefactos</div><div class="kpi-value">CSV / Gráficos</div><div class="kpi-sub">exportables</div></div>', unsafe_allow_html=True)
+            if live.rows:
+                st.caption(f"🔄 En vivo: {live.rows:,} movimientos aplicados · actualizado {datetime.fromtimestamp(live.last_sync):%H:%M:%S}")
+
+        kpi_cards()
         # --- Explicación LLM (KPIs)
         st.markdown('<div class="explain"><h4>Explicación del LLM</h4>', unsafe_allow_html=True)
-        typewriter(kpi_explain(inv_view) + "</div>")
+        explain("kpi")
         st.markdown('<hr class="section"/>', unsafe_allow_html=True)
         st.markdown("**Acciones operativas**")
         colj1, colj2 = st.columns(2, gap="large")
         with colj1:
             if st.button("🧾 Crear ticket en Jira (reabasto críticos)"):
-                key = create_jira_issue("Reabasto críticos — priorizar CD/tiendas para top SKUs")
-                send_slack(slack_channel, f"Creado ticket {key} para reabasto críticos.")
+                try:
+                    capacity = parse_capacity(REPLENISH_CAPACITY, REGIONS)
+                except ValueError as e:
+                    st.error(f"ATLAS_REPLENISH_CAPACITY: {e}")
+                else:
+                    # plan sobre toda la vista filtrada (en el pool), un ticket por región con capacidad
+                    with prof.section("replenish_plan"):
+                        plan = analytics.submit(st.session_state.session_id, frame_src,
+                                                {"plan": {**filt, **REPLENISH, "capacity": capacity}}, replace=False).result("plan")
+                    tickets = jira_payloads(plan, slack_channel)
+                    for t in tickets:
+                        create_jira_issue(**t)
+                    if tickets:
+                        st.caption(f"Plan: {plan['skus']:,} SKUs · {plan['units']:,} unidades · "
+                                   f"{plan['deferred_units']:,} diferidas por capacidad")
+                        table(st, plan_frame(plan), "replenish_plan")
+                    else:
+                        st.info("Sin SKUs bajo su punto de pedido en la vista actual.")
         with colj2:
-            st.download_button("📥 Exportar inventario (CSV)", data=inv_view.to_csv(index=False).encode("utf-8"),
-                               file_name=f"inventario_{db_engine.lower()}.csv")
+            exp_fmt = st.selectbox("Formato", list(EXPORT_FORMATS), key="exp_fmt")
+            ext, mime = EXPORT_FORMATS[exp_fmt]
+            # diferido: sólo se serializa (por bloques) cuando alguien hace clic
+            st.download_button(f"📥 Exportar inventario ({exp_fmt})", data=lambda: export_file(source.inventory(f_region, f_category), exp_fmt, GRID_COLS),
+                               file_name=f"inventario_{db_engine.lower()}.{ext}", mime=mime, on_click="ignore")
     with i2:
         st.markdown('<div class="section-title">Detalle de inventario</div>', unsafe_allow_html=True)
-        st.dataframe(inv_view[["sku","category","region","stock","reorder_point","daily_demand","days_cover"]],
-                     hide_index=True, use_container_width=True)
+        g1, g2, g3 = st.columns([1.4, 1, 1], gap="small")
+        sort_col = g1.selectbox("Ordenar por", GRID_COLS, index=GRID_COLS.index("days_cover"), key="grid_sort")
+        sort_asc = g2.toggle("Ascendente", value=True, key="grid_asc")
+        grid_size = g3.selectbox("Filas", [50, 100, 500], key="grid_size")
+        grid_page = pager("grid_page", n_view, grid_size)
+        # sólo la página visible viaja al navegador (top-N parcial en el pool, sin ordenar todo)
+        with prof.section("grid_page"):
+            req = grid_request(sort_col, sort_asc, grid_size, grid_page)
+            if req != grid_req:
+                jobs.add(analytics.submit(st.session_state.session_id, frame_src, {"grid": req}, replace=False))
+            grid = with_sku_labels(jobs.rows("grid", GRID_COLS))
+        table(st, grid, "grid", column_config={"days_cover": st.column_config.NumberColumn(format="%.1f")})
+        first = grid_page * grid_size
+        st.caption(f"Mostrando {min(first + 1, n_view):,}–{min(first + grid_size, n_view):,} de {n_view:,} SKUs")
         # --- Explicación LLM (Tabla)
         st.markdown('<div class="explain"><h4>Explicación del LLM</h4>', unsafe_allow_html=True)
-        typewriter(table_explain(inv_view) + "</div>")
+        explain("table")
 
 # -------- Insights (cada gráfico con su explicación LLM animada)
-with tab_insights:
+with tab_insights, prof.section("tab_insights"):
     st.markdown('<div class="section-title">Tendencias y focos</div>', unsafe_allow_html=True)
     c1, c2, c3 = st.columns([2.2, 1.5, 1.3], gap="large")
 
-    # Serie tendencial
-    ts = inv_ts_view.groupby("date", as_index=False)["total_stock"].sum()
-    fig_ts = px.line(ts, x="date", y="total_stock", markers=True, color_discrete_sequence=[ACCENT])
-    fig_ts.update_traces(line=dict(width=3))
-    fig_ts.update_layout(height=360, margin=dict(l=10,r=10,t=10,b=10))
-    c1.plotly_chart(fig_ts, use_container_width=True)
+    # Serie tendencial (slice del cubo fecha×región)
+    with prof.section("fig_ts"):
+        fig_ts = cached_figure("ts", frame_hash(ts, ACCENT, CHART_POINTS, WEBGL_POINTS, DOWNSAMPLE),
+                               lambda: trend_figure(ts, ACCENT, CHART_POINTS, WEBGL_POINTS, DOWNSAMPLE))
+    chart(c1, fig_ts, "fig_ts")
     with c1:
         st.markdown('<div class="explain"><h4>Explicación del LLM</h4>', unsafe_allow_html=True)
-        typewriter(trend_explain(ts, f_region) + "</div>")
-
-    # Heatmap cat-reg
-    inv_h = inv_view.copy()
-    inv_h["gap_qty"] = (inv_h["reorder_point"] - inv_h["stock"]).clip(lower=0)
-    heat = inv_h.groupby(["category","region"], as_index=False)["gap_qty"].sum()
-    fig_hm = px.density_heatmap(heat, x="region", y="category", z="gap_qty", color_continuous_scale="Turbo")
-    fig_hm.update_layout(height=360, margin=dict(l=10,r=10,t=10,b=10))
-    c2.plotly_chart(fig_hm, use_container_width=True)
+        explain("trend")
+
+    # Heatmap cat-reg (slice del cubo categoría×región)
+    with prof.section("fig_hm"):
+        fig_hm = cached_figure("heat", frame_hash(heat), lambda: heat_figure(heat))
+    chart(c2, fig_hm, "fig_hm")
     with c2:
         st.markdown('<div class="explain"><h4>Explicación del LLM</h4>', unsafe_allow_html=True)
-        typewriter(heat_explain(heat) + "</div>")
+        explain("heat")
 
     # Treemap por categoría
-    by_cat = inv_h.groupby("category", as_index=False)["gap_qty"].sum().sort_values("gap_qty", ascending=False)
-    fig_tree = px.treemap(by_cat, path=["category"], values="gap_qty", color="gap_qty", color_continuous_scale="Magma")
-    fig_tree.update_layout(height=360, margin=dict(l=10,r=10,t=10,b=10))
-    c3.plotly_chart(fig_tree, use_container_width=True)
+    with prof.section("fig_tree"):
+        fig_tree = cached_figure("tree", frame_hash(by_cat), lambda: tree_figure(by_cat))
+    chart(c3, fig_tree, "fig_tree")
     with c3:
         st.markdown('<div class="explain"><h4>Explicación del LLM</h4>', unsafe_allow_html=True)
-        typewriter(tree_explain(by_cat) + "</div>")
-
-# -------- Mensajería
-with tab_msgs:
+        explain("tree")
+
+# -------- Mensajería (estado de entrega leído del outbox)
+STATUS_LABEL = {"queued": "⏳ En cola", "sending": "📤 Enviando", "sent": "✅ Enviado",
+                "retry": "🔁 Reintento", "failed": "❌ Fallido"}
+
+def outbox_frame(connector:str, columns:dict):
+    sid = st.session_state.session_id
+    total = dispatcher.outbox.count(connector, session=sid)
+    if not total:
+        return None
+    page = pager(f"page_{connector}", total)
+    jobs = dispatcher.outbox.jobs(connector, session=sid, limit=PAGE_SIZE, offset=page * PAGE_SIZE)
+    rows = [{"Hora": datetime.fromtimestamp(j["created"]).strftime("%H:%M"), "Para": j["target"],
+             **{label: j["payload"].get(field, "") for field, label in columns.items()},
+             "Estado": STATUS_LABEL.get(j["status"], j["status"]), "Intentos": j["attempts"]} for j in jobs]
+    return pd.DataFrame(rows)
+
+with tab_msgs, prof.section("tab_msgs"):
     st.markdown('<div class="section-title">Mensajes enviados desde esta sesión</div>', unsafe_allow_html=True)
+    counts = dispatcher.metrics()["status"]
+    st.caption(" · ".join(f"{STATUS_LABEL.get(k, k)}: {v}" for k, v in counts.items()) or "Outbox vacío.")
     colm1, colm2 = st.columns(2, gap="large")
     with colm1:
         st.subheader("Correo")
-        if st.session_state.chat_email:
-            dfm = pd.DataFrame(st.session_state.chat_email)
-            st.dataframe(dfm[["ts","to","subject","body"]].rename(columns={"ts":"Hora","to":"Para","subject":"Asunto","body":"Mensaje"}),
-                         hide_index=True, use_container_width=True)
+        dfm = outbox_frame("email", {"subject": "Asunto", "body": "Mensaje"})
+        if dfm is not None:
+            table(st, dfm, "outbox_email")
         else:
             st.info("Sin correos aún.")
     with colm2:
         st.subheader("WhatsApp")
-        if st.session_state.chat_whatsapp:
-            dfw = pd.DataFrame(st.session_state.chat_whatsapp)
-            st.dataframe(dfw.rename(columns={"ts":"Hora","to":"Para","text":"Mensaje"}),
-                         hide_index=True, use_container_width=True)
+        dfw = outbox_frame("whatsapp", {"text": "Mensaje"})
+        if dfw is not None:
+            table(st, dfw, "outbox_whatsapp")
         else:
             st.info("Sin mensajes aún.")
 
 # -------- Bitácora
-with tab_log:
+with tab_log, prof.section("tab_log"):
     st.markdown('<div class="section-title">Bitácora de acciones</div>', unsafe_allow_html=True)
-    logs = pd.DataFrame(st.session_state.activity_log) if st.session_state.activity_log else pd.DataFrame([{"ts":"—","event":"(sin eventos)"}])
-    st.dataframe(logs, hide_index=True, use_container_width=True)
+    scope = st.radio("Vista", ["Esta sesión", "Global (todas las sesiones)"], horizontal=True, label_visibility="collapsed")
+    sid = st.session_state.session_id if scope == "Esta sesión" else None
+    total = logstore.count(sid)
+    entries = logstore.page(sid, pager("page_log", total), PAGE_SIZE)
+    if entries:
+        logs = pd.DataFrame([{"ts": datetime.fromtimestamp(e["ts"]).strftime("%d/%m %H:%M:%S"), "event": e["event"],
+                              **({} if sid else {"sesión": e["session"][:8]})} for e in entries])
+    else:
+        logs = pd.DataFrame([{"ts":"—","event":"(sin eventos)"}])
+    table(st, logs, "log")
+    st.caption(f"{total:,} eventos en memoria · {logstore.sessions()} sesiones")
 
 # -------- Proceso del agente (píldoras)
 st.markdown('<hr class="section"/>', unsafe_allow_html=True)
@@ -435,3 +684,49 @@ st.markdown(
     f'<span class="pill">Narrativa por sección</span>',
     unsafe_allow_html=True
 )
+
+# -------- Diagnóstico (oculto): muestra el último rerun completo de esta sesión
+if DIAG:
+    with tab_diag[0]:
+        st.markdown('<div class="section-title">Diagnóstico de render</div>', unsafe_allow_html=True)
+        last = PROFILER.last(st.session_state.session_id)
+        if last is None:
+            st.info("Aún no hay un rerun completo medido; interactúa con la página.")
+        else:
+            d1, d2, d3 = st.columns(3)
+            d1.metric("Último rerun", f"{last.total * 1000:,.0f} ms")
+            d2.metric("Bytes al navegador", f"{sum(last.payloads.values()) / 1024:,.0f} KB")
+            d3.metric("Reruns medidos (proceso)", f"{PROFILER.reruns:,}")
+            secs = pd.DataFrame([{"sección": k, "ms": v * 1000, "llamadas": last.calls[k]} for k, v in last.sections.items()])
+            st.dataframe(secs.sort_values("ms", ascending=False).round(2), hide_index=True, width="stretch")
+            pay = pd.DataFrame([{"elemento": k, "KB": v / 1024} for k, v in last.payloads.items()])
+            if not pay.empty:
+                st.dataframe(pay.sort_values("KB", ascending=False).round(1), hide_index=True, width="stretch")
+            hits = pd.DataFrame([{"caché": k, **v, "hit %": 100 * v["hits"] / max(1, v["hits"] + v["misses"])}
+                                 for k, v in last.caches.items()])
+            if not hits.empty:
+                st.dataframe(hits.round(1), hide_index=True, width="stretch")
+            hist = pd.DataFrame([{"inicio": datetime.fromtimestamp(r.started), "ms": r.total * 1000}
+                                 for r in PROFILER.history(st.session_state.session_id)])
+            st.line_chart(hist, x="inicio", y="ms", height=180)
+        st.markdown("**Memoria del dataset (una copia compartida)**")
+        mem = pd.concat({"inventario": memory_report(make_inventory()[0]), "serie": memory_report(make_inventory()[1])},
+                        names=["tabla", "columna"]).reset_index()
+        saved, naive = mem["saved"].sum(), mem["naive_bytes"].sum()
+        st.caption(f"{mem['bytes'].sum() / 2**20:,.1f} MB en uso vs. {naive / 2**20:,.1f} MB con objetos y 64 bits: "
+                   f"{saved / 2**20:,.1f} MB ahorrados ({100 * saved / max(1, naive):.0f}%)")
+        st.dataframe(mem, hide_index=True, width="stretch")
+        e1, e2 = st.columns(2)
+        e1.download_button("⬇️ JSON", data=lambda: PROFILER.to_json(), file_name="atlas_profile.json",
+                           mime="application/json", on_click="ignore")
+        e2.download_button("⬇️ Prometheus", data=lambda: PROFILER.to_prometheus(), file_name="atlas_metrics.prom",
+                           mime="text/plain; version=0.0.4", on_click="ignore")
+
+# -------- Animaciones LLM (después de pintar toda la página)
+with prof.section("animations"):
+    renderer.flush()
+
+src_m, exp_m = source.metrics(), explainer.metrics()
+prof.cache("datasource", src_m["cache_hits"], src_m["cache_misses"])
+prof.cache("explainer", exp_m["cache_hits"], exp_m["cache_misses"])
+PROFILER.record(prof)
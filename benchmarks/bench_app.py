@@ -0,0 +1,235 @@
+# benchmarks/bench_app.py
+# Benchmark headless de app.py completo (streamlit.testing AppTest, sin navegador): corre el script
+# a distintas escalas, ejercita filtros, horizonte, orden/paginación del grid, vistas y botones de
+# acción, y reporta tiempo de pared, RSS pico (del script y de los procesos de analítica) y desglose
+# por sección (profiling.REGISTRY).
+#
+# Uso:
+#   python benchmarks/bench_app.py                                  # matriz por defecto, tabla en consola
+#   python benchmarks/bench_app.py --save benchmarks/baseline_app.json
+#   python benchmarks/bench_app.py --compare benchmarks/baseline_app.json   # exit 1 si hay regresión
+#                                   (se niega si la baseline es de otra máquina; --any-machine sólo avisa)
+#   python benchmarks/bench_app.py --sizes 1000 --horizons 30 120 --days 365 --json out.json
+#
+# Cada escala corre en un subproceso propio: RSS pico limpio y cachés de Streamlit (cache_data /
+# cache_resource, que son por proceso) frías al inicio.
+
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# =========================
+# HIJO: una escala, todos los pasos
+# =========================
+def _rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KB
+
+def _workers():
+    """PIDs de los hijos vivos: los `python -m analytics_worker` del pool (RUSAGE_SELF no los cuenta,
+    y RUSAGE_CHILDREN sólo ve hijos ya terminados)."""
+    pids = set()
+    for path in glob.glob("/proc/self/task/*/children"):
+        try:
+            with open(path, encoding="utf-8") as fh:
+                pids.update(map(int, fh.read().split()))
+        except OSError:
+            pass
+    return pids
+
+def _status_kb(pid:int, field:str):
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as fh:
+            return next((int(l.split()[1]) for l in fh if l.startswith(field + ":")), 0)
+    except OSError:   # el trabajador terminó entre la lista y la lectura
+        return 0
+
+def _workers_mb():
+    """(RSS privado actual, suma de los picos) de los trabajadores, en MB. El pico incluye las páginas de
+    memoria compartida que tocan (ya contadas en el script); el privado (RssAnon) no."""
+    pids = _workers()
+    return (sum(_status_kb(p, "RssAnon") for p in pids) / 1024, sum(_status_kb(p, "VmHWM") for p in pids) / 1024)
+
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+def _selectbox(at, label):
+    return next(s for s in at.selectbox if s.label == label)
+
+def _steps(horizons):
+    """(nombre, acción sobre AppTest) en orden; cada uno implica un rerun."""
+    steps = [("cold", lambda at: None), ("warm", lambda at: None)]
+    steps += [(f"horizon_{h}", lambda at, h=h: at.slider[0].set_value(min(h, at.slider[0].max))) for h in horizons]
+    steps += [
+        ("filter_region", lambda at: at.multiselect[0].set_value(at.multiselect[0].options[:2])),
+        ("filter_category", lambda at: at.multiselect[1].set_value(at.multiselect[1].options[:3])),
+        ("filter_clear", lambda at: (at.multiselect[0].set_value([]), at.multiselect[1].set_value([]))),
+        ("grid_sort", lambda at: at.selectbox(key="grid_sort").set_value("stock")),
+        ("grid_desc", lambda at: at.toggle(key="grid_asc").set_value(False)),
+        ("grid_page", lambda at: at.number_input(key="grid_page").set_value(3)),
+        ("grid_rows_500", lambda at: at.selectbox(key="grid_size").set_value(500)),
+        ("log_global", lambda at: at.radio[0].set_value(at.radio[0].options[1])),
+        ("btn_jira", lambda at: _button(at, "🧾 Crear ticket en Jira (reabasto críticos)").click()),
+        ("btn_slack", lambda at: _button(at, "💬 Enviar a Slack").click()),
+        ("btn_calendar", lambda at: _button(at, "➕ Agregar a Google Calendar").click()),
+        ("engine_switch", lambda at: _selectbox(at, "Motor de datos").set_value(_selectbox(at, "Motor de datos").options[1])),
+    ]
+    return steps
+
+def run_scale(skus:int, days:int, horizons, animate:bool, timeout:float):
+    work = tempfile.mkdtemp(prefix="atlas-bench-")
+    os.environ.update({"ATLAS_SKUS": str(skus), "ATLAS_DAYS": str(days),
+                       "ATLAS_OUTBOX": os.path.join(work, "outbox.db"), "ATLAS_LOG_DIR": os.path.join(work, "log")})
+    from streamlit.testing.v1 import AppTest
+    from profiling import REGISTRY
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=timeout)
+    at.session_state["llm_anim"] = animate
+    out = {"skus": skus, "days": days, "steps": {}, "peak_workers_mb": 0.0}
+    for name, action in _steps(horizons):
+        try:
+            action(at)
+        except (StopIteration, IndexError, KeyError) as e:  # el widget no existe (p.ej. una sola página)
+            out["steps"][name] = {"skipped": f"{type(e).__name__}: {e}"}
+            continue
+        t0 = time.perf_counter()
+        at.run()
+        wall = time.perf_counter() - t0
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+        run = REGISTRY.last()
+        workers, peak = _workers_mb()
+        out["peak_workers_mb"] = max(out["peak_workers_mb"], peak)
+        out["steps"][name] = {"wall_s": wall, "script_s": run.total, "rss_mb": _rss_mb(), "workers_mb": workers,
+                              "horizon": at.slider[0].value, "sections_s": dict(run.sections)}
+    out["peak_rss_mb"] = _rss_mb()
+    return out
+
+# =========================
+# PADRE: matriz, reporte, baseline
+# =========================
+def _spawn(skus, args):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", str(skus), "--days", str(args.days),
+           "--timeout", str(args.timeout), "--horizons", *map(str, args.horizons)]
+    if args.animate:
+        cmd.append("--animate")
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"falló la escala {skus:,} SKUs")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def _report(result, top:int):
+    print(f"\n== {result['skus']:,} SKUs × {result['days']} días — RSS pico {result['peak_rss_mb']:,.0f} MB"
+          f" (+ trabajadores {result.get('peak_workers_mb', 0):,.0f} MB)")
+    print(f"{'paso':<16} {'pared ms':>9} {'script ms':>10} {'RSS MB':>8} {'trab. MB':>9}   secciones más lentas")
+    for name, s in result["steps"].items():
+        if "skipped" in s:
+            print(f"{name:<16} {'—':>9} {'—':>10} {'—':>8} {'—':>9}   (omitido: {s['skipped']})")
+            continue
+        slow = sorted(((v, k) for k, v in s["sections_s"].items() if "/" not in k), reverse=True)[:top]
+        desc = ", ".join(f"{k} {v*1000:.0f}" for v, k in slow)
+        print(f"{name:<16} {s['wall_s']*1000:>9.0f} {s['script_s']*1000:>10.0f} {s['rss_mb']:>8.0f}"
+              f" {s.get('workers_mb', 0):>9.0f}   {desc}")
+
+def machine_info():
+    """Lo que hace comparables dos corridas: arquitectura, CPUs y modelo de CPU."""
+    model = platform.processor()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as fh:
+            model = next((l.split(":", 1)[1].strip() for l in fh if l.startswith("model name")), model)
+    except OSError:
+        pass
+    return {"machine": platform.machine(), "cpus": os.cpu_count(), "cpu_model": model}
+
+def machine_mismatch(baseline:dict):
+    """Diferencias de máquina contra la baseline (vacío = comparable)."""
+    here = machine_info()
+    return [f"{k}: baseline {baseline.get(k)!r} vs. aquí {v!r}" for k, v in here.items() if baseline.get(k) != v]
+
+def compare(results, baseline, tolerance:float, slack_ms:float):
+    """Regresiones contra la baseline: tiempo de pared por paso y RSS pico (script y trabajadores) por escala.
+    Un paso regresa si excede baseline × (1 + tolerance) + slack_ms (el piso absorbe ruido en pasos cortos)."""
+    base = {(r["skus"], r["days"]): r for r in baseline["results"]}
+    problems = []
+    for r in results:
+        b = base.get((r["skus"], r["days"]))
+        if b is None:
+            print(f"(sin baseline para {r['skus']:,} SKUs × {r['days']} días)")
+            continue
+        for name, s in r["steps"].items():
+            bs = b["steps"].get(name, {})
+            if "wall_s" not in s or "wall_s" not in bs:
+                continue
+            limit = bs["wall_s"] * (1 + tolerance) + slack_ms / 1000
+            if s["wall_s"] > limit:
+                problems.append(f"{r['skus']:,} SKUs {name}: {s['wall_s']*1000:.0f} ms > {limit*1000:.0f} ms "
+                                f"(baseline {bs['wall_s']*1000:.0f} ms)")
+        for key, what in (("peak_rss_mb", "RSS pico"), ("peak_workers_mb", "RSS pico trabajadores")):
+            if key not in b:
+                continue
+            limit = b[key] * (1 + tolerance)
+            if r[key] > limit:
+                problems.append(f"{r['skus']:,} SKUs {what}: {r[key]:.0f} MB > {limit:.0f} MB (baseline {b[key]:.0f} MB)")
+    return problems
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    ap.add_argument("--days", type=int, default=1095, help="días de historia generados")
+    ap.add_argument("--horizons", type=int, nargs="+", default=[30, 365, 1095])
+    ap.add_argument("--animate", action="store_true", help="incluye la animación de explicaciones (ritmo por fps)")
+    ap.add_argument("--timeout", type=float, default=600)
+    ap.add_argument("--top", type=int, default=4, help="secciones a mostrar por paso")
+    ap.add_argument("--json", help="escribe los resultados crudos")
+    ap.add_argument("--save", help="guarda los resultados como baseline")
+    ap.add_argument("--compare", help="baseline contra la cual comparar (exit 1 si hay regresión)")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--slack-ms", type=float, default=50)
+    ap.add_argument("--any-machine", action="store_true", help="compara aunque la baseline sea de otra máquina (sólo avisa)")
+    ap.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(run_scale(args.child, args.days, args.horizons, args.animate, args.timeout)))
+        return
+
+    baseline = None
+    if args.compare:  # antes de correr: una baseline de otra máquina no dice nada de esta
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        diff = machine_mismatch(baseline)
+        if diff and not args.any_machine:
+            raise SystemExit("La baseline es de otra máquina (--any-machine para comparar de todos modos):\n  "
+                             + "\n  ".join(diff))
+        for d in diff:
+            print(f"(aviso: máquina distinta — {d})")
+
+    results = []
+    for skus in args.sizes:
+        results.append(_spawn(skus, args))
+        _report(results[-1], args.top)
+    doc = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(), **machine_info(),
+           "horizons": args.horizons, "animate": args.animate, "results": results}
+    for path in (args.json, args.save):
+        if path:
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump(doc, fh, indent=1)
+    if baseline is not None:
+        problems = compare(results, baseline, args.tolerance, args.slack_ms)
+        if problems:
+            print("\nREGRESIONES:\n  " + "\n  ".join(problems))
+            raise SystemExit(1)
+        print(f"\nSin regresiones (tolerancia {args.tolerance:.0%} + {args.slack_ms:.0f} ms).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_filters.py
+# Micro-benchmark: máscaras booleanas actuales (copy + isin) vs. ruta indexada (bitmaps + rango).
+# Además, las posiciones filtradas del rerun: bitmaps (LocalFrame en proceso) vs. tabla por código
+# (analytics._select, la de los trabajadores sobre memoria compartida).
+# Uso: python benchmarks/bench_filters.py [--sizes 10000 100000 1000000] [--repeat 20]
+
+import argparse
+import os
+import sys
+import timeit
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datagen import generate_inventory
+from analytics import _columns, _select
+from filter_index import InventoryIndex, SeriesIndex
+
+F_REGION = ["Norte", "Sureste"]
+F_CATEGORY = ["Abarrotes", "Farmacia", "Moda"]
+HORIZON = 60
+
+def masks_path(inventory, inv_ts):
+    """La ruta original de app.py (copia completa + máscaras por rerun)."""
+    inv_view = inventory.copy()
+    inv_view = inv_view[inv_view["region"].isin(F_REGION)]
+    inv_view = inv_view[inv_view["category"].isin(F_CATEGORY)]
+    cut = inv_ts["date"].max() - pd.Timedelta(days=HORIZON-1)
+    inv_ts_view = inv_ts[(inv_ts["date"] >= cut) & inv_ts["region"].isin(F_REGION)]
+    return inv_view, inv_ts_view
+
+def indexed_path(inv_idx, ts_idx):
+    inv_view = inv_idx.select(F_REGION, F_CATEGORY)
+    cut = pd.Timestamp(ts_idx.dates[-1]) - pd.Timedelta(days=HORIZON-1)
+    return inv_view, ts_idx.select(F_REGION, cut)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--days", type=int, default=1095)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    print(f"{'filas':>10} {'máscaras ms':>12} {'índice ms':>10} {'speedup':>8} {'build ms':>9} {'bitmaps KB':>11}"
+          f" {'pos bitmap ms':>14} {'pos tabla ms':>13}")
+    for n in args.sizes:
+        inventory, inv_ts, _, _ = generate_inventory(n_skus=n, days=args.days)
+        t_build = timeit.timeit(lambda: (InventoryIndex(inventory), SeriesIndex(inv_ts)), number=1)
+        inv_idx, ts_idx = InventoryIndex(inventory), SeriesIndex(inv_ts)
+        a, b = masks_path(inventory, inv_ts), indexed_path(inv_idx, ts_idx)
+        assert a[0]["sku"].tolist() == b[0]["sku"].tolist() and len(a[1]) == len(b[1])
+        t_mask = min(timeit.repeat(lambda: masks_path(inventory, inv_ts), number=1, repeat=args.repeat))
+        t_idx = min(timeit.repeat(lambda: indexed_path(inv_idx, ts_idx), number=1, repeat=args.repeat))
+        kb = (inv_idx.region.nbytes() + inv_idx.category.nbytes() + ts_idx.region.nbytes()) / 1024
+        cols = _columns(inventory)
+        meta = {"regions": list(inventory["region"].cat.categories), "cats": list(inventory["category"].cat.categories)}
+        assert (inv_idx.rows(F_REGION, F_CATEGORY) == _select(cols, meta, F_REGION, F_CATEGORY)).all()
+        t_bits = min(timeit.repeat(lambda: inv_idx.rows(F_REGION, F_CATEGORY), number=1, repeat=args.repeat))
+        t_lut = min(timeit.repeat(lambda: _select(cols, meta, F_REGION, F_CATEGORY), number=1, repeat=args.repeat))
+        print(f"{n:>10,} {t_mask*1000:>12.2f} {t_idx*1000:>10.2f} {t_mask/t_idx:>7.1f}x {t_build*1000:>9.1f} {kb:>11.1f}"
+              f" {t_bits*1000:>14.2f} {t_lut*1000:>13.2f}")
+
+if __name__ == "__main__":
+    main()
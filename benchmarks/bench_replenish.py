@@ -0,0 +1,58 @@
+# benchmarks/bench_replenish.py
+# Micro-benchmark del planificador de reabasto: replenish.plan (NumPy: llave int64 + argpartition + sumas acumuladas
+# por región + mezcla k-way) vs. la misma lógica en pandas (sort_values + groupby.cumsum).
+# Uso: python benchmarks/bench_replenish.py [--sizes 10000 100000 1000000] [--repeat 5] [--budget-ms 1000]
+# Exit 1 si la ruta NumPy excede el presupuesto en alguna escala.
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analytics import _columns
+from datagen import generate_inventory
+from replenish import order_quantities, parse_capacity, plan
+
+TARGET_DAYS, PACK = 14, 10
+
+def pandas_path(inventory, capacity:int):
+    """Referencia en pandas: unidades asignadas por región."""
+    df = inventory.assign(qty=order_quantities(inventory["reorder_point"].to_numpy(), inventory["daily_demand"].to_numpy(),
+                                               inventory["days_cover"].to_numpy(), TARGET_DAYS, PACK))
+    df = df[df["qty"] > 0].sort_values(["region", "days_cover", "daily_demand"], ascending=[True, True, False], kind="stable")
+    before = df.groupby("region", observed=True)["qty"].cumsum() - df["qty"]
+    cap = capacity if capacity > 0 else np.iinfo(np.int64).max // 2
+    alloc = np.clip((cap - before) // PACK * PACK, 0, df["qty"])
+    return alloc.groupby(df["region"], observed=True).sum()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--regions", type=int, default=4)
+    ap.add_argument("--capacity", default="250000", help="capacidad por región (como ATLAS_REPLENISH_CAPACITY)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=1000)
+    args = ap.parse_args()
+
+    print(f"{'filas':>10} {'pandas ms':>10} {'plan ms':>8} {'speedup':>8} {'SKUs':>8} {'unidades':>12}")
+    over = []
+    for n in args.sizes:
+        inventory, _, regions, cats = generate_inventory(n_skus=n, regions=args.regions, days=30)
+        cols, caps = _columns(inventory), parse_capacity(args.capacity, regions)
+        res = plan(cols, regions, cats, caps, TARGET_DAYS, PACK)
+        ref = pandas_path(inventory, caps[0])
+        assert {r["region"]: r["units"] for r in res["regions"]} == {str(k): int(v) for k, v in ref.items()}
+        t_pd = min(timeit.repeat(lambda: pandas_path(inventory, caps[0]), number=1, repeat=args.repeat))
+        t_np = min(timeit.repeat(lambda: plan(cols, regions, cats, caps, TARGET_DAYS, PACK), number=1, repeat=args.repeat))
+        print(f"{n:>10,} {t_pd*1000:>10.1f} {t_np*1000:>8.1f} {t_pd/t_np:>7.1f}x {res['skus']:>8,} {res['units']:>12,}")
+        if t_np * 1000 > args.budget_ms:
+            over.append(f"{n:,} filas: {t_np*1000:.0f} ms > {args.budget_ms:.0f} ms")
+    if over:
+        print("\nFUERA DE PRESUPUESTO:\n  " + "\n  ".join(over))
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
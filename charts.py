@@ -0,0 +1,95 @@
+# charts.py
+# Figuras de Plotly para Agenda e Insights: hash de contenido de sus entradas (para memoizarlas),
+# reducción de puntos de series largas (LTTB o min/max, ambos conservan picos) y WebGL
+# (Scattergl) cuando la serie sigue siendo grande.
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+MARKER_POINTS = 150  # con más puntos los marcadores sólo estorban
+
+def frame_hash(*parts) -> str:
+    """Hash estable del contenido de DataFrames/Series y parámetros simples."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            h.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+            h.update(repr(list(part.columns) if isinstance(part, pd.DataFrame) else [part.name]).encode())
+        else:
+            h.update(repr(part).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+def lttb(x:np.ndarray, y:np.ndarray, n_out:int):
+    """Largest-Triangle-Three-Buckets: índices de `n_out` puntos que conservan la forma (picos incluidos).
+    `x` numérico y creciente. Siempre incluye el primero y el último."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = x.astype(np.float64); y = y.astype(np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out-2 cubetas interiores
+    out = np.empty(n_out, np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()  # promedio de la cubeta siguiente
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+def minmax(y:np.ndarray, n_out:int):
+    """Índices del mínimo y máximo de cada cubeta (≈ `n_out` puntos), en orden."""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    buckets = n_out // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    idx = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        seg = y[lo:hi]
+        idx += [lo + int(seg.argmin()), lo + int(seg.argmax())]
+    return np.unique(idx)
+
+def downsample(frame:pd.DataFrame, x:str, y:str, max_points:int, method:str="lttb"):
+    """`frame` con a lo más `max_points` filas (0 = sin límite)."""
+    if not max_points or len(frame) <= max_points:
+        return frame
+    yv = frame[y].to_numpy()
+    if method == "minmax":
+        idx = minmax(yv, max_points)
+    else:
+        xv = frame[x].to_numpy()
+        idx = lttb(xv.view(np.int64) if np.issubdtype(xv.dtype, np.datetime64) else xv, yv, max_points)
+    return frame.iloc[idx]
+
+def trend_figure(ts:pd.DataFrame, color:str, max_points:int=500, webgl_points:int=1000, method:str="lttb"):
+    """Línea de stock total por fecha; reducida a `max_points` y en WebGL si la serie original pasa
+    de `webgl_points` (se compara antes de reducir: después nunca pasaría el umbral)."""
+    view = downsample(ts, "date", "total_stock", max_points, method)
+    fig = px.line(view, x="date", y="total_stock", markers=len(view) <= MARKER_POINTS,
+                  render_mode="webgl" if len(ts) > webgl_points else "svg",
+                  color_discrete_sequence=[color])
+    fig.update_traces(line=dict(width=3))
+    fig.update_layout(height=360, margin=dict(l=10,r=10,t=10,b=10))
+    return fig
+
+def heat_figure(heat:pd.DataFrame):
+    fig = px.density_heatmap(heat, x="region", y="category", z="gap_qty", color_continuous_scale="Turbo")
+    fig.update_layout(height=360, margin=dict(l=10,r=10,t=10,b=10))
+    return fig
+
+def tree_figure(by_cat:pd.DataFrame):
+    fig = px.treemap(by_cat, path=["category"], values="gap_qty", color="gap_qty", color_continuous_scale="Magma")
+    fig.update_layout(height=360, margin=dict(l=10,r=10,t=10,b=10))
+    return fig
+
+def calendar_figure(cal:pd.DataFrame):
+    fig = px.density_heatmap(cal, x="date", y=["Eventos"]*len(cal), z="events", nbinsx=7, color_continuous_scale="Turbo")
+    fig.update_layout(height=140, margin=dict(l=10,r=10,t=10,b=10), xaxis_title="", yaxis_title="")
+    return fig
@@ -0,0 +1,78 @@
+# cube.py
+# Cubo pre-agregado para Insights: hechos de SKU por categoría×región y serie por fecha×región.
+# Se construye una vez por versión del dataset; cada combinación de filtros es un slice NumPy.
+
+import numpy as np
+import pandas as pd
+
+class InsightsCube:
+    """Matrices densas (categoría × región) y (fecha × región) con slices baratos."""
+    def __init__(self, facts:pd.DataFrame, ts:pd.DataFrame, regions, cats):
+        self.regions = list(regions)
+        self.cats = list(cats)
+        self._r_ix = r_ix = {r: i for i, r in enumerate(self.regions)}
+        self._c_ix = c_ix = {c: i for i, c in enumerate(self.cats)}
+        shape = (len(self.cats), len(self.regions))
+        ci = facts["category"].map(c_ix).to_numpy(dtype=np.intp)
+        ri = facts["region"].map(r_ix).to_numpy(dtype=np.intp)
+        self.n = np.zeros(shape, np.int64)
+        self.below = np.zeros(shape, np.int64)
+        self.cover_sum = np.zeros(shape, np.float64)
+        self.gap = np.zeros(shape, np.int64)
+        np.add.at(self.n, (ci, ri), facts["n"].to_numpy(np.int64))
+        np.add.at(self.below, (ci, ri), facts["below"].to_numpy(np.int64))
+        np.add.at(self.cover_sum, (ci, ri), facts["cover_sum"].to_numpy(np.float64))
+        np.add.at(self.gap, (ci, ri), facts["gap_qty"].to_numpy(np.int64))
+
+        self.dates = pd.DatetimeIndex(np.sort(ts["date"].unique()))
+        di = self.dates.get_indexer(ts["date"])
+        tri = ts["region"].map(r_ix).to_numpy(dtype=np.intp)
+        self.ts = np.zeros((len(self.dates), len(self.regions)), np.int64)
+        np.add.at(self.ts, (di, tri), ts["total_stock"].to_numpy(np.int64))
+
+    def _axes(self, regions, cats):
+        ri = [self._r_ix[r] for r in regions] if regions else range(len(self.regions))
+        ci = [self._c_ix[c] for c in cats] if cats else range(len(self.cats))
+        return np.asarray(ri, np.intp), np.asarray(ci, np.intp)
+
+    def trend(self, regions=(), since=None):
+        """Serie total por fecha (equivale a groupby('date').sum() sobre la vista filtrada)."""
+        ri, _ = self._axes(regions, ())
+        start = 0 if since is None else self.dates.searchsorted(pd.Timestamp(since))
+        return pd.DataFrame({"date": self.dates[start:], "total_stock": self.ts[start:, ri].sum(axis=1)})
+
+    def heat(self, regions=(), cats=()):
+        """Brecha por categoría×región (sólo celdas con SKUs, como un groupby observado)."""
+        ri, ci = self._axes(regions, cats)
+        n = self.n[np.ix_(ci, ri)]
+        cc, rr = np.nonzero(n)
+        return pd.DataFrame({"category": [self.cats[i] for i in ci[cc]],
+                             "region": [self.regions[i] for i in ri[rr]],
+                             "gap_qty": self.gap[np.ix_(ci, ri)][cc, rr]})
+
+    def by_category(self, regions=(), cats=()):
+        """Brecha por categoría, de mayor a menor."""
+        ri, ci = self._axes(regions, cats)
+        gap = self.gap[np.ix_(ci, ri)].sum(axis=1)
+        seen = self.n[np.ix_(ci, ri)].sum(axis=1) > 0
+        order = np.argsort(-gap[seen], kind="stable")
+        return pd.DataFrame({"category": [self.cats[i] for i in ci[seen][order]], "gap_qty": gap[seen][order]})
+
+    def kpis(self, regions=(), cats=()):
+        """(SKUs, bajo punto de pedido, suma de cobertura) del slice: KPIs sin tocar la tabla."""
+        ri, ci = self._axes(regions, cats)
+        ix = np.ix_(ci, ri)
+        return int(self.n[ix].sum()), int(self.below[ix].sum()), float(self.cover_sum[ix].sum())
+
+    def apply(self, ci, ri, d_stock, d_below, d_cover, d_gap):
+        """Ajusta los acumulados con cambios por fila (índices del cubo); O(filas cambiadas)."""
+        np.add.at(self.below, (ci, ri), d_below)
+        np.add.at(self.cover_sum, (ci, ri), d_cover)
+        np.add.at(self.gap, (ci, ri), d_gap)
+        self.ts[-1] += np.bincount(ri, weights=d_stock, minlength=len(self.regions)).astype(np.int64)
+
+def build_cube(source):
+    """Cubo a partir de los agregados empujados al motor de `source`."""
+    facts, ts = source.aggregates()
+    regions, cats = source.dimensions()
+    return InsightsCube(facts, ts, regions, cats)
@@ -0,0 +1,122 @@
+# datagen.py
+# Generador sintético vectorizado (NumPy) para inventarios + serie por región.
+# Escala a millones de SKUs / cientos de tiendas / años de historia sin loops por fila.
+
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+
+DEFAULT_REGIONS = ["Centro", "Norte", "Occidente", "Sureste"]
+DEFAULT_CATS = ["Abarrotes","Perecederos","Hogar","Electrónica","Farmacia","Moda"]
+
+INV_COLUMNS = ["sku","category","region","stock","reorder_point","daily_demand","days_cover","below_reorder"]
+TS_COLUMNS = ["date","region","total_stock"]
+
+# SKU en memoria como id entero (int32); la etiqueta de texto sólo se arma al mostrar/exportar/sembrar SQL
+SKU_PREFIX, SKU_WIDTH = "SKU-", 5
+
+def sku_labels(ids):
+    """Ids enteros -> etiquetas 'SKU-00120'."""
+    ids = np.asarray(ids).astype(str)
+    return np.char.add(SKU_PREFIX, np.char.zfill(ids, SKU_WIDTH)) if ids.size else ids
+
+def sku_ids(values):
+    """Etiquetas (o ids) -> ids enteros; -1 si no se pueden leer."""
+    arr = np.asarray(values)
+    if np.issubdtype(arr.dtype, np.integer):
+        return arr.astype(np.int64)
+    digits = pd.Series(arr, dtype="str").str.removeprefix(SKU_PREFIX)
+    return pd.to_numeric(digits, errors="coerce").fillna(-1).astype(np.int64).to_numpy()
+
+def with_sku_labels(frame:pd.DataFrame):
+    """`frame` con `sku` como texto si viene como id entero (frames ya etiquetados pasan igual)."""
+    if "sku" in frame.columns and pd.api.types.is_integer_dtype(frame["sku"].dtype):
+        return frame.assign(sku=pd.array(sku_labels(frame["sku"].to_numpy()), dtype="str"))
+    return frame
+
+def memory_report(frame:pd.DataFrame, sample:int=10_000):
+    """Bytes por columna: representación actual vs. la ingenua (texto como objetos Python,
+    números en 64 bits). Lo ingenuo se mide en una muestra y se escala."""
+    head = with_sku_labels(frame.iloc[:sample])
+    scale = len(frame) / max(1, len(head))
+    naive = head.astype({c: (np.float64 if pd.api.types.is_float_dtype(t) else np.int64)
+                         if pd.api.types.is_numeric_dtype(t) and not isinstance(t, pd.CategoricalDtype) else object
+                         for c, t in head.dtypes.items()})
+    naive_bytes = naive.memory_usage(index=False, deep=True) * scale
+    actual = frame.memory_usage(index=False, deep=True)
+    out = pd.DataFrame({"dtype": frame.dtypes.astype(str), "bytes": actual, "naive_bytes": naive_bytes.round()})
+    out["saved"] = out["naive_bytes"] - out["bytes"]
+    return out.astype({"bytes": np.int64, "naive_bytes": np.int64, "saved": np.int64})
+
+def resolve_regions(regions=4):
+    """Acepta lista de nombres o un conteo; más allá de las 4 regiones base se generan tiendas."""
+    if not isinstance(regions, (int, np.integer)):
+        return list(regions)
+    if regions <= len(DEFAULT_REGIONS):
+        return DEFAULT_REGIONS[:regions]
+    return [f"Tienda-{i:04d}" for i in range(1, regions + 1)]
+
+def _sku_block(rng, start:int, n:int, cat_dtype, reg_dtype):
+    """Un bloque de n SKUs consecutivos desde `start` (todo en arreglos)."""
+    ids = np.arange(start, start + n)
+    stock = np.maximum(0, rng.normal(360, 120, n).astype(np.int32))
+    reorder = np.maximum(50, rng.normal(300, 90, n)).astype(np.int32)
+    daily = np.maximum(1, rng.normal(28, 7, n).astype(np.int16))
+    cover = np.round(stock / daily, 1).astype(np.float32)
+    return pd.DataFrame({
+        "sku": ids.astype(np.int32),
+        "category": pd.Categorical.from_codes(rng.integers(0, len(cat_dtype.categories), n), dtype=cat_dtype),
+        "region": pd.Categorical.from_codes(rng.integers(0, len(reg_dtype.categories), n), dtype=reg_dtype),
+        "stock": stock,
+        "reorder_point": reorder,
+        "daily_demand": daily,
+        "days_cover": cover,
+        "below_reorder": (stock < reorder).astype(np.int8),
+    })
+
+def _ts_block(rng, dates:pd.DatetimeIndex, reg_dtype):
+    """Serie fecha × región para un rango de fechas (orden fecha, región)."""
+    n_reg = len(reg_dtype.categories)
+    n = len(dates) * n_reg
+    total = np.maximum(5000, rng.normal(8200, 1100, n).astype(np.int32))
+    return pd.DataFrame({
+        "date": np.repeat(dates.values, n_reg),
+        "region": pd.Categorical.from_codes(np.tile(np.arange(n_reg), len(dates)), dtype=reg_dtype),
+        "total_stock": total,
+    })
+
+def _dtypes(regions, categories):
+    return (pd.CategoricalDtype(list(categories)), pd.CategoricalDtype(resolve_regions(regions)))
+
+def _dates(days:int, end=None):
+    end = end or date.today()
+    return pd.date_range(end - timedelta(days=days-1), end, freq="D")
+
+def generate_inventory(n_skus:int=80, regions=4, categories=DEFAULT_CATS, days:int=120, seed:int=7,
+                       sku_start:int=120, end:date=None):
+    """Genera (inventario, serie, regiones, categorías) en una sola pasada vectorizada."""
+    rng = np.random.default_rng(seed)
+    cat_dtype, reg_dtype = _dtypes(regions, categories)
+    inv = _sku_block(rng, sku_start, n_skus, cat_dtype, reg_dtype)
+    inv_ts = _ts_block(rng, _dates(days, end), reg_dtype)
+    return inv, inv_ts, list(reg_dtype.categories), list(cat_dtype.categories)
+
+def iter_inventory(n_skus:int, regions=4, categories=DEFAULT_CATS, seed:int=7, sku_start:int=120,
+                   chunk_size:int=250_000):
+    """Modo streaming: produce particiones del inventario de `chunk_size` SKUs.
+    Cada partición usa su propio generador derivado de la semilla, así el resultado
+    es reproducible para un mismo `chunk_size` sin materializar todo el catálogo."""
+    cat_dtype, reg_dtype = _dtypes(regions, categories)
+    n_chunks = -(-n_skus // chunk_size)
+    for i, ss in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+        start = i * chunk_size
+        n = min(chunk_size, n_skus - start)
+        yield _sku_block(np.random.default_rng(ss), sku_start + start, n, cat_dtype, reg_dtype)
+
+def iter_inv_ts(regions=4, days:int=120, seed:int=7, end:date=None, chunk_days:int=90):
+    """Modo streaming de la serie: particiones de `chunk_days` días (todas las regiones)."""
+    _, reg_dtype = _dtypes(regions, DEFAULT_CATS)
+    dates = _dates(days, end)
+    n_chunks = -(-len(dates) // chunk_days)
+    for i, ss in enumerate(np.random.SeedSequence([seed, 1]).spawn(n_chunks)):
+        yield _ts_block(np.random.default_rng(ss), dates[i*chunk_days:(i+1)*chunk_days], reg_dtype)
@@ -0,0 +1,520 @@
+# datasource.py
+# Capa de datos enchufable: el selector "Motor de datos" elige el backend real.
+# Pool de conexiones compartido entre sesiones, consultas parametrizadas con filtros
+# empujados al motor (región / categoría / horizonte) y caché TTL de resultados.
+
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import itertools
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from datagen import sku_ids, with_sku_labels
+from filter_index import InventoryIndex, SeriesIndex
+from tables import top_n_positions
+
+INV_COLUMNS = ["sku", "category", "region", "stock", "reorder_point", "daily_demand", "days_cover", "below_reorder"]
+INV_SELECT = f"SELECT {', '.join(INV_COLUMNS)} FROM inventory"
+TS_SELECT = "SELECT date, region, total_stock FROM inv_ts"
+
+INV_DTYPES = {"stock": "int32", "reorder_point": "int32", "daily_demand": "int16",
+              "days_cover": "float32", "below_reorder": "int8"}
+TS_DTYPES = {"total_stock": "int32"}
+
+# Agregados empujados al motor (insumo del cubo de Insights)
+INV_AGG = ("SELECT category, region, COUNT(*) AS n, SUM(below_reorder) AS below, SUM(days_cover) AS cover_sum, "
+           "SUM(CASE WHEN reorder_point > stock THEN reorder_point - stock ELSE 0 END) AS gap_qty "
+           "FROM inventory GROUP BY category, region")
+TS_AGG = "SELECT date, region, SUM(total_stock) AS total_stock FROM inv_ts GROUP BY date, region ORDER BY date"
+VERSION_SQL = "SELECT COUNT(*) AS n, SUM(stock) AS s FROM inventory"
+# Resumen de la vista filtrada (KPIs y conteo del grid sin traer filas)
+SUMMARY_SQL = ("SELECT region, category, COUNT(*) AS n, SUM(below_reorder) AS below, SUM(days_cover) AS cover_sum "
+               "FROM inventory{where} GROUP BY region, category")
+
+class DataSourceError(RuntimeError):
+    pass
+
+# =========================
+# POOL + CACHÉ + MÉTRICAS
+# =========================
+class ConnectionPool:
+    """Pool acotado; crea conexiones bajo demanda hasta `size` y las reutiliza."""
+    def __init__(self, factory, size:int=4, timeout:float=30.0):
+        self._factory = factory
+        self._idle = queue.LifoQueue()
+        self._sem = threading.BoundedSemaphore(size)
+        self._timeout = timeout
+        self.size = size
+        self.created = 0
+
+    @contextmanager
+    def connection(self):
+        if not self._sem.acquire(timeout=self._timeout):
+            raise DataSourceError("Pool agotado: sin conexiones libres")
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._factory(); self.created += 1
+            try:
+                yield conn
+            except Exception:
+                _close(conn); raise
+            else:
+                self._idle.put(conn)
+        finally:
+            self._sem.release()
+
+    def close(self):
+        while not self._idle.empty():
+            _close(self._idle.get_nowait())
+
+def _close(conn):
+    try: conn.close()
+    except Exception: pass
+
+class ResultCache:
+    """Caché TTL de resultados por tupla de filtros (thread-safe), acotada por entradas y por
+    bytes: un resultado mayor que `max_bytes` no se guarda."""
+    def __init__(self, ttl:float=300.0, max_entries:int=256, max_bytes:int=256 << 20):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = {}          # llave -> (vence, valor, bytes)
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            hit = self._data.get(key)
+            if hit and hit[0] > time.monotonic():
+                self.hits += 1
+                return hit[1]
+            self._pop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        size = _nbytes(value)
+        with self._lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                return
+            while self._data and (len(self._data) >= self.max_entries or self.nbytes + size > self.max_bytes):
+                # expulsa la entrada que vence primero
+                self._pop(min(self._data, key=lambda k: self._data[k][0]))
+            self._data[key] = (time.monotonic() + self.ttl, value, size)
+            self.nbytes += size
+
+    def discard(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def _pop(self, key):
+        hit = self._data.pop(key, None)
+        if hit:
+            self.nbytes -= hit[2]
+
+def _nbytes(value):
+    """Tamaño aproximado de un resultado (frames con su texto; tuplas de frames sumadas)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, tuple):
+        return sum(map(_nbytes, value))
+    return sys.getsizeof(value)
+
+class QueryStats:
+    """Latencias por consulta (ventana de las últimas N) y contadores."""
+    def __init__(self, window:int=200):
+        self._lat = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, name:str, seconds:float):
+        with self._lock:
+            self._lat.setdefault(name, deque(maxlen=self._window)).append(seconds)
+
+    def summary(self):
+        with self._lock:
+            return {name: {"count": len(v), "last_ms": v[-1]*1000, "avg_ms": sum(v)/len(v)*1000,
+                           "max_ms": max(v)*1000} for name, v in self._lat.items()}
+
+# =========================
+# BACKENDS
+# =========================
+class DataSource:
+    """Base: arma SQL parametrizado, consulta vía pool y cachea por filtros."""
+    engine = "base"
+    paramstyle = "qmark"  # qmark: ?  |  format: %s  |  named: :p0
+
+    def __init__(self, pool_size:int=4, ttl:float=300.0, cache_mb:int=256):
+        self.pool = ConnectionPool(self._connect, size=pool_size)
+        self.cache = ResultCache(ttl=ttl, max_bytes=cache_mb << 20)
+        self.stats = QueryStats()
+        self.label = self.engine
+        self._dims = None
+
+    # --- a implementar por backend
+    def _connect(self):
+        raise NotImplementedError
+
+    def _execute(self, conn, sql:str, params:list):
+        cur = conn.cursor()
+        try:
+            cur.execute(sql, params)
+            cols = [c[0] for c in cur.description]
+            return pd.DataFrame.from_records(cur.fetchall(), columns=cols)
+        finally:
+            cur.close()
+
+    # --- SQL
+    def _placeholders(self, counter, n:int):
+        if self.paramstyle == "named":
+            return ", ".join(f":p{next(counter)}" for _ in range(n))
+        mark = "%s" if self.paramstyle == "format" else "?"
+        return ", ".join([mark] * n)
+
+    def _bind(self, params:list):
+        if self.paramstyle == "named":
+            return {f"p{i}": v for i, v in enumerate(params)}
+        return params
+
+    def _where(self, filters):
+        """filters: lista de (columna, op, valor|valores). Listas vacías = sin filtro."""
+        clauses, params, counter = [], [], itertools.count()
+        for col, op, val in filters:
+            if op == "in":
+                if not val: continue
+                val = list(val)
+                clauses.append(f"{col} IN ({self._placeholders(counter, len(val))})")
+                params.extend(val)
+            else:
+                clauses.append(f"{col} {op} {self._placeholders(counter, 1)}")
+                params.append(val)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self, name:str, sql:str, params:list, cache_key=None, post=None):
+        """Ejecuta con caché TTL; `post` tipa el resultado antes de guardarlo."""
+        key = (name, cache_key if cache_key is not None else tuple(params))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        t0 = time.perf_counter()
+        with self.pool.connection() as conn:
+            df = self._execute(conn, sql, self._bind(params))
+        if post is not None:
+            df = post(df)
+        self.stats.record(name, time.perf_counter() - t0)
+        self.cache.put(key, df)
+        return df
+
+    # --- API de la app
+    def dimensions(self):
+        """(regiones, categorías) disponibles en el motor."""
+        if self._dims is None:
+            regs = self.query("dim_region", "SELECT DISTINCT region FROM inventory ORDER BY region", [])
+            cats = self.query("dim_category", "SELECT DISTINCT category FROM inventory ORDER BY category", [])
+            self._dims = (regs["region"].tolist(), cats["category"].tolist())
+        return self._dims
+
+    def max_date(self):
+        df = self.query("ts_max_date", "SELECT MAX(date) AS d FROM inv_ts", [])
+        return pd.Timestamp(df["d"].iloc[0])
+
+    def inventory(self, regions=(), categories=()):
+        regions, categories = tuple(sorted(regions)), tuple(sorted(categories))
+        where, params = self._where([("region", "in", regions), ("category", "in", categories)])
+        return self.query("inventory", INV_SELECT + where, params, cache_key=(regions, categories),
+                          post=self._typed_inventory)
+
+    def summary(self, regions=(), categories=()):
+        """Conteo, bajo-punto y suma de cobertura por región×categoría de la vista filtrada
+        (agregado en el motor: KPIs y tamaño del grid sin traer filas)."""
+        regions, categories = tuple(sorted(regions)), tuple(sorted(categories))
+        where, params = self._where([("region", "in", regions), ("category", "in", categories)])
+        return self.query("summary", SUMMARY_SQL.format(where=where), params, cache_key=(regions, categories))
+
+    def rows(self, regions=(), categories=(), order_by:str="days_cover", ascending:bool=True, limit:int=50, offset:int=0):
+        """Una página de la vista filtrada ordenada en el motor (ORDER BY + LIMIT/OFFSET); región y
+        categoría en el orden de sus dimensiones y empates por SKU, como el backend local."""
+        if order_by not in INV_COLUMNS:
+            raise ValueError(f"columna de orden desconocida: {order_by}")
+        regions, categories = tuple(sorted(regions)), tuple(sorted(categories))
+        where, params = self._where([("region", "in", regions), ("category", "in", categories)])
+        key = order_by
+        if order_by in ("region", "category"):
+            names = self.dimensions()[order_by == "category"]
+            marks = self._placeholders(itertools.count(len(params)), len(names)).split(", ")
+            key = f"CASE {order_by} " + " ".join(f"WHEN {m} THEN {i}" for i, m in enumerate(marks)) + " END"
+            params = params + list(names)
+        order = f" ORDER BY {key} {'ASC' if ascending else 'DESC'}" + ("" if order_by == "sku" else ", sku")
+        return self.query("rows", INV_SELECT + where + order + self._page(int(limit), int(offset)), params,
+                          cache_key=(regions, categories, order_by, ascending, limit, offset), post=self._typed_inventory)
+
+    def _page(self, limit:int, offset:int):
+        return f" LIMIT {limit} OFFSET {offset}"
+
+    def inv_ts(self, regions=(), since=None):
+        regions = tuple(sorted(regions))
+        filters = [("region", "in", regions)]
+        if since is not None:
+            filters.append(("date", ">=", self._date_param(since)))
+        where, params = self._where(filters)
+        return self.query("inv_ts", TS_SELECT + where + " ORDER BY date, region", params,
+                          cache_key=(regions, str(since)), post=self._typed_ts)
+
+    def version(self):
+        """Huella barata del dataset (cambia cuando cambia el inventario; refresca con el TTL)."""
+        df = self.query("version", VERSION_SQL, [])
+        return (self.label, int(df["n"].iloc[0]), int(df["s"].iloc[0] or 0), str(self.max_date()))
+
+    def aggregates(self):
+        """(hechos categoría×región, serie fecha×región) agregados en el motor."""
+        inv = self.query("agg_inventory", INV_AGG, [])
+        ts = self.query("agg_ts", TS_AGG, [])
+        return inv, ts.assign(date=pd.to_datetime(ts["date"]))
+
+    def _date_param(self, d):
+        return pd.Timestamp(d).to_pydatetime()
+
+    def _typed_inventory(self, df):
+        regs, cats = self.dimensions()
+        return df.astype({**INV_DTYPES, "category": pd.CategoricalDtype(cats), "region": pd.CategoricalDtype(regs)})
+
+    def _typed_ts(self, df):
+        regs, _ = self.dimensions()
+        df = df.astype({**TS_DTYPES, "region": pd.CategoricalDtype(regs)})
+        df["date"] = pd.to_datetime(df["date"])
+        return df
+
+    def metrics(self):
+        return {"engine": self.label, "cache_hits": self.cache.hits, "cache_misses": self.cache.misses,
+                "pool_size": self.pool.size, "connections": self.pool.created, "queries": self.stats.summary()}
+
+    def close(self):
+        self.pool.close()
+
+class SQLiteSource(DataSource):
+    """Stand-in local (offline): SQLite en memoria compartida, sembrado con DataFrames."""
+    engine = "SQLite"
+    _ids = itertools.count()
+
+    def __init__(self, inventory:pd.DataFrame, inv_ts:pd.DataFrame, path:str=None, **kw):
+        self.path = path or f"file:atlas_{os.getpid()}_{next(self._ids)}?mode=memory&cache=shared"
+        super().__init__(**kw)
+        with self.pool.connection() as conn:  # la primera conexión mantiene viva la BD en memoria
+            with_sku_labels(inventory).astype({"category": str, "region": str}).to_sql("inventory", conn, if_exists="replace", index=False)
+            ts = inv_ts.astype({"region": str})
+            ts["date"] = ts["date"].dt.strftime("%Y-%m-%d")
+            ts.to_sql("inv_ts", conn, if_exists="replace", index=False)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_inv_reg_cat ON inventory(region, category)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_ts_date_reg ON inv_ts(date, region)")
+            conn.commit()
+        self._dims = (list(inventory["region"].cat.categories), list(inventory["category"].cat.categories))
+
+    def _connect(self):
+        return sqlite3.connect(self.path, uri=self.path.startswith("file:"), check_same_thread=False)
+
+    def _date_param(self, d):
+        return pd.Timestamp(d).strftime("%Y-%m-%d")
+
+class PostgresSource(DataSource):
+    engine = "Postgres"
+    paramstyle = "format"
+    dsn_env = "ATLAS_PG_DSN"
+
+    def _connect(self):
+        import psycopg2
+        return psycopg2.connect(os.environ[self.dsn_env])
+
+class SQLServerSource(DataSource):
+    engine = "SQL Server"
+    dsn_env = "ATLAS_MSSQL_DSN"
+
+    def _page(self, limit:int, offset:int):
+        return f" OFFSET {offset} ROWS FETCH NEXT {limit} ROWS ONLY"
+
+    def _connect(self):
+        import pyodbc
+        return pyodbc.connect(os.environ[self.dsn_env])
+
+class SparkSource(DataSource):
+    """Spark SQL (>= 3.4, parámetros con nombre). La 'conexión' es la SparkSession."""
+    engine = "Spark"
+    paramstyle = "named"
+    dsn_env = "ATLAS_SPARK_MASTER"
+
+    def _connect(self):
+        from pyspark.sql import SparkSession
+        return SparkSession.builder.master(os.environ[self.dsn_env]).appName("atlas-data-suite").getOrCreate()
+
+    def _execute(self, conn, sql, params):
+        return conn.sql(sql, args=params).toPandas()
+
+MUTABLE_INV = ["stock", "days_cover", "below_reorder"]   # lo que escribe `apply_deltas`
+
+class MemorySource(DataSource):
+    """Stand-in local en memoria: filtra con bitmaps persistentes (filter_index) en lugar
+    de SQL; sin filtros devuelve los frames compartidos, sin copia."""
+    engine = "Memoria"
+
+    def __init__(self, inventory:pd.DataFrame, inv_ts:pd.DataFrame, **kw):
+        super().__init__(**kw)
+        # copias superficiales: los frames sembrados se comparten (sólo lectura) entre motores; las
+        # columnas que `apply_deltas` escribe se copian aquí, sin depender del copy-on-write de pandas 3
+        inventory, inv_ts = inventory.copy(deep=False), inv_ts.copy(deep=False)
+        for c in MUTABLE_INV:
+            inventory[c] = inventory[c].to_numpy(copy=True)
+        inv_ts["total_stock"] = inv_ts["total_stock"].to_numpy(copy=True)
+        self.inv_index = InventoryIndex(inventory)
+        self.ts_index = SeriesIndex(inv_ts)
+        self._dims = (list(inventory["region"].cat.categories), list(inventory["category"].cat.categories))
+        self._sku_pos = None     # sku -> fila, se arma con el primer delta
+        self._ts_last = None     # filas de la última fecha de la serie, por región
+        self._write = threading.Lock()
+
+    def _connect(self):
+        return None
+
+    def _timed(self, name:str, fn, cache_key=None):
+        """Como query(): caché TTL opcional + latencia, pero resolviendo en memoria."""
+        if cache_key is not None:
+            cached = self.cache.get((name, cache_key))
+            if cached is not None:
+                return cached
+        t0 = time.perf_counter()
+        out = fn()
+        self.stats.record(name, time.perf_counter() - t0)
+        if cache_key is not None:
+            self.cache.put((name, cache_key), out)
+        return out
+
+    def inventory(self, regions=(), categories=()):
+        return self._timed("inventory", lambda: self.inv_index.select(regions, categories))
+
+    def inv_ts(self, regions=(), since=None):
+        return self._timed("inv_ts", lambda: self.ts_index.select(regions, since))
+
+    def summary(self, regions=(), categories=()):
+        def agg():
+            df = self.inv_index.select(regions, categories)
+            return (df.groupby(["region", "category"], observed=True, sort=False)
+                      .agg(n=("sku", "size"), below=("below_reorder", "sum"), cover_sum=("days_cover", "sum"))
+                      .reset_index())
+        return self._timed("summary", agg)
+
+    def rows(self, regions=(), categories=(), order_by:str="days_cover", ascending:bool=True, limit:int=50, offset:int=0):
+        if order_by not in INV_COLUMNS:
+            raise ValueError(f"columna de orden desconocida: {order_by}")
+        def page():
+            df = self.inv_index.select(regions, categories)
+            return df.take(top_n_positions(df[order_by], offset + limit, ascending)[offset:])
+        return self._timed("rows", page)
+
+    def max_date(self):
+        return pd.Timestamp(self.ts_index.dates[-1])
+
+    def version(self):
+        """El stock no forma parte de la versión: cambia en sitio con `apply_deltas` y el cubo
+        se ajusta incrementalmente en lugar de reconstruirse."""
+        inv = self.inv_index.frame
+        return self._timed("version", lambda: (self.label, len(inv), str(self.max_date())), cache_key=())
+
+    def apply_deltas(self, skus, qty):
+        """Aplica movimientos de stock (`qty` con signo, por SKU) en sitio, en O(filas cambiadas).
+        SKUs desconocidos se ignoran; repetidos se suman. Regresa los cambios por fila (códigos de
+        categoría/región y diferencias de stock, bajo-punto, cobertura y brecha) para los acumulados."""
+        inv = self.inv_index.frame
+        with self._write:
+            if self._sku_pos is None:
+                self._sku_pos = pd.Index(inv["sku"])
+            if pd.api.types.is_integer_dtype(inv["sku"].dtype):
+                skus = sku_ids(skus)
+            pos = self._sku_pos.get_indexer(pd.Index(skus))
+            known = pos >= 0
+            pos, inverse = np.unique(pos[known], return_inverse=True)
+            qty = np.bincount(inverse, weights=np.asarray(qty, np.float64)[known], minlength=len(pos)).astype(np.int64)
+
+            stock = inv["stock"].to_numpy()[pos].astype(np.int64)
+            rop = inv["reorder_point"].to_numpy()[pos].astype(np.int64)
+            new_stock = np.maximum(0, stock + qty)
+            new_cover = np.round(new_stock / inv["daily_demand"].to_numpy()[pos], 1).astype(np.float32)
+            new_below = (new_stock < rop).astype(np.int8)
+            changes = {
+                "pos": pos,
+                "category": inv["category"].cat.codes.to_numpy()[pos],
+                "region": inv["region"].cat.codes.to_numpy()[pos],
+                "stock": new_stock - stock,
+                "below": new_below.astype(np.int64) - inv["below_reorder"].to_numpy()[pos],
+                "cover": new_cover.astype(np.float64) - inv["days_cover"].to_numpy()[pos],
+                "gap": np.maximum(0, rop - new_stock) - np.maximum(0, rop - stock),
+            }
+            cols = inv.columns.get_indexer(MUTABLE_INV)
+            inv.iloc[pos, cols[0]] = new_stock.astype(np.int32)
+            inv.iloc[pos, cols[1]] = new_cover
+            inv.iloc[pos, cols[2]] = new_below
+
+            # el último día de la serie refleja el stock vivo por región
+            ts = self.ts_index.frame
+            if self._ts_last is None:
+                start = int(np.searchsorted(self.ts_index.dates, self.ts_index.dates[-1], "left"))
+                rows = np.arange(start, len(ts))
+                self._ts_last = (rows, ts["region"].cat.codes.to_numpy()[rows])
+            rows, codes = self._ts_last
+            by_region = np.bincount(changes["region"], weights=changes["stock"],
+                                    minlength=len(ts["region"].cat.categories)).astype(np.int64)
+            j = ts.columns.get_loc("total_stock")
+            ts.iloc[rows, j] = (ts["total_stock"].to_numpy()[rows] + by_region[codes]).astype(ts["total_stock"].dtype)
+            self.cache.discard(("aggregates", ()))  # una reconstrucción del cubo parte del estado vivo
+        return changes
+
+    def aggregates(self):
+        def agg():
+            inv = self.inv_index.frame
+            facts = inv.assign(gap_qty=(inv["reorder_point"] - inv["stock"]).clip(lower=0)).groupby(
+                ["category", "region"], observed=True).agg(
+                n=("sku", "size"), below=("below_reorder", "sum"), cover_sum=("days_cover", "sum"),
+                gap_qty=("gap_qty", "sum")).reset_index()
+            ts = self.ts_index.frame.groupby(["date", "region"], observed=True, as_index=False)["total_stock"].sum()
+            return facts, ts
+        return self._timed("aggregates", agg, cache_key=())
+
+ENGINES = {"Postgres": PostgresSource, "SQL Server": SQLServerSource, "Spark": SparkSource}
+
+LOCAL_BACKENDS = {"memory": MemorySource, "sqlite": SQLiteSource}
+
+def open_source(engine:str, seed_frames, pool_size:int=4, ttl:float=300.0, local:str=None, cache_mb:int=256):
+    """Abre el backend real si hay DSN y driver; si no, cae al stand-in local
+    (`local` / ATLAS_LOCAL_BACKEND: "memory" indexado por defecto, o "sqlite").
+    `seed_frames` es un callable que devuelve (inventario, serie) para sembrar el stand-in."""
+    cls = ENGINES.get(engine)
+    if cls is not None and os.environ.get(cls.dsn_env):
+        try:
+            src = cls(pool_size=pool_size, ttl=ttl, cache_mb=cache_mb)
+            src.dimensions()  # valida conexión y tablas
+            return src
+        except Exception as e:
+            fallback_reason = f"{type(e).__name__}: {e}"
+    else:
+        fallback_reason = "sin DSN configurado"
+    local_cls = LOCAL_BACKENDS[local or os.environ.get("ATLAS_LOCAL_BACKEND", "memory")]
+    inv, ts = seed_frames()
+    src = local_cls(inv, ts, pool_size=pool_size, ttl=ttl, cache_mb=cache_mb)
+    src.label = f"{engine} (local {local_cls.engine} — {fallback_reason})"
+    return src
@@ -0,0 +1,399 @@
+# dispatcher.py
+# Despacho asíncrono de acciones salientes (correo, Slack, WhatsApp, Jira, Calendar).
+# Outbox durable en SQLite, worker en segundo plano, límites de tasa por conector,
+# lotes para ráfagas de Slack/WhatsApp, llaves de idempotencia y reintentos con backoff exponencial.
+
+import hashlib
+import json
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+
+QUEUED, SENDING, SENT, RETRY, FAILED = "queued", "sending", "sent", "retry", "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idem_key TEXT UNIQUE NOT NULL,
+    connector TEXT NOT NULL,
+    target TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    session TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_outbox_due ON outbox(status, next_attempt);
+CREATE INDEX IF NOT EXISTS ix_outbox_session ON outbox(session, connector, id);
+"""
+
+class PermanentError(Exception):
+    """Error que no se reintenta (p.ej. HTTP 4xx distinto de 429)."""
+
+CHAIN = "then"   # acción encadenada: vive en el payload del outbox, nunca viaja al servicio externo
+
+def service_fields(job) -> dict:
+    """Payload del trabajo tal como se envía al servicio (sin la acción encadenada)."""
+    return {k: v for k, v in job["payload"].items() if k != CHAIN}
+
+def fill_chain(payload:dict, result:dict) -> dict:
+    """Sustituye `{llave}` por los campos del resultado del envío previo (p.ej. `{key}` del ticket
+    de Jira). Reemplazo literal: otras llaves del texto (JSON, código) quedan intactas."""
+    def fill(v):
+        for k, r in result.items():
+            v = v.replace("{" + k + "}", str(r))
+        return v
+    return {k: (fill(v) if isinstance(v, str) else v) for k, v in payload.items()}
+
+def idempotency_key(connector:str, target:str, payload:dict, scope:str="") -> str:
+    raw = json.dumps([connector, target, payload, scope], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+# =========================
+# OUTBOX
+# =========================
+class Outbox:
+    """Cola durable en un archivo SQLite (WAL); sobrevive reinicios del servidor."""
+    def __init__(self, path:str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        # trabajos que quedaron "sending" por un reinicio vuelven a la cola
+        self._conn.execute("UPDATE outbox SET status=? WHERE status=?", (RETRY, SENDING))
+
+    def enqueue(self, connector:str, target:str, payload:dict, session:str=None, idem_key:str=None):
+        """Inserta un trabajo; si la llave ya existe devuelve el id existente (idempotente)."""
+        now = time.time()
+        key = idem_key or idempotency_key(connector, target, payload)
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO outbox(idem_key, connector, target, payload, session, status, next_attempt, created, updated) "
+                "VALUES (?,?,?,?,?,?,?,?,?)",
+                (key, connector, target, json.dumps(payload, ensure_ascii=False), session, QUEUED, now, now, now))
+            if cur.rowcount:
+                return cur.lastrowid, True
+            row = self._conn.execute("SELECT id FROM outbox WHERE idem_key=?", (key,)).fetchone()
+            return row["id"], False
+
+    def claim_due(self, connector:str, limit:int, settle:float=0.0):
+        """Marca como 'sending' hasta `limit` trabajos vencidos (creados hace >= `settle` s)."""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM outbox WHERE connector=? AND status IN (?,?) AND next_attempt<=? AND created<=? "
+                "ORDER BY id LIMIT ?", (connector, QUEUED, RETRY, now, now - settle, limit)).fetchall()
+            if rows:
+                self._conn.executemany("UPDATE outbox SET status=?, updated=? WHERE id=?",
+                                       [(SENDING, now, r["id"]) for r in rows])
+        return [dict(r, payload=json.loads(r["payload"])) for r in rows]
+
+    def due_connectors(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT connector FROM outbox WHERE status IN (?,?) AND next_attempt<=?",
+                                      (QUEUED, RETRY, time.time())).fetchall()
+        return [r[0] for r in rows]
+
+    def mark_sent(self, job_id:int, result:dict):
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET status=?, attempts=attempts+1, updated=?, result=?, error=NULL WHERE id=?",
+                               (SENT, time.time(), json.dumps(result, ensure_ascii=False), job_id))
+
+    def mark_failed(self, job_id:int, error:str, retry_at:float=None):
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET status=?, attempts=attempts+1, updated=?, next_attempt=?, error=? WHERE id=?",
+                               (RETRY if retry_at else FAILED, time.time(), retry_at or time.time(), error[:500], job_id))
+
+    def release(self, job_id:int):
+        """Devuelve un trabajo reclamado a la cola sin contar intento (p.ej. por límite de tasa)."""
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET status=?, updated=? WHERE id=?", (QUEUED, time.time(), job_id))
+
+    @staticmethod
+    def _filters(connector, session):
+        where, params = [], []
+        if connector: where.append("connector=?"); params.append(connector)
+        if session: where.append("session=?"); params.append(session)
+        return (" WHERE " + " AND ".join(where) if where else ""), params
+
+    def count(self, connector:str=None, session:str=None):
+        where, params = self._filters(connector, session)
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox" + where, params).fetchone()[0]
+
+    def jobs(self, connector:str=None, session:str=None, limit:int=100, offset:int=0):
+        """Trabajos más recientes primero (para la pestaña de Mensajería), paginados en SQL."""
+        where, params = self._filters(connector, session)
+        sql = "SELECT * FROM outbox" + where + " ORDER BY id DESC LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit, offset]).fetchall()
+        return [dict(r, payload=json.loads(r["payload"])) for r in rows]
+
+    def status_counts(self):
+        with self._lock:
+            return {r[0]: r[1] for r in self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status")}
+
+# =========================
+# CONECTORES
+# =========================
+class RateLimiter:
+    """Token bucket: `rate` envíos por segundo con ráfaga `burst`."""
+    def __init__(self, rate:float, burst:int=1):
+        self.rate, self.burst = rate, burst
+        self._tokens, self._t = float(burst), time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._t) * self.rate)
+            self._t = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+def post_json(url:str, body:dict, headers:dict=None, timeout:float=10.0):
+    req = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), method="POST",
+                                 headers={"Content-Type": "application/json", **(headers or {})})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            raw = resp.read()
+    except urllib.error.HTTPError as e:
+        if 400 <= e.code < 500 and e.code != 429:
+            raise PermanentError(f"HTTP {e.code}: {e.reason}") from e
+        raise
+    try:
+        return json.loads(raw) if raw else {}
+    except ValueError:
+        return {"body": raw.decode("utf-8", "replace")[:200]}
+
+class Connector:
+    """Base. `send(jobs)` recibe un lote del mismo `batch_key` y devuelve un resultado por trabajo."""
+    name = "base"
+    rate = 5.0           # envíos (lotes) por segundo
+    burst = 5
+    batch_size = 1
+    settle = 0.0         # s que se espera para agrupar ráfagas
+    max_attempts = 6
+    backoff_base = 1.0
+    backoff_max = 300.0
+
+    def __init__(self, url:str=None, token:str=None, timeout:float=10.0):
+        self.url, self.token, self.timeout = url, token, timeout
+        self.limiter = RateLimiter(self.rate, self.burst)
+
+    @property
+    def simulated(self):
+        return not self.url
+
+    def batch_key(self, job):
+        return job["target"]
+
+    def headers(self, jobs):
+        h = {"Idempotency-Key": "+".join(j["idem_key"] for j in jobs)[:200]}
+        if self.token:
+            h["Authorization"] = f"Bearer {self.token}"
+        return h
+
+    def send(self, jobs):
+        if self.simulated:
+            return [self.simulate(j) for j in jobs]
+        return self.deliver(jobs)
+
+    def simulate(self, job):
+        return {"simulated": True}
+
+    def deliver(self, jobs):
+        raise NotImplementedError
+
+    def backoff(self, attempts:int) -> float:
+        return min(self.backoff_max, self.backoff_base * 2 ** attempts) * random.uniform(0.8, 1.2)
+
+class SlackConnector(Connector):
+    """Webhook entrante; una ráfaga al mismo canal viaja en un solo mensaje."""
+    name = "slack"
+    rate, burst, batch_size, settle = 1.0, 3, 20, 0.5
+
+    def deliver(self, jobs):
+        text = "\n".join(j["payload"]["text"] for j in jobs)
+        post_json(self.url, {"channel": f"#{jobs[0]['target']}", "text": text}, self.headers(jobs), self.timeout)
+        return [{"batched": len(jobs)}] * len(jobs)
+
+class WhatsAppConnector(Connector):
+    """API HTTP de mensajería; agrupa por destinatario."""
+    name = "whatsapp"
+    rate, burst, batch_size, settle = 2.0, 4, 10, 0.5
+
+    def deliver(self, jobs):
+        body = {"to": jobs[0]["target"], "type": "text",
+                "text": {"body": "\n\n".join(j["payload"]["text"] for j in jobs)}}
+        res = post_json(self.url, body, self.headers(jobs), self.timeout)
+        return [{"batched": len(jobs), "id": (res.get("messages") or [{}])[0].get("id")}] * len(jobs)
+
+class EmailConnector(Connector):
+    """SMTP (ATLAS_SMTP_HOST) o API HTTP de correo (ATLAS_EMAIL_URL); un lote = una sesión SMTP."""
+    name = "email"
+    rate, burst, batch_size = 2.0, 5, 20
+
+    def __init__(self, url=None, token=None, timeout=10.0, smtp=None):
+        super().__init__(url, token, timeout)
+        self.smtp = smtp  # dict(host, port, user, password)
+
+    @property
+    def simulated(self):
+        return not (self.url or self.smtp)
+
+    def batch_key(self, job):
+        return "smtp"
+
+    def deliver(self, jobs):
+        if self.smtp:
+            with smtplib.SMTP(self.smtp["host"], int(self.smtp.get("port") or 25), timeout=self.timeout) as s:
+                if self.smtp.get("user"):
+                    s.starttls(); s.login(self.smtp["user"], self.smtp["password"])
+                for j in jobs:
+                    p = j["payload"]
+                    msg = EmailMessage()
+                    msg["From"], msg["To"], msg["Subject"] = p["from"], j["target"], p["subject"]
+                    msg["Message-ID"] = f"<{j['idem_key']}@atlas>"
+                    msg.set_content(p["body"])
+                    s.send_message(msg)
+            return [{"smtp": True}] * len(jobs)
+        return [post_json(self.url, {"to": j["target"], **service_fields(j)}, self.headers([j]), self.timeout) for j in jobs]
+
+class JiraConnector(Connector):
+    """REST de Jira (POST /rest/api/2/issue)."""
+    name = "jira"
+    rate, burst = 1.0, 2
+
+    def __init__(self, url=None, token=None, timeout=10.0, project:str="PROD"):
+        super().__init__(url, token, timeout)
+        self.project = project
+
+    def simulate(self, job):
+        return {"simulated": True, "key": f"{self.project}-{random.randint(300, 499)}"}
+
+    def deliver(self, jobs):
+        out = []
+        for j in jobs:
+            fields = {"project": {"key": self.project}, "issuetype": {"name": "Task"}, **service_fields(j)}
+            res = post_json(f"{self.url.rstrip('/')}/rest/api/2/issue", {"fields": fields}, self.headers([j]), self.timeout)
+            out.append({"key": res.get("key")})
+        return out
+
+class CalendarConnector(Connector):
+    """Webhook de calendario (p.ej. un Apps Script que inserta en Google Calendar)."""
+    name = "calendar"
+
+    def deliver(self, jobs):
+        return [post_json(self.url, {"calendar": j["target"], **service_fields(j)}, self.headers([j]), self.timeout)
+                for j in jobs]
+
+def connectors_from_env():
+    env = os.environ.get
+    smtp = {"host": env("ATLAS_SMTP_HOST"), "port": env("ATLAS_SMTP_PORT"), "user": env("ATLAS_SMTP_USER"),
+            "password": env("ATLAS_SMTP_PASSWORD")} if env("ATLAS_SMTP_HOST") else None
+    return {c.name: c for c in [
+        SlackConnector(env("ATLAS_SLACK_WEBHOOK")),
+        WhatsAppConnector(env("ATLAS_WHATSAPP_URL"), env("ATLAS_WHATSAPP_TOKEN")),
+        EmailConnector(env("ATLAS_EMAIL_URL"), env("ATLAS_EMAIL_TOKEN"), smtp=smtp),
+        JiraConnector(env("ATLAS_JIRA_URL"), env("ATLAS_JIRA_TOKEN"), project=env("ATLAS_JIRA_PROJECT", "PROD")),
+        CalendarConnector(env("ATLAS_CALENDAR_URL"), env("ATLAS_CALENDAR_TOKEN")),
+    ]}
+
+# =========================
+# DISPATCHER
+# =========================
+class Dispatcher:
+    """Worker en segundo plano: reclama trabajos vencidos, arma lotes, respeta límites de tasa
+    y reintenta con backoff. `enqueue()` regresa de inmediato."""
+    def __init__(self, outbox:Outbox, connectors:dict, workers:int=4, poll:float=0.2):
+        self.outbox = outbox
+        self.connectors = connectors
+        self.poll = poll
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="atlas-dispatch")
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="atlas-dispatcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout:float=5.0):
+        self._stop.set(); self._wake.set()
+        self._thread.join(timeout)
+        self._pool.shutdown(wait=True)
+
+    def enqueue(self, connector:str, target:str, payload:dict, session:str=None, idem_key:str=None):
+        if connector not in self.connectors:
+            raise KeyError(f"Conector desconocido: {connector}")
+        job_id, created = self.outbox.enqueue(connector, target, payload, session, idem_key)
+        self._wake.set()
+        return job_id, created
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                for name in self.outbox.due_connectors():
+                    self._dispatch(self.connectors[name])
+            except Exception:
+                pass  # el outbox conserva el estado; se reintenta en la siguiente vuelta
+            self._wake.wait(self.poll)
+            self._wake.clear()
+
+    def _dispatch(self, conn:Connector):
+        jobs = self.outbox.claim_due(conn.name, limit=conn.batch_size * conn.burst, settle=conn.settle)
+        batches = {}
+        for j in jobs:
+            batches.setdefault(conn.batch_key(j), []).append(j)
+        for batch_key, batch in batches.items():
+            for i in range(0, len(batch), conn.batch_size):
+                chunk = batch[i:i + conn.batch_size]
+                if conn.limiter.try_acquire():
+                    self._pool.submit(self._send, conn, chunk)
+                else:
+                    for j in chunk:
+                        self.outbox.release(j["id"])
+
+    def _send(self, conn:Connector, batch):
+        try:
+            results = conn.send(batch)
+        except PermanentError as e:
+            for j in batch:
+                self.outbox.mark_failed(j["id"], str(e))
+            return
+        except Exception as e:
+            for j in batch:
+                attempts = j["attempts"] + 1
+                retry_at = time.time() + conn.backoff(attempts) if attempts < conn.max_attempts else None
+                self.outbox.mark_failed(j["id"], f"{type(e).__name__}: {e}", retry_at)
+            return
+        for j, res in zip(batch, results):
+            then = j["payload"].get(CHAIN)
+            # acción encadenada (p.ej. Slack con la llave del ticket de Jira), armada antes de marcar enviado
+            payload = fill_chain(then["payload"], res) if then else None
+            self.outbox.mark_sent(j["id"], res)
+            if then:
+                self.enqueue(then["connector"], then["target"], payload, j["session"],
+                             idempotency_key(then["connector"], then["target"], payload, j["idem_key"]))
+
+    def metrics(self):
+        return {"status": self.outbox.status_counts(),
+                "simulated": sorted(n for n, c in self.connectors.items() if c.simulated)}
@@ -0,0 +1,273 @@
+# explainers.py
+# Explicaciones por sección: estadísticas resumidas -> texto.
+# Backends enchufables (plantilla local / chat-completion HTTP con streaming), generación
+# concurrente con asyncio y caché de respuestas (LRU + TTL) por hash de las estadísticas.
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+
+import pandas as pd
+
+SECTIONS = ("kpi", "table", "trend", "heat", "tree")
+
+# =========================
+# ESTADÍSTICAS RESUMIDAS (la llave de la caché; las de KPIs y tabla salen del pool: analytics._kpi / _table)
+# =========================
+def trend_stats(ts_df:pd.DataFrame, regions_sel, horizon_days:int):
+    if ts_df.empty:
+        return {"empty": True}
+    first, last = ts_df["total_stock"].iloc[0], ts_df["total_stock"].iloc[-1]
+    return {"regions": sorted(map(str, regions_sel)), "horizon_days": int(horizon_days),
+            "change_pct": round(float((last - first) / max(1, first) * 100), 1)}
+
+def heat_stats(hm_df:pd.DataFrame):
+    if hm_df.empty:
+        return {"empty": True}
+    top = hm_df.sort_values("gap_qty", ascending=False).iloc[0]
+    return {"top_category": str(top["category"]), "top_region": str(top["region"]), "gap_qty": int(top["gap_qty"])}
+
+def tree_stats(by_cat_df:pd.DataFrame):
+    if by_cat_df.empty:
+        return {"empty": True}
+    return {"leaders": by_cat_df.head(3)["category"].astype(str).tolist()}
+
+def stats_key(backend:str, section:str, stats:dict) -> str:
+    raw = json.dumps([backend, section, stats], sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+# =========================
+# BACKENDS
+# =========================
+class TemplateExplainer:
+    """Backend local: las plantillas de siempre, sin red."""
+    name = "template"
+    remote = False
+
+    def render(self, section:str, s:dict) -> str:
+        return getattr(self, f"_{section}")(s)
+
+    async def astream(self, section:str, stats:dict):
+        yield self.render(section, stats)
+
+    def _kpi(self, s):
+        if s.get("empty"):
+            return "**Explicación del LLM:** Sin datos para KPIs con los filtros actuales."
+        return (f"**Explicación del LLM:** El sistema **{s['engine']}** reporta **{s['below']} SKUs** por debajo del punto de pedido "
+                f"con **{s['cover']:.1f} días** de cobertura promedio. Regiones: _{', '.join(s['regions']) or 'todas'}_; "
+                f"Categorías: _{', '.join(s['categories']) or 'todas'}_. "
+                "Recomendación: priorizar reabasto en los SKUs con menor cobertura y revisar parámetros de reorder.")
+
+    def _table(self, s):
+        if s.get("empty"):
+            return "**Explicación del LLM:** No hay SKUs coincidentes bajo los filtros."
+        lines = "; ".join(f"{sku} ({reg}/{cat}: {cover} días)" for sku, reg, cat, cover in s["worst"])
+        return (f"**Explicación del LLM:** Top críticos por menor cobertura → {lines}. "
+                "Acción: crear ticket en Jira para reabasto dirigido y notificar a logística en Slack.")
+
+    def _trend(self, s):
+        if s.get("empty"):
+            return "**Explicación del LLM:** Sin serie para la ventana seleccionada."
+        region_txt = ", ".join(s["regions"]) if s["regions"] else "todas las regiones"
+        direction = "alza" if s["change_pct"] >= 0 else "baja"
+        return (f"**Explicación del LLM:** En **{region_txt}**, el stock total varió **{s['change_pct']:.1f}%** en "
+                f"**{s['horizon_days']} días**, con sesgo a la **{direction}**. "
+                "Sugerencia: ajustar frecuencia de reabasto previo a picos semanales.")
+
+    def _heat(self, s):
+        if s.get("empty"):
+            return "**Explicación del LLM:** No se observan brechas en la matriz categoría–región."
+        return (f"**Explicación del LLM:** La mayor brecha está en **{s['top_category']}** para **{s['top_region']}**. "
+                "Prioriza asignaciones y revisa lead time de proveedores.")
+
+    def _tree(self, s):
+        if s.get("empty"):
+            return "**Explicación del LLM:** Sin brechas agregadas por categoría."
+        return (f"**Explicación del LLM:** Categorías con mayor necesidad de reabasto: **{', '.join(s['leaders'])}**. "
+                "Sugerencia: revisar elasticidad de demanda y cobertura objetivo.")
+
+SYSTEM_PROMPT = ("Eres el analista de inventarios de Atlas Data Suite. Con las estadísticas JSON de una sección "
+                 "del tablero, escribe 2 frases en español (markdown), iniciando con '**Explicación del LLM:**', "
+                 "con el hallazgo principal y una acción concreta.")
+
+SECTION_HINTS = {"kpi": "KPIs de SKUs bajo punto de pedido y cobertura", "table": "SKUs con menor cobertura",
+                 "trend": "tendencia del stock total", "heat": "brecha categoría×región",
+                 "tree": "brecha agregada por categoría"}
+
+class HTTPChatExplainer:
+    """Backend chat-completion compatible con OpenAI (POST /chat/completions, stream=True, SSE)."""
+    name = "http"
+    remote = True
+
+    def __init__(self, base_url:str, model:str="gpt-4o-mini", api_key:str=None, timeout:float=30.0):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        self.name = f"http:{self.base_url}:{model}"
+
+    def _request(self, section:str, stats:dict):
+        body = {"model": self.model, "stream": True, "temperature": 0.2, "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": f"Sección: {SECTION_HINTS[section]}.\nEstadísticas: "
+                                        f"{json.dumps(stats, ensure_ascii=False)}"}]}
+        headers = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        req = urllib.request.Request(f"{self.base_url}/chat/completions", data=json.dumps(body).encode("utf-8"),
+                                     headers=headers, method="POST")
+        return urllib.request.urlopen(req, timeout=self.timeout)
+
+    @staticmethod
+    def _delta(line:bytes):
+        """Extrae el texto de una línea SSE; None marca el fin del stream."""
+        line = line.strip()
+        if not line.startswith(b"data:"):
+            return ""
+        payload = line[5:].strip()
+        if payload == b"[DONE]":
+            return None
+        choice = json.loads(payload)["choices"][0]
+        return (choice.get("delta") or {}).get("content") or ""
+
+    async def astream(self, section:str, stats:dict):
+        resp = await asyncio.to_thread(self._request, section, stats)
+        try:
+            while True:
+                line = await asyncio.to_thread(resp.readline)
+                if not line:
+                    break
+                token = self._delta(line)
+                if token is None:
+                    break
+                if token:
+                    yield token
+        finally:
+            resp.close()
+
+# =========================
+# CACHÉ + ORQUESTACIÓN CONCURRENTE
+# =========================
+class ExplanationCache:
+    """LRU con TTL de respuestas completas, compartida entre sesiones."""
+    def __init__(self, max_entries:int=512, ttl:float=3600.0):
+        self.max_entries, self.ttl = max_entries, ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, text:str):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, text)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+class _Inflight:
+    """Buffer de tokens de una generación en curso; varios lectores lo siguen."""
+    def __init__(self):
+        self.tokens, self.done = [], False
+        self.lock = threading.Lock()
+
+    def follow(self, poll:float=0.005):
+        """Iterador no bloqueante: produce "" mientras no hay tokens nuevos."""
+        i = 0
+        while True:
+            with self.lock:
+                new, done = self.tokens[i:], self.done
+            if new:
+                i += len(new)
+                yield "".join(new)
+            elif done:
+                return
+            else:
+                time.sleep(poll)
+                yield ""
+
+class ExplainerHub:
+    """Dispara todas las secciones en paralelo (un loop asyncio en un hilo) y entrega
+    iteradores de tokens; resultados idénticos se sirven desde la caché o el buffer en curso.
+    Las secciones sin datos ({"empty": True}) se responden con la plantilla, sin backend.
+    `llm_calls` cuenta sólo las llamadas al backend remoto."""
+    def __init__(self, backend, cache:ExplanationCache=None, fallback=None):
+        self.backend = backend
+        self.cache = cache or ExplanationCache()
+        self.fallback = fallback or TemplateExplainer()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.llm_calls = 0
+
+    def explain_all(self, requests:dict):
+        """requests: {sección: stats}. Devuelve {sección: (llave, iterador de tokens)}."""
+        out, pending = {}, []
+        with self._lock:
+            for section, stats in requests.items():
+                key = stats_key(self.backend.name, section, stats)
+                if stats.get("empty"):
+                    out[section] = (key, iter([self.fallback.render(section, stats)]))
+                    continue
+                text = self.cache.get(key)
+                if text is not None:
+                    out[section] = (key, iter([text]))
+                    continue
+                buf = self._inflight.get(key)
+                if buf is None:
+                    buf = self._inflight[key] = _Inflight()
+                    pending.append((key, section, stats, buf))
+                out[section] = (key, buf.follow())
+        if pending:
+            threading.Thread(target=asyncio.run, args=(self._generate(pending),), daemon=True).start()
+        return out
+
+    async def _generate(self, pending):
+        await asyncio.gather(*(self._one(*p) for p in pending))
+
+    async def _one(self, key, section, stats, buf):
+        ok = True
+        try:
+            if self.backend.remote:
+                self.llm_calls += 1
+            async for token in self.backend.astream(section, stats):
+                with buf.lock:
+                    buf.tokens.append(token)
+        except Exception:
+            ok = False
+            with buf.lock:  # sin LLM: plantilla local, sin cachear
+                buf.tokens.append(("\n\n" if buf.tokens else "") + self.fallback.render(section, stats))
+        finally:
+            with buf.lock:
+                buf.done = True
+                text = "".join(buf.tokens)
+            if ok:
+                self.cache.put(key, text)
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def metrics(self):
+        return {"backend": self.backend.name, "cache_hits": self.cache.hits, "cache_misses": self.cache.misses,
+                "llm_calls": self.llm_calls, "inflight": len(self._inflight)}
+
+def make_backend():
+    """HTTP si ATLAS_LLM_URL está definido; si no, plantillas locales."""
+    url = os.environ.get("ATLAS_LLM_URL")
+    if not url:
+        return TemplateExplainer()
+    return HTTPChatExplainer(url, model=os.environ.get("ATLAS_LLM_MODEL", "gpt-4o-mini"),
+                             api_key=os.environ.get("ATLAS_LLM_KEY"),
+                             timeout=float(os.environ.get("ATLAS_LLM_TIMEOUT", 30)))
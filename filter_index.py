@@ -0,0 +1,81 @@
+# filter_index.py
+# Índices persistentes por dataset para los filtros de la barra lateral:
+# bitmaps (bits empaquetados) por región y por categoría, e índice ordenado de fechas.
+# Un cambio de filtro es un OR/AND de bitmaps + un slice por rango, sin copiar el frame completo.
+
+import numpy as np
+import pandas as pd
+
+class BitmapIndex:
+    """Bitmap empaquetado (uint8, 1 bit por fila) por cada valor de una columna categórica."""
+    def __init__(self, col:pd.Series):
+        cat = col.astype("category") if not isinstance(col.dtype, pd.CategoricalDtype) else col
+        codes = cat.cat.codes.to_numpy()
+        self.n_rows = len(codes)
+        self.values = list(cat.cat.categories)
+        self._bitmaps = {}
+        for code, value in enumerate(self.values):
+            self._bitmaps[value] = np.packbits(codes == code)
+
+    def union(self, values):
+        """OR de los bitmaps de `values` (None si no hay filtro)."""
+        if not values:
+            return None
+        out = np.zeros((self.n_rows + 7) // 8, np.uint8)
+        for v in values:
+            bm = self._bitmaps.get(v)
+            if bm is not None:
+                np.bitwise_or(out, bm, out=out)
+        return out
+
+    def nbytes(self):
+        return sum(b.nbytes for b in self._bitmaps.values())
+
+def intersect(*bitmaps):
+    """AND de bitmaps; ignora los None (dimensión sin filtro)."""
+    active = [b for b in bitmaps if b is not None]
+    if not active:
+        return None
+    out = active[0].copy()
+    for b in active[1:]:
+        np.bitwise_and(out, b, out=out)
+    return out
+
+def positions(bitmap, n_rows:int, start:int=0, stop:int=None):
+    """Posiciones de fila encendidas en [start, stop)."""
+    bits = np.unpackbits(bitmap, count=n_rows)
+    return np.flatnonzero(bits[start:stop]) + start
+
+class InventoryIndex:
+    """Bitmaps por región y categoría sobre la tabla de SKUs."""
+    def __init__(self, inventory:pd.DataFrame):
+        self.frame = inventory
+        self.region = BitmapIndex(inventory["region"])
+        self.category = BitmapIndex(inventory["category"])
+
+    def rows(self, regions=(), categories=()):
+        """Posiciones de las filas que pasan el filtro (None = todas)."""
+        mask = intersect(self.region.union(regions), self.category.union(categories))
+        return None if mask is None else positions(mask, len(self.frame))
+
+    def select(self, regions=(), categories=()):
+        rows = self.rows(regions, categories)
+        if rows is None:
+            return self.frame  # sin filtros: el frame compartido, sin copia
+        return self.frame.take(rows)
+
+class SeriesIndex:
+    """Serie ordenada por fecha + bitmaps por región: rango por búsqueda binaria y AND de región."""
+    def __init__(self, inv_ts:pd.DataFrame):
+        order = np.lexsort((inv_ts["region"].cat.codes.to_numpy(), inv_ts["date"].to_numpy()))
+        is_sorted = (np.diff(order) == 1).all() if len(order) > 1 else True
+        self.frame = inv_ts if is_sorted else inv_ts.take(order).reset_index(drop=True)
+        self.dates = self.frame["date"].to_numpy()
+        self.region = BitmapIndex(self.frame["region"])
+
+    def select(self, regions=(), since=None):
+        start = 0 if since is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(since)), "left"))
+        mask = self.region.union(regions)
+        if mask is None:
+            return self.frame.iloc[start:]
+        return self.frame.take(positions(mask, len(self.frame), start))
@@ -0,0 +1,262 @@
+# ingest.py
+# Ingesta incremental de movimientos de stock: un diario compartido de lotes de deltas
+# (alimentado por archivos soltados en un directorio o por una cola en proceso), y un aplicador
+# por backend que los lleva a la tabla de SKUs en sitio y ajusta el cubo en O(filas cambiadas).
+
+import glob
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from datagen import sku_ids
+
+DELTA_COLUMNS = ["sku", "qty"]   # qty con signo: + entrada, - salida
+
+def read_delta_file(path:str) -> pd.DataFrame:
+    """CSV (`sku,qty`) o JSONL (`{"sku": ..., "qty": ...}` por línea)."""
+    if path.endswith(".jsonl"):
+        frame = pd.read_json(path, lines=True, dtype={"sku": str})
+    else:
+        frame = pd.read_csv(path, dtype={"sku": str})
+    missing = set(DELTA_COLUMNS) - set(frame.columns)
+    if missing:
+        raise ValueError(f"faltan columnas {sorted(missing)}")
+    return frame[DELTA_COLUMNS].astype({"qty": np.int64})
+
+class StockSnapshot:
+    """Stock vivo por SKU al día con todo lo que entra al diario (mismas reglas que
+    `apply_deltas`: repetidos se suman por lote y el stock no baja de 0). Un backend que se
+    abre tarde o se recarga parte del estado base y se pone al día con `catch_up()` en un solo
+    lote, sin perder los movimientos que ya no están en el diario."""
+    def __init__(self, skus, stock):
+        skus = np.asarray(skus)
+        self._ids = np.issubdtype(skus.dtype, np.integer)
+        self._index = pd.Index(skus)
+        self._base = np.asarray(stock, np.int64)
+        self._stock = self._base.copy()
+
+    def apply(self, frame:pd.DataFrame):
+        skus = frame["sku"].to_numpy()
+        pos = self._index.get_indexer(pd.Index(sku_ids(skus) if self._ids else skus))
+        known = pos >= 0
+        pos, inverse = np.unique(pos[known], return_inverse=True)
+        qty = np.bincount(inverse, weights=frame["qty"].to_numpy()[known].astype(np.float64), minlength=len(pos))
+        self._stock[pos] = np.maximum(0, self._stock[pos] + qty.astype(np.int64))
+
+    def catch_up(self) -> pd.DataFrame:
+        """Lote (sku, qty) que lleva un backend en estado base al stock actual (vacío si nada cambió)."""
+        pos = np.flatnonzero(self._stock != self._base)
+        return pd.DataFrame({"sku": self._index[pos], "qty": self._stock[pos] - self._base[pos]})
+
+class DeltaJournal:
+    """Lotes de deltas con secuencia; cada consumidor avanza a su ritmo y los lotes ya
+    aplicados por todos se descartan. Un consumidor que se atrasa más de `max_batches` lotes
+    o `max_age` segundos se da de baja y queda marcado para recarga completa (`is_stale`):
+    la memoria queda acotada aunque un backend deje de sincronizar. Con `snapshot` (StockSnapshot)
+    cada consumidor nuevo recibe al darse de alta el lote que lo pone al día."""
+    def __init__(self, max_batches:int=10_000, max_age:float=600.0, snapshot:StockSnapshot=None):
+        self.max_batches = max_batches
+        self.max_age = max_age
+        self.snapshot = snapshot
+        self._batches = deque()     # (seq, llegada, frame)
+        self._next = 0
+        self._cursors = {}          # consumidor -> siguiente seq pendiente
+        self._stale = set()         # consumidores dados de baja por atraso
+        self._lock = threading.Lock()
+        self.rows = 0
+
+    def put(self, frame:pd.DataFrame):
+        if frame.empty:
+            return None
+        with self._lock:
+            seq = self._next
+            self._next += 1
+            self._batches.append((seq, time.time(), frame))
+            self.rows += len(frame)
+            if self.snapshot is not None:
+                self.snapshot.apply(frame)
+            self._trim()
+        return seq
+
+    def register(self, name:str):
+        """Nuevo consumidor: empieza en lo que llegue después. Regresa el lote que lleva un backend
+        en estado base a ese punto (vacío sin `snapshot`: su estado base ya es el actual)."""
+        with self._lock:
+            self._cursors[name] = self._next
+            self._stale.discard(name)
+            return self.snapshot.catch_up() if self.snapshot is not None else pd.DataFrame(columns=DELTA_COLUMNS)
+
+    def unregister(self, name:str):
+        with self._lock:
+            self._cursors.pop(name, None)
+            self._trim()
+
+    def is_stale(self, name:str):
+        with self._lock:
+            return name in self._stale
+
+    def pending(self, name:str):
+        with self._lock:
+            start = self._cursors.get(name)
+            if start is None or not self._batches:
+                return []
+            first = self._batches[0][0]
+            return [(seq, f) for seq, _, f in itertools.islice(self._batches, max(0, start - first), None)]
+
+    def ack(self, name:str, seq:int):
+        with self._lock:
+            if name in self._cursors:   # si se dio de baja a media sincronización, sigue fuera
+                self._cursors[name] = seq + 1
+                self._trim()
+
+    def _trim(self):
+        if self._batches:
+            first = self._batches[0][0]
+            oldest_ok = time.time() - self.max_age
+            for name, cur in list(self._cursors.items()):
+                if cur < self._next and (self._next - cur > self.max_batches or self._batches[cur - first][1] < oldest_ok):
+                    del self._cursors[name]
+                    self._stale.add(name)
+        low = min(self._cursors.values(), default=self._next)
+        while self._batches and self._batches[0][0] < low:
+            self._batches.popleft()
+
+    def backlog(self):
+        with self._lock:
+            return len(self._batches)
+
+class FileDropFeed:
+    """Vigila `directory`: cada *.csv / *.jsonl nuevo entra al diario y se mueve a processed/
+    (o a rejected/ si no se puede leer). Escribir primero con otro nombre y renombrar al final."""
+    def __init__(self, directory:str, journal:DeltaJournal, poll:float=1.0):
+        self.directory = directory
+        self.journal = journal
+        self.poll = poll
+        self.files = 0
+        self.rejected = 0
+        for sub in ("processed", "rejected"):
+            os.makedirs(os.path.join(directory, sub), exist_ok=True)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="atlas-delta-files", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout:float=5.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def scan(self):
+        paths = sorted(glob.glob(os.path.join(self.directory, "*.csv")) + glob.glob(os.path.join(self.directory, "*.jsonl")))
+        for path in paths:
+            try:
+                self.journal.put(read_delta_file(path))
+                dest, self.files = "processed", self.files + 1
+            except Exception:
+                dest, self.rejected = "rejected", self.rejected + 1
+            os.replace(path, os.path.join(self.directory, dest, os.path.basename(path)))
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.scan()
+            except OSError:
+                pass  # directorio temporalmente inaccesible; siguiente vuelta
+            self._stop.wait(self.poll)
+
+class DeltaSimulator:
+    """Stand-in de una cola de movimientos: `rows` deltas aleatorios cada `interval` segundos."""
+    def __init__(self, journal:DeltaJournal, skus, rows:int=200, interval:float=1.0, seed:int=11):
+        self.journal = journal
+        self.skus = np.asarray(skus)
+        self.rows = rows
+        self.interval = interval
+        self._rng = np.random.default_rng(seed)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="atlas-delta-sim", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout:float=5.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def batch(self):
+        pick = self._rng.integers(0, len(self.skus), self.rows)
+        qty = np.where(self._rng.random(self.rows) < 0.7, -self._rng.integers(1, 40, self.rows),
+                       self._rng.integers(50, 400, self.rows))  # ventas frecuentes, reabastos ocasionales
+        return pd.DataFrame({"sku": self.skus[pick], "qty": qty})
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.journal.put(self.batch())
+
+class LiveInventory:
+    """Lleva los deltas pendientes del diario a un backend con `apply_deltas` (en memoria)
+    y al cubo vigente. Uno por backend: aplicar dos veces el mismo lote duplicaría el movimiento.
+    Sin soporte (motores SQL reales) `supported` es False y `sync()` no hace nada: ahí los
+    movimientos llegan por la propia base de datos. Se crea con el backend recién abierto y
+    antes de construir su cubo: al darse de alta aplica el lote de puesta al día del diario."""
+    def __init__(self, source, journal:DeltaJournal, name:str):
+        self.source = source
+        self.journal = journal
+        self.name = name
+        self.supported = hasattr(source, "apply_deltas")
+        self.batches = 0
+        self.rows = 0
+        self.last_sync = None
+        self.last_ms = 0.0
+        self.mirrors = []        # copias que replican las filas cambiadas (p.ej. memoria compartida)
+        self._lock = threading.Lock()
+        self.caught_up = 0       # filas con las que se puso al día al darse de alta
+        if self.supported:
+            catch_up = journal.register(name)
+            if len(catch_up):
+                self.caught_up = len(self.source.apply_deltas(catch_up["sku"].to_numpy(), catch_up["qty"].to_numpy())["pos"])
+
+    @property
+    def stale(self):
+        """True si el diario lo dio de baja por atraso: se perdió lotes y hay que recargar el backend."""
+        return self.supported and self.journal.is_stale(self.name)
+
+    def sync(self, cube):
+        """Aplica todo lo pendiente a la tabla y a `cube` (el de la versión vigente); regresa las filas cambiadas."""
+        if not self.supported:
+            return 0
+        with self._lock:
+            t0 = time.perf_counter()
+            regions, cats = self.source.dimensions()
+            ri = np.array([cube._r_ix[r] for r in regions], np.intp)   # códigos del backend -> ejes del cubo
+            ci = np.array([cube._c_ix[c] for c in cats], np.intp)
+            changed = 0
+            for seq, frame in self.journal.pending(self.name):
+                ch = self.source.apply_deltas(frame["sku"].to_numpy(), frame["qty"].to_numpy())
+                cube.apply(ci[ch["category"]], ri[ch["region"]], ch["stock"], ch["below"], ch["cover"], ch["gap"])
+                for mirror in self.mirrors:
+                    mirror.refresh_rows(self.source.inv_index.frame, ch["pos"])
+                self.journal.ack(self.name, seq)
+                self.batches += 1
+                changed += len(ch["stock"])
+            self.rows += changed
+            if changed:
+                self.last_ms = (time.perf_counter() - t0) * 1000
+            self.last_sync = time.time()
+            return changed
+
+    def add_mirror(self, factory):
+        """Crea (bajo el candado de sync, sin perder deltas de por medio) y registra una copia."""
+        with self._lock:
+            mirror = factory()
+            self.mirrors.append(mirror)
+            return mirror
+
+    def close(self):
+        self.journal.unregister(self.name)
@@ -0,0 +1,139 @@
+# logstore.py
+# Bitácora compartida entre sesiones: ring buffer acotado en memoria + segmentos JSONL
+# append-only en disco, con vistas por sesión y global, paginación O(página) y retención.
+
+import glob
+import json
+import os
+import threading
+import time
+from collections import deque
+
+class LogStore:
+    """`capacity` entradas globales en memoria (las más viejas se desalojan); cada sesión
+    conserva hasta `per_session` referencias. En disco: segmentos de `segment_bytes`,
+    se conservan `max_segments` y nada más viejo que `max_age_days`."""
+    def __init__(self, directory:str, capacity:int=10_000, per_session:int=1_000,
+                 segment_bytes:int=4 * 1024 * 1024, max_segments:int=20, max_age_days:float=30):
+        self.directory = directory
+        self.capacity = capacity
+        self.per_session = per_session
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.max_age_days = max_age_days
+        self._ring = [None] * capacity
+        self._next = 0            # siguiente seq global
+        self._sessions = {}       # session -> deque(seq)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+        self._fh = None
+        self._open_segment()
+
+    # --- disco
+    def _segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, "segment-*.jsonl")))
+
+    def _open_segment(self):
+        segs = self._segments()
+        if segs and os.path.getsize(segs[-1]) < self.segment_bytes:
+            path = segs[-1]
+        else:
+            n = int(os.path.basename(segs[-1])[8:-6]) + 1 if segs else 1
+            path = os.path.join(self.directory, f"segment-{n:06d}.jsonl")
+        self._fh = open(path, "a", encoding="utf-8")
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        segs = self._segments()
+        cutoff = time.time() - self.max_age_days * 86400
+        current = self._fh.name if self._fh else None
+        for i, path in enumerate(segs):
+            if path == current:
+                continue
+            if len(segs) - i > self.max_segments or os.path.getmtime(path) < cutoff:
+                os.remove(path)
+
+    def _load(self):
+        """Reconstruye el ring con la cola de los segmentos (sobrevive reinicios y recargas)."""
+        tail = deque(maxlen=self.capacity)
+        for path in self._segments():
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        tail.append(json.loads(line))
+                    except ValueError:
+                        continue  # línea truncada por un corte
+        for entry in tail:
+            self._index(entry)
+        if tail:
+            self._next = tail[-1]["seq"] + 1
+
+    # --- memoria
+    def _index(self, entry):
+        seq = entry["seq"]
+        self._ring[seq % self.capacity] = entry
+        self._sessions.setdefault(entry["session"], deque(maxlen=self.per_session)).append(seq)
+
+    def _get(self, seq):
+        entry = self._ring[seq % self.capacity]
+        return entry if entry is not None and entry["seq"] == seq else None
+
+    def _prune_sessions(self):
+        """Olvida sesiones cuyas entradas ya salieron del ring."""
+        oldest = self._next - self.capacity
+        for sid in [sid for sid, seqs in self._sessions.items() if seqs[-1] < oldest]:
+            del self._sessions[sid]
+
+    def append(self, session:str, event:str, kind:str="action"):
+        with self._lock:
+            entry = {"seq": self._next, "ts": time.time(), "session": session, "kind": kind, "event": event}
+            self._next += 1
+            self._index(entry)
+            self._fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._fh.flush()
+            if entry["seq"] % 1024 == 0:
+                self._prune_sessions()
+            if self._fh.tell() >= self.segment_bytes:
+                self._fh.close()
+                self._open_segment()
+        return entry
+
+    def count(self, session:str=None):
+        with self._lock:
+            if session is None:
+                return min(self._next, self.capacity)
+            seqs = self._sessions.get(session)
+            if not seqs:
+                return 0
+            oldest = self._next - self.capacity
+            return len(seqs) if seqs[0] >= oldest else sum(s >= oldest for s in seqs)
+
+    def page(self, session:str=None, page:int=0, size:int=50):
+        """Página `page` (0 = más recientes), de más nuevo a más viejo. O(size)."""
+        out = []
+        with self._lock:
+            if session is None:
+                start = self._next - 1 - page * size
+                stop = max(self._next - self.capacity - 1, start - size, -1)
+                for seq in range(start, stop, -1):
+                    entry = self._get(seq)
+                    if entry is not None:
+                        out.append(entry)
+                return out
+            seqs = self._sessions.get(session) or ()
+            n = len(seqs)
+            for i in range(n - 1 - page * size, max(n - 1 - (page + 1) * size, -1), -1):
+                entry = self._get(seqs[i])
+                if entry is not None:
+                    out.append(entry)
+        return out
+
+    def sessions(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def close(self):
+        with self._lock:
+            if self._fh:
+                self._fh.close()
@@ -0,0 +1,145 @@
+# profiling.py
+# Instrumentación de reruns: tiempos por sección, bytes enviados al navegador y tasas de caché.
+# Un registro global (por proceso) guarda los últimos reruns para la pestaña Diagnóstico,
+# el benchmark headless y la exportación JSON / Prometheus.
+
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+class RunProfile:
+    """Mediciones de un rerun."""
+    def __init__(self, session:str=None, measure_payload:bool=False):
+        self.session = session
+        self.measure_payload = measure_payload
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.total = None
+        self.sections = {}   # nombre -> segundos (acumulado si se repite)
+        self.calls = {}
+        self.payloads = {}   # nombre -> bytes
+        self.caches = {}     # nombre -> {"hits", "misses"}
+        self._stack = []
+
+    @contextmanager
+    def section(self, name:str):
+        """Cronometra un bloque; anidado se reporta como 'padre/hijo'."""
+        full = "/".join(self._stack + [name])
+        self._stack.append(name)
+        t0 = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self._stack.pop()
+            dt = time.perf_counter() - t0
+            self.sections[full] = self.sections.get(full, 0.0) + dt
+            self.calls[full] = self.calls.get(full, 0) + 1
+
+    def timed(self, name:str=None):
+        """Decorador equivalente a `section`."""
+        def deco(fn):
+            @functools.wraps(fn)
+            def wrapper(*a, **kw):
+                with self.section(name or fn.__name__):
+                    return fn(*a, **kw)
+            return wrapper
+        return deco
+
+    def payload(self, name:str, obj):
+        """Registra el tamaño aproximado de lo que viaja al navegador.
+        DataFrames: bytes en memoria (barato). Figuras Plotly: JSON serializado, sólo si
+        `measure_payload` (duplica la serialización, así que va ligado al modo diagnóstico)."""
+        size = None
+        if hasattr(obj, "memory_usage"):
+            size = int(obj.memory_usage(index=False, deep=True).sum())
+        elif hasattr(obj, "to_json"):
+            if not self.measure_payload:
+                return
+            size = len(obj.to_json())
+        elif isinstance(obj, (bytes, str)):
+            size = len(obj)
+        if size is not None:
+            self.payloads[name] = self.payloads.get(name, 0) + size
+
+    def cache(self, name:str, hits:int, misses:int):
+        self.caches[name] = {"hits": int(hits), "misses": int(misses)}
+
+    def finish(self):
+        self.total = time.perf_counter() - self._t0
+        return self
+
+    def as_dict(self):
+        return {"session": self.session, "started": self.started, "total_s": self.total,
+                "sections_s": dict(self.sections), "calls": dict(self.calls),
+                "payload_bytes": dict(self.payloads), "caches": dict(self.caches)}
+
+class ProfileRegistry:
+    """Últimos reruns de todas las sesiones + acumulados para Prometheus."""
+    def __init__(self, keep:int=200):
+        self.runs = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self.totals = {}     # sección -> [segundos, llamadas]
+        self.reruns = 0
+
+    def start(self, session:str=None, measure_payload:bool=False):
+        return RunProfile(session, measure_payload)
+
+    def record(self, run:RunProfile):
+        run.finish()
+        with self._lock:
+            self.runs.append(run)
+            self.reruns += 1
+            for name, dt in run.sections.items():
+                acc = self.totals.setdefault(name, [0.0, 0])
+                acc[0] += dt; acc[1] += run.calls[name]
+        return run
+
+    def last(self, session:str=None):
+        with self._lock:
+            for run in reversed(self.runs):
+                if session is None or run.session == session:
+                    return run
+        return None
+
+    def history(self, session:str=None):
+        with self._lock:
+            return [r for r in self.runs if session is None or r.session == session]
+
+    def to_json(self, session:str=None) -> str:
+        return json.dumps([r.as_dict() for r in self.history(session)], ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Formato de exposición de texto de Prometheus."""
+        out = []
+        def metric(name, kind, help_, samples):
+            out.append(f"# HELP {name} {help_}")
+            out.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lab = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                out.append(f"{name}{{{lab}}} {value:.6g}" if lab else f"{name} {value:.6g}")
+        with self._lock:
+            totals = {k: list(v) for k, v in self.totals.items()}
+            reruns = self.reruns
+            last = self.runs[-1] if self.runs else None
+        metric("atlas_reruns_total", "counter", "Reruns instrumentados.", [({}, reruns)])
+        metric("atlas_section_seconds_total", "counter", "Tiempo acumulado por sección.",
+               [({"section": k}, v[0]) for k, v in totals.items()])
+        metric("atlas_section_calls_total", "counter", "Ejecuciones acumuladas por sección.",
+               [({"section": k}, v[1]) for k, v in totals.items()])
+        if last is not None:
+            metric("atlas_last_rerun_seconds", "gauge", "Duración del último rerun.", [({}, last.total or 0.0)])
+            metric("atlas_last_section_seconds", "gauge", "Tiempo por sección en el último rerun.",
+                   [({"section": k}, v) for k, v in last.sections.items()])
+            metric("atlas_last_payload_bytes", "gauge", "Bytes enviados al navegador en el último rerun.",
+                   [({"element": k}, v) for k, v in last.payloads.items()])
+            metric("atlas_cache_hit_ratio", "gauge", "Tasa de aciertos por caché.",
+                   [({"cache": k}, v["hits"] / max(1, v["hits"] + v["misses"])) for k, v in last.caches.items()])
+        return "\n".join(out) + "\n"
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+REGISTRY = ProfileRegistry()
@@ -0,0 +1,155 @@
+# replenish.py
+# Planificador de reabasto vectorizado sobre toda la tabla de SKUs: cantidad a pedir por SKU,
+# prioridad por cobertura (demanda en empates), asignación greedy bajo la capacidad de recepción
+# de cada región, top-k global por mezcla de montículos y agrupación en tickets de Jira / Slack.
+
+import heapq
+import re
+import unicodedata
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from datagen import sku_labels
+
+PLAN_COLUMNS = ["sku", "category", "region", "stock", "reorder_point", "daily_demand", "days_cover"]
+
+def _units_value(text:str, where:str) -> int:
+    try:
+        value = int(text.strip())
+    except ValueError:
+        raise ValueError(f"capacidad inválida en {where!r}: se espera un entero de unidades") from None
+    if value < 0:
+        raise ValueError(f"capacidad negativa en {where!r} (0 = sin límite)")
+    return value
+
+def parse_capacity(spec:str, regions) -> list:
+    """'250000' (igual para todas) o 'Norte=40000,Centro=60000' (las demás sin límite); 0 = sin límite.
+    ValueError si algún valor no es un entero >= 0 o una parte no tiene la forma región=unidades;
+    regiones que no existen se ignoran."""
+    spec = (spec or "0").strip()
+    if "=" not in spec:
+        return [_units_value(spec, spec)] * len(regions)
+    caps = dict.fromkeys(regions, 0)
+    for part in filter(None, map(str.strip, spec.split(","))):
+        name, sep, value = part.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"capacidad inválida en {part!r}: se espera región=unidades")
+        value = _units_value(value, part)
+        if name.strip() in caps:
+            caps[name.strip()] = value
+    return [caps[r] for r in regions]
+
+def region_label(region:str) -> str:
+    """Etiqueta de Jira para la región (sin espacios: Jira no los admite en etiquetas)."""
+    text = unicodedata.normalize("NFKD", str(region)).encode("ascii", "ignore").decode().lower()
+    return "-".join(re.findall(r"[a-z0-9]+", text)) or "sin-region"
+
+def _short_days(reorder_point, daily_demand, days_cover):
+    """Días de cobertura que faltan para llegar al punto de pedido (<= 0: no hace falta pedir)."""
+    return reorder_point / daily_demand.astype(np.float32) - days_cover
+
+def _units(short, daily_demand, target_days:float, pack:int):
+    units = np.ceil((short + target_days) * daily_demand).astype(np.int64)
+    return -(-units // pack) * pack
+
+def order_quantities(reorder_point, daily_demand, days_cover, target_days:float, pack:int=1):
+    """Unidades para llevar la cobertura al punto de pedido + `target_days` de demanda, en múltiplos
+    de `pack` (hacia arriba); 0 si la cobertura ya alcanza el punto de pedido."""
+    short = _short_days(reorder_point, daily_demand, days_cover)
+    return np.where(short > 0, _units(short, daily_demand, target_days, pack), 0)
+
+def _priority_key(days_cover, daily_demand):
+    """Llave int64 de orden (cobertura asc., demanda desc.): un argsort en lugar de un lexsort de
+    dos columnas. Un float32 >= 0 ordena igual que sus bits como entero sin signo."""
+    bits = (days_cover.astype(np.float32) + np.float32(0)).view(np.uint32).astype(np.int64)  # + 0: -0.0 -> 0.0
+    return (bits << 16) | (0xFFFF - daily_demand.astype(np.int64))
+
+def _allocate(key, want, cap:int, pack:int):
+    """Prefijo por prioridad que cabe en `cap` (0 = sin límite): (posiciones locales en orden, unidades).
+    Con capacidad sólo ordena los k primeros (argpartition, k creciente hasta cubrir `cap`), no toda la región."""
+    n = len(key)
+    k = n if cap <= 0 else min(n, 2 * int(cap / max(1.0, want.mean())) + 16)
+    while True:
+        top = np.argpartition(key, k - 1)[:k] if k < n else np.arange(n)
+        top = top[np.argsort(key[top], kind="stable")]
+        cum = np.cumsum(want[top])
+        if k == n or cum[-1] >= cap:   # lo que quede fuera ya no alcanza capacidad
+            break
+        k = min(n, k * 4)
+    units = want[top]
+    if cap > 0:
+        units = np.clip((cap - (cum - units)) // pack * pack, 0, units)
+    keep = np.count_nonzero(units)   # las asignadas son un prefijo
+    return top[:keep], units[:keep]
+
+def plan(cols:dict, regions, cats, capacity, target_days:float=14, pack:int=10, top:int=20, lines:int=20):
+    """Plan de reabasto sobre `cols` (arreglos por columna; región/categoría como códigos).
+
+    Candidatos: SKUs con cobertura bajo su punto de pedido. Cada región recorre sus candidatos de
+    menor a mayor cobertura (demanda mayor primero en empates) y asigna mientras quepa en
+    `capacity[región]` (el que cruza el límite recibe lo que reste, en múltiplos de `pack`).
+    Regresa el resumen por región con sus `lines` más urgentes y el `top` global; todo
+    serializable (viaja de vuelta desde el pool)."""
+    short = _short_days(cols["reorder_point"], cols["daily_demand"], cols["days_cover"])
+    cand = np.flatnonzero(short > 0)
+    cand = cand[np.argsort(cols["region"][cand], kind="stable")]   # radix sobre códigos chicos
+    starts = np.searchsorted(cols["region"][cand], np.arange(len(regions) + 1))
+    demand = cols["daily_demand"][cand]
+    key = _priority_key(cols["days_cover"][cand], demand)
+    want = _units(short[cand], demand, target_days, pack)
+
+    sku = cols["sku"]
+    def rows(pos, units):
+        labels = sku[pos]
+        labels = sku_labels(labels) if np.issubdtype(labels.dtype, np.integer) else labels
+        return [[str(s), str(regions[r]), str(cats[c]), int(st), round(float(cv), 1), int(d), int(u)]
+                for s, r, c, st, cv, d, u in zip(labels, cols["region"][pos], cols["category"][pos], cols["stock"][pos],
+                                                 cols["days_cover"][pos], cols["daily_demand"][pos], units)]
+
+    summary, picked, heads = [], [], []
+    for i, name in enumerate(regions):
+        lo, hi = starts[i], starts[i + 1]
+        if lo == hi:
+            continue
+        local, units = _allocate(key[lo:hi], want[lo:hi], int(capacity[i]), pack)
+        pos = cand[lo:hi][local]
+        summary.append({"region": str(name), "candidates": int(hi - lo), "skus": len(pos), "units": int(units.sum()),
+                        "capacity": int(capacity[i]), "deferred_units": int(want[lo:hi].sum() - units.sum()),
+                        "lines": rows(pos[:lines], units[:lines])})
+        # cada región sale ordenada: el top global es una mezcla k-way (montículo de tamaño #regiones)
+        heads.append(zip(key[lo:hi][local[:top]].tolist(), range(len(picked), len(picked) + min(top, len(pos)))))
+        picked += list(zip(pos[:top], units[:top]))
+    best = [picked[j] for _, j in islice(heapq.merge(*heads), top)]
+    return {"target_days": target_days, "pack": pack, "regions": summary,
+            "skus": sum(r["skus"] for r in summary), "units": sum(r["units"] for r in summary),
+            "deferred_units": sum(r["deferred_units"] for r in summary),
+            "top": rows(np.array([p for p, _ in best], np.int64), [u for _, u in best])}
+
+# =========================
+# PAYLOADS (un ticket por región + aviso a Slack encadenado)
+# =========================
+LINE_HEADER = "||SKU||Categoría||Stock||Cobertura (días)||Demanda/día||Pedir||"
+
+def jira_payloads(result:dict, channel:str):
+    """Un ticket de Jira por región con SKUs asignados; cada uno encadena su aviso a Slack con la llave real."""
+    out = []
+    for r in result["regions"]:
+        if not r["skus"]:
+            continue
+        summary = f"Reabasto críticos {r['region']} — {r['skus']:,} SKUs, {r['units']:,} u"
+        body = [f"Plan a {result['target_days']} días de cobertura sobre el punto de pedido (múltiplos de {result['pack']}).",
+                f"Candidatos: {r['candidates']:,} · asignados: {r['skus']:,} · unidades: {r['units']:,}"
+                + (f" de {r['capacity']:,} de capacidad · diferidas: {r['deferred_units']:,}" if r["capacity"] else ""),
+                "", f"SKUs más urgentes ({len(r['lines'])}):", LINE_HEADER]
+        body += [f"|{s}|{c}|{st:,}|{cv}|{d}|{u:,}|" for s, _, c, st, cv, d, u in r["lines"]]
+        out.append({"summary": summary, "description": "\n".join(body), "labels": ["reabasto", region_label(r["region"])],
+                    "then": {"connector": "slack", "target": channel,
+                             "payload": {"text": f"Creado ticket {{key}}: {summary}."}}})
+    return out
+
+def plan_frame(result:dict) -> pd.DataFrame:
+    """Resumen por región para mostrar."""
+    cols = ["region", "candidates", "skus", "units", "capacity", "deferred_units"]
+    return pd.DataFrame([{k: r[k] for k in cols} for r in result["regions"]], columns=cols)
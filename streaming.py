@@ -0,0 +1,110 @@
+# streaming.py
+# Renderer de explicaciones en streaming: emite por palabra/token a una tasa de cuadros acotada,
+# acepta texto o generadores (tokens de un LLM) y anima todas las secciones juntas al final del
+# script, así la página completa se pinta primero y ninguna animación bloquea a la siguiente.
+
+import hashlib
+import re
+import time
+from collections import deque
+
+_WORD = re.compile(r"\S+\s*|\s+")
+
+def word_chunks(text:str):
+    """Trozos por palabra (conserva espacios y saltos)."""
+    return (m.group(0) for m in _WORD.finditer(text))
+
+def content_hash(text:str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+class _Stream:
+    __slots__ = ("placeholder", "chunks", "pending", "parts", "suffix", "key", "done", "dirty")
+
+    def __init__(self, placeholder, chunks, suffix, key):
+        self.placeholder, self.chunks, self.suffix, self.key = placeholder, chunks, suffix, key
+        self.pending, self.parts, self.done, self.dirty = deque(), [], False, False
+
+    def next_word(self):
+        """Siguiente palabra; los trozos grandes de la fuente se re-trocean para un ritmo parejo.
+        "" = la fuente no tiene nada todavía. StopIteration = terminó."""
+        while not self.pending:
+            chunk = next(self.chunks)
+            if not chunk:
+                return ""
+            self.pending.extend(word_chunks(chunk))
+        return self.pending.popleft()
+
+    def text(self):
+        return "".join(self.parts) + self.suffix
+
+class StreamRenderer:
+    """Cola de animaciones de un rerun.
+
+    - `add()` reserva el lugar (placeholder) y registra la fuente; no bloquea.
+    - `flush()` avanza todas las fuentes en ronda, a lo más `fps` actualizaciones por segundo
+      y `words_per_sec` trozos por segundo para texto ya disponible.
+    - Las fuentes de generador pueden producir "" cuando aún no hay tokens (no bloqueante).
+    - `seen` (p.ej. un set en session_state) recuerda hashes ya animados: no se re-animan.
+    """
+    def __init__(self, seen:set=None, animate:bool=True, fps:float=20, words_per_sec:float=80,
+                 max_seen:int=512):
+        self.seen = seen if seen is not None else set()
+        self.animate = animate
+        self.fps = fps
+        self.words_per_sec = words_per_sec
+        self.max_seen = max_seen
+        self._streams = []
+
+    def add(self, placeholder, source, key:str=None, suffix:str=""):
+        """`source`: str o iterable de str. `key`: hash de contenido (se calcula para str)."""
+        if isinstance(source, str):
+            key = key or content_hash(source + suffix)
+            if not self.animate or key in self.seen:
+                placeholder.markdown(source + suffix, unsafe_allow_html=True)
+                return
+            chunks = word_chunks(source)
+        else:
+            if key is not None and (not self.animate or key in self.seen):
+                placeholder.markdown("".join(source) + suffix, unsafe_allow_html=True)
+                return
+            chunks = iter(source)
+        self._streams.append(_Stream(placeholder, chunks, suffix, key))
+
+    def flush(self):
+        """Anima todo lo pendiente; regresa cuando todas las fuentes terminaron."""
+        active = self._streams
+        self._streams = []
+        if not self.animate:
+            for s in active:
+                s.parts.extend(s.chunks)
+                s.placeholder.markdown(s.text(), unsafe_allow_html=True)
+                self._remember(s)
+            return
+        frame = 1.0 / self.fps
+        per_frame = max(1, int(self.words_per_sec / self.fps))
+        while active:
+            t0 = time.perf_counter()
+            for s in active:
+                for _ in range(per_frame):
+                    try:
+                        chunk = s.next_word()
+                    except StopIteration:
+                        s.done = s.dirty = True
+                        break
+                    if not chunk:
+                        break  # generador sin tokens todavía
+                    s.parts.append(chunk); s.dirty = True
+                if s.dirty:
+                    s.placeholder.markdown(s.text() if s.done else "".join(s.parts), unsafe_allow_html=True)
+                    s.dirty = False
+            for s in [s for s in active if s.done]:
+                self._remember(s)
+            active = [s for s in active if not s.done]
+            if active:
+                time.sleep(max(0.0, frame - (time.perf_counter() - t0)))
+
+    def _remember(self, s):
+        key = s.key or content_hash(s.text())
+        if len(self.seen) >= self.max_seen:
+            self.seen.clear()
+        self.seen.add(key)
@@ -0,0 +1,136 @@
+# stubs.py
+# Servidores HTTP locales para probar integraciones sin red:
+#   python stubs.py llm --port 8765     -> chat-completion compatible OpenAI (SSE)
+#   python stubs.py webhook --port 8766 -> Slack / WhatsApp / correo HTTP / Jira / Calendar
+# Uso desde código: with MockLLMServer() as url: ...
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class _StubServer:
+    """ThreadingHTTPServer en un hilo; `with` devuelve la URL base."""
+    handler = None
+
+    def __init__(self, host:str="127.0.0.1", port:int=0):
+        self.httpd = ThreadingHTTPServer((host, port), self.handler)
+        self.httpd.stub = self
+        self.requests = []
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown(); self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start().url
+
+    def __exit__(self, *exc):
+        self.stop()
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(n) if n else b""
+        return json.loads(raw) if raw else {}
+
+    def _json(self, code:int, obj):
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class _LLMHandler(_JSONHandler):
+    def do_POST(self):
+        body = self._body()
+        stub = self.server.stub
+        stub.requests.append(body)
+        if not self.path.endswith("/chat/completions"):
+            return self._json(404, {"error": "not found"})
+        prompt = body["messages"][-1]["content"]
+        answer = stub.reply(prompt)
+        if not body.get("stream"):
+            return self._json(200, {"choices": [{"message": {"role": "assistant", "content": answer}}]})
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for word in answer.split(" "):
+            chunk = {"choices": [{"delta": {"content": word + " "}}]}
+            self.wfile.write(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+            self.wfile.flush()
+            time.sleep(stub.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+class MockLLMServer(_StubServer):
+    """Responde en streaming con un eco determinista del prompt."""
+    handler = _LLMHandler
+
+    def __init__(self, host="127.0.0.1", port=0, token_delay:float=0.01):
+        super().__init__(host, port)
+        self.token_delay = token_delay
+
+    def reply(self, prompt:str) -> str:
+        stats = prompt.split("Estadísticas:", 1)[-1].strip()
+        return f"**Explicación del LLM:** (mock) Revisé {stats}. Acción sugerida: priorizar reabasto."
+
+    @property
+    def url(self):
+        return super().url + "/v1"
+
+class _WebhookHandler(_JSONHandler):
+    def do_POST(self):
+        stub = self.server.stub
+        body = self._body()
+        with stub.lock:
+            stub.requests.append({"path": self.path, "headers": dict(self.headers), "body": body})
+            n = len(stub.requests)
+            fail = n <= stub.fail_first
+        if fail:
+            return self._json(503, {"error": "stub: falla simulada"})
+        if "/rest/api/2/issue" in self.path:
+            return self._json(201, {"id": str(n), "key": f"PROD-{1000 + n}"})
+        if self.path.startswith("/whatsapp"):
+            return self._json(200, {"messages": [{"id": f"wamid.{n}"}]})
+        self._json(200, {"ok": True})
+
+class MockWebhookServer(_StubServer):
+    """Acepta cualquier POST y lo registra. `fail_first` responde 503 a las primeras N
+    peticiones (para probar reintentos). Rutas sugeridas: /slack, /whatsapp, /email,
+    /calendar y base para Jira (/rest/api/2/issue)."""
+    handler = _WebhookHandler
+
+    def __init__(self, host="127.0.0.1", port=0, fail_first:int=0):
+        super().__init__(host, port)
+        self.fail_first = fail_first
+        self.lock = threading.Lock()
+
+STUBS = {"llm": MockLLMServer, "webhook": MockWebhookServer}
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("kind", choices=sorted(STUBS))
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+    srv = STUBS[args.kind](port=args.port)
+    print(f"{args.kind} stub en {srv.url}")
+    try:
+        srv.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
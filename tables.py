@@ -0,0 +1,81 @@
+# tables.py
+# Modo tabla grande: paginación/orden del lado del servidor con selección parcial (argpartition)
+# y exportación perezosa por bloques a CSV, CSV.gz, Parquet o Arrow IPC.
+
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+
+from datagen import with_sku_labels
+
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Arrow (IPC)": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+def _sort_keys(col:pd.Series, ascending:bool):
+    """Llave numérica para ordenar (categóricas por código); None si hay que ordenar completo."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        codes = col.cat.codes.to_numpy()
+        return codes if ascending else (len(col.cat.categories) - 1 - codes).astype(codes.dtype)
+    if pd.api.types.is_numeric_dtype(col.dtype):
+        vals = col.to_numpy()
+    else:
+        return None
+    return vals if ascending else -vals.astype(np.float64)
+
+def top_n_positions(col:pd.Series, n:int, ascending:bool=True):
+    """Posiciones de las primeras `n` filas según `col`, en orden y estable ante empates.
+    Selección parcial O(N + n log n) en lugar de ordenar toda la columna."""
+    total = len(col)
+    n = min(n, total)
+    keys = _sort_keys(col, ascending)
+    if keys is None:  # texto: orden completo
+        order = col.argsort(kind="stable").to_numpy()
+        return (order if ascending else order[::-1])[:n]
+    if n <= 0:
+        return np.empty(0, np.intp)
+    if isinstance(col.dtype, pd.CategoricalDtype):  # códigos enteros pequeños: radix estable es más barato
+        return np.argsort(keys, kind="stable")[:n]
+    if n < total:
+        cand = np.argpartition(keys, n - 1)[:n]
+        # empates en el borde: incluye todas las filas con el valor límite y recorta tras ordenar
+        edge = keys[cand].max()
+        cand = np.union1d(np.flatnonzero(keys < edge), np.flatnonzero(keys == edge))
+    else:
+        cand = np.arange(total)
+    order = np.lexsort((cand, keys[cand]))
+    return cand[order][:n]
+
+def export_file(frame:pd.DataFrame, fmt:str, columns=None, chunk_rows:int=100_000):
+    """Serializa `frame` por bloques (sin materializar todas las etiquetas de texto a la vez) y
+    regresa los bytes. Pensado para usarse como callable diferido del botón de descarga, que sólo
+    acepta bytes / str / archivos en memoria."""
+    columns = list(columns or frame.columns)
+    out = io.BytesIO()
+    chunks = (with_sku_labels(frame.iloc[i:i + chunk_rows][columns]) for i in range(0, max(len(frame), 1), chunk_rows))
+    if fmt in ("CSV", "CSV (gzip)"):
+        raw = gzip.GzipFile(fileobj=out, mode="wb", compresslevel=5) if fmt == "CSV (gzip)" else out
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="", write_through=True)
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(text, index=False, header=(i == 0))
+        text.detach()
+        if raw is not out:
+            raw.close()
+    else:
+        import pyarrow as pa
+        schema = pa.Schema.from_pandas(with_sku_labels(frame[columns].iloc[:0]), preserve_index=False)
+        if fmt == "Parquet":
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(out, schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_file(out, schema)
+        with writer:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                writer.write_table(table)
+    return out.getvalue()
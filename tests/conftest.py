@@ -0,0 +1,8 @@
+# tests/conftest.py
+# Los módulos viven planos junto a app.py: la raíz del repo va al path.
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,81 @@
+# tests/test_agenda.py
+# Agenda: expansión de recurrentes, ventanas por rango, traslapes y conteo por día contra fuerza bruta.
+
+import random
+from datetime import date, datetime, timedelta
+
+from agenda import EventStore
+
+T0 = datetime(2024, 5, 6, 8, 30)
+
+def _occurrences(spec, end:datetime):
+    """Ocurrencias de un alta (title, when, minutes, every_days, until) por fuerza bruta, hasta `end`."""
+    title, when, minutes, every, until = spec
+    last = datetime.combine(until, datetime.max.time()) if until else end
+    while when < end and when <= last:
+        yield title, when, when + timedelta(minutes=minutes)
+        if not every:
+            break
+        when += timedelta(days=every)
+
+def _random_store(seed:int=3, n:int=60):
+    rng, store, specs = random.Random(seed), EventStore(), []
+    for i in range(n):
+        when = T0 + timedelta(days=rng.randrange(30), minutes=15 * rng.randrange(40))
+        every = rng.choice([0, 0, 0, 1, 7, 14])
+        until = (when + timedelta(days=rng.randrange(5, 40))).date() if every and rng.random() < 0.7 else None
+        spec = (f"ev{i}", when, rng.choice([15, 30, 60, 240, 60 * 30]), every, until)
+        store.add(spec[0], spec[1], spec[2], spec[3], spec[4])
+        specs.append(spec)
+    return store, specs
+
+def test_between_matches_brute_force_expansion():
+    store, specs = _random_store()
+    windows = [(T0, 1), (T0 + timedelta(days=3, hours=5), 2), (T0 + timedelta(days=20), 30), (T0 - timedelta(days=2), 90)]
+    for start, days in windows:
+        end = start + timedelta(days=days)
+        got = [(e["title"], e["when"], e["end"]) for e in store.between(start, end)]
+        expected = [o for s in specs for o in _occurrences(s, end) if o[2] > start]
+        assert sorted(got) == sorted(expected)
+        assert [w for _, w, _ in got] == sorted(w for _, w, _ in got)
+    assert len(store.between(T0, T0 + timedelta(days=60), limit=5)) == 5
+
+def test_recurring_rule_is_stored_once_and_respects_until():
+    store = EventStore()
+    store.add("standup", T0, 15, every_days=1, until=date(2024, 5, 10))
+    assert len(store) == 1
+    got = store.between(T0 - timedelta(days=1), T0 + timedelta(days=30))
+    assert [e["when"].day for e in got] == [6, 7, 8, 9, 10]
+    mid = store.between(T0 + timedelta(days=2, minutes=5), T0 + timedelta(days=2, minutes=6))
+    assert [e["when"] for e in mid] == [T0 + timedelta(days=2)]   # ocurrencia en curso al inicio de la ventana
+
+def test_conflicts_cover_singles_and_recurrences():
+    store = EventStore()
+    weekly, _ = store.add("comité", T0 + timedelta(hours=2), 60, every_days=7)
+    long_, _ = store.add("inventario físico", T0 - timedelta(days=1), 60 * 26)   # termina a T0 + 2 h
+    assert [e["id"] for e in store.conflicts(T0 + timedelta(hours=2, minutes=30), 30)] == [weekly["id"]]
+    assert [e["id"] for e in store.conflicts(T0 + timedelta(days=14, hours=2), 15)] == [weekly["id"]]
+    assert store.conflicts(T0 + timedelta(hours=3), 60) == []   # [when, end): tocar el final no choca
+    assert [e["id"] for e in store.conflicts(T0 + timedelta(hours=1), 10)] == [long_["id"]]
+    ev, clashes = store.add("revisión", T0 + timedelta(days=7, hours=2, minutes=30), 15, allow_overlap=False)
+    assert ev is None and [c["id"] for c in clashes] == [weekly["id"]] and len(store) == 2
+    ev, clashes = store.add("diario", T0 + timedelta(days=5, hours=2), 30, every_days=1, allow_overlap=False)
+    assert ev is None and [c["id"] for c in clashes] == [weekly["id"]]   # una vez aunque choque cada semana
+    version = store.version
+    ev, clashes = store.add("diario", T0 + timedelta(days=5, hours=4), 30, every_days=1, allow_overlap=False)
+    assert ev is not None and clashes == [] and store.version == version + 1
+
+def test_day_counts_match_brute_force():
+    store, specs = _random_store(seed=5)
+    windows = [(date(2024, 5, 1), date(2024, 6, 30)), (date(2024, 5, 10), date(2024, 5, 12)), (date(2024, 7, 1), date(2024, 7, 2))]
+    for start, end in windows:
+        lo, hi = datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+        expected = {}
+        for s in specs:
+            for _, when, _ in _occurrences(s, hi):
+                if when >= lo:
+                    expected[when.date()] = expected.get(when.date(), 0) + 1
+        counts = store.day_counts(start, end)
+        assert list(counts.columns) == ["date", "events"]
+        assert dict(zip(counts["date"], counts["events"])) == expected
+        assert list(counts["date"]) == sorted(expected)
@@ -0,0 +1,59 @@
+# tests/test_analytics.py
+# Pool de analítica con procesos reales sobre memoria compartida; filtro en proceso por bitmaps.
+
+import os
+import signal
+import time
+
+from analytics import AnalyticsPool, LocalFrame, SharedFrame
+from datagen import generate_inventory
+from filter_index import InventoryIndex
+
+def _frames():
+    inventory, _, regions, cats = generate_inventory(n_skus=2_000, regions=3, days=5)
+    return SharedFrame(inventory, regions, cats), LocalFrame(inventory, regions, cats)
+
+def test_pool_matches_inline_and_recovers_from_dead_worker():
+    shared, local = _frames()
+    pool = AnalyticsPool(1)
+    try:
+        req = {"kpi": {"regions": [shared.meta["regions"][0]], "engine": "x"}, "table": {}}
+        expected = {s: AnalyticsPool(0).submit("s", local, req).result(s) for s in req}
+        jobs = pool.submit("s", shared, req)
+        assert {s: jobs.result(s, 60) for s in req} == expected
+        for pid in [p.pid for p in pool._executor._procs]:   # p.ej. el OOM killer
+            os.kill(pid, signal.SIGKILL)
+        jobs = pool.submit("s", shared, req)
+        assert {s: jobs.result(s, 60) for s in req} == expected   # lo roto se calcula en el hilo
+        end = time.time() + 10
+        while not pool.restarts and time.time() < end:   # el aviso puede llegar por el hilo del ejecutor
+            time.sleep(0.05)
+        assert pool.restarts == 1
+        jobs = pool.submit("s", shared, req)                     # y el ejecutor nuevo vuelve a servir
+        assert {s: jobs.result(s, 60) for s in req} == expected
+    finally:
+        pool.shutdown()
+        shared.close()
+
+def test_jobs_cancelled_by_a_newer_rerun_are_recomputed_inline():
+    shared, local = _frames()
+    pool = AnalyticsPool(1)
+    try:
+        req = {"kpi": {"engine": "x"}, "table": {}}
+        expected = {s: AnalyticsPool(0).submit("s", local, req).result(s) for s in req}
+        first = pool.submit("s", shared, req)
+        second = pool.submit("s", shared, req)           # mismo session: cancela lo que no arrancó
+        assert {s: first.result(s, 60) for s in req} == expected
+        assert {s: second.result(s, 60) for s in req} == expected
+    finally:
+        pool.shutdown()
+        shared.close()
+
+def test_bitmap_filter_matches_code_table():
+    inventory, _, regions, cats = generate_inventory(n_skus=2_000, regions=3, days=5)
+    plain, indexed = LocalFrame(inventory, regions, cats), LocalFrame(inventory, regions, cats, InventoryIndex(inventory))
+    grid = {"sort_col": "days_cover", "ascending": True, "size": 25, "page": 1}
+    for filt in ({}, {"regions": regions[:1]}, {"regions": regions[1:], "cats": cats[:2]}):
+        for section, params in (("kpi", {**filt, "engine": "x"}), ("table", filt), ("grid", {**filt, **grid})):
+            a, b = plain.run(section, params), indexed.run(section, params)
+            assert list(a) == list(b) if section == "grid" else a == b
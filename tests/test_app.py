@@ -0,0 +1,83 @@
+# tests/test_app.py
+# Flujos de app.py sin navegador (streamlit.testing AppTest) con el dataset sintético por defecto.
+
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.testing.v1 import AppTest
+
+from conftest import ROOT
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("ATLAS_OUTBOX", str(tmp_path / "outbox.db"))
+    monkeypatch.setenv("ATLAS_LOG_DIR", str(tmp_path / "log"))
+    monkeypatch.setenv("ATLAS_DELTA_DIR", str(tmp_path / "deltas"))
+    return _session()
+
+def _session(session_id:str=None):
+    """Una pestaña más sobre los mismos recursos compartidos (AppTest usa un id de sesión fijo:
+    `session_id` hace de la sesión del runtime de otra pestaña)."""
+    at = AppTest.from_file(f"{ROOT}/app.py", default_timeout=120)
+    at.session_state["llm_anim"] = False
+    if session_id:
+        at.session_state["session_id"] = session_id
+    return at.run()
+
+@pytest.fixture
+def deferred(monkeypatch):
+    """file_id -> MediaFileManager de cada descarga diferida registrada (AppTest quita el runtime al terminar)."""
+    seen, add = {}, MediaFileManager.add_deferred
+    def record(self, *a, **kw):
+        file_id = add(self, *a, **kw)
+        seen[file_id] = self
+        return file_id
+    monkeypatch.setattr(MediaFileManager, "add_deferred", record)
+    return seen
+
+def _download(at, deferred, label_prefix:str):
+    """Hace clic y ejecuta el callable como lo hace el servidor; regresa (mimetype, bytes)."""
+    button = next(b for b in at.download_button if b.label.startswith(label_prefix))
+    button.click().run()
+    assert not at.exception
+    file_id = next(b for b in at.download_button if b.label.startswith(label_prefix)).proto.deferred_file_id
+    mgr = deferred[file_id]
+    url = mgr.execute_deferred(file_id)
+    stored = mgr._storage.get_file(url.rsplit("/", 1)[-1].split(".")[0])
+    return stored.mimetype, stored.content
+
+@pytest.mark.parametrize("fmt", ["CSV", "CSV (gzip)", "Parquet", "Arrow (IPC)"])
+def test_inventory_export_download(app, deferred, fmt):
+    app.selectbox(key="exp_fmt").set_value(fmt).run()
+    _, content = _download(app, deferred, "📥 Exportar inventario")
+    if fmt == "CSV":
+        frame = pd.read_csv(io.BytesIO(content))
+    elif fmt == "CSV (gzip)":
+        frame = pd.read_csv(io.BytesIO(content), compression="gzip")
+    elif fmt == "Parquet":
+        frame = pq.read_table(io.BytesIO(content)).to_pandas()
+    else:
+        frame = pa.ipc.open_file(io.BytesIO(content)).read_all().to_pandas()
+    assert len(frame) == 80
+    assert frame["sku"].astype(str).str.startswith("SKU-").all()
+
+def test_default_meeting_is_scheduled(app):
+    next(b for b in app.button if b.label == "➕ Agregar a Google Calendar").click().run()
+    assert not app.exception and not app.warning
+    assert any("Google Calendar: 'Junta de seguimiento'" in t.value for t in app.toast)
+
+def _log_events(at, scope:str):
+    at.radio[0].set_value(scope).run()
+    return set(next(df for df in at.dataframe if "event" in df.value.columns).value["event"])
+
+def test_log_views_are_per_runtime_session(app):
+    other = _session("otra-pestaña")
+    next(b for b in app.button if b.label == "💬 Enviar a Slack").click().run()
+    mine = _log_events(app, "Esta sesión")
+    assert any(e.startswith("Slack #") for e in mine)
+    assert _log_events(other, "Esta sesión") == {"(sin eventos)"}
+    assert mine <= _log_events(other, "Global (todas las sesiones)")
@@ -0,0 +1,70 @@
+# tests/test_charts.py
+# Reducción de series: LTTB contra una implementación de referencia, min/max por cubeta y la figura.
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from charts import downsample, frame_hash, lttb, minmax, trend_figure
+
+def _lttb_reference(x, y, n_out):
+    """LTTB tal cual el artículo de Steinarsson (cubetas de (n-2)/(n_out-2) puntos), en Python puro."""
+    n, every = len(y), (len(y) - 2) / (n_out - 2)
+    out, a = [0], 0
+    for i in range(n_out - 2):
+        lo, hi = math.floor(i * every) + 1, math.floor((i + 1) * every) + 1
+        nlo, nhi = hi, min(math.floor((i + 2) * every) + 1, n)
+        if i == n_out - 3:
+            nhi = n
+        cx, cy = sum(x[nlo:nhi]) / (nhi - nlo), sum(y[nlo:nhi]) / (nhi - nlo)
+        areas = [abs((x[a] - cx) * (y[j] - y[a]) - (x[a] - x[j]) * (cy - y[a])) for j in range(lo, hi)]
+        a = lo + areas.index(max(areas))
+        out.append(a)
+    return out + [n - 1]
+
+def _series(n=2_000, seed=1):
+    rng = np.random.default_rng(seed)
+    y = np.cumsum(rng.normal(0, 1, n))
+    y[n // 3] += 80          # pico aislado
+    y[2 * n // 3] -= 80      # valle aislado
+    return np.arange(n, dtype=np.float64), y
+
+def test_lttb_matches_reference_and_keeps_spikes():
+    x, y = _series()
+    for n_out in (3, 10, 97, 500):
+        idx = lttb(x, y, n_out)
+        assert idx.tolist() == _lttb_reference(x.tolist(), y.tolist(), n_out)
+        assert len(idx) == n_out and (np.diff(idx) > 0).all()
+    idx = lttb(x, y, 100)
+    assert {int(y.argmax()), int(y.argmin())} <= set(idx.tolist())
+
+def test_lttb_and_minmax_pass_short_series_through():
+    x, y = _series(50)
+    assert lttb(x, y, 50).tolist() == list(range(50)) and lttb(x, y, 2).tolist() == list(range(50))
+    assert minmax(y, 80).tolist() == list(range(50)) and minmax(y, 3).tolist() == list(range(50))
+
+def test_minmax_keeps_each_bucket_extremes():
+    _, y = _series(1_001)
+    idx = minmax(y, 100)
+    assert len(idx) <= 100 and (np.diff(idx) > 0).all()
+    edges = np.linspace(0, len(y), 51).astype(np.int64)
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        assert lo + int(y[lo:hi].argmin()) in idx and lo + int(y[lo:hi].argmax()) in idx
+
+def test_downsample_datetime_series_and_figure_mode():
+    dates = pd.date_range("2020-01-01", periods=3_000, freq="D")
+    ts = pd.DataFrame({"date": dates, "total_stock": _series(3_000)[1]})
+    view = downsample(ts, "date", "total_stock", 400)
+    assert len(view) == 400 and view["date"].is_monotonic_increasing
+    assert view["date"].iloc[0] == dates[0] and view["date"].iloc[-1] == dates[-1]
+    assert downsample(ts, "date", "total_stock", 0) is ts
+    fig = trend_figure(ts, "#123456", max_points=400, webgl_points=1_000)
+    assert fig.data[0].type == "scattergl" and len(fig.data[0].x) == 400
+    assert trend_figure(ts.iloc[:200], "#123456").data[0].type == "scatter"
+
+def test_frame_hash_tracks_content_and_params():
+    a = pd.DataFrame({"x": [1, 2, 3]})
+    assert frame_hash(a, 5) == frame_hash(a.copy(), 5)
+    assert frame_hash(a, 5) != frame_hash(a, 6) and frame_hash(a, 5) != frame_hash(a.assign(x=[1, 2, 4]), 5)
+    assert frame_hash(a) != frame_hash(a.rename(columns={"x": "y"}))
@@ -0,0 +1,67 @@
+# tests/test_datagen.py
+# Generador sintético: formas, dtypes compactos, particiones del modo streaming, etiquetas de SKU
+# y reporte de memoria.
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from datagen import (INV_COLUMNS, TS_COLUMNS, generate_inventory, iter_inv_ts, iter_inventory, memory_report,
+                     resolve_regions, sku_ids, sku_labels)
+
+INV_DTYPES = {"sku": np.int32, "stock": np.int32, "reorder_point": np.int32, "daily_demand": np.int16,
+              "days_cover": np.float32, "below_reorder": np.int8}
+
+def test_generate_inventory_shapes_and_dtypes():
+    inv, ts, regions, cats = generate_inventory(n_skus=1_000, regions=3, days=30, end=date(2024, 3, 31))
+    assert list(inv.columns) == INV_COLUMNS and list(ts.columns) == TS_COLUMNS
+    assert len(inv) == 1_000 and len(ts) == 30 * 3
+    assert {c: inv[c].dtype for c in INV_DTYPES} == {c: np.dtype(t) for c, t in INV_DTYPES.items()}
+    assert list(inv["category"].cat.categories) == cats and list(inv["region"].cat.categories) == regions
+    assert regions == ["Centro", "Norte", "Occidente"]
+    assert inv["sku"].is_unique and inv["sku"].iloc[0] == 120
+    assert ((inv["below_reorder"] == 1) == (inv["stock"] < inv["reorder_point"])).all()
+    assert ts["date"].min() == pd.Timestamp("2024-03-02") and ts["date"].max() == pd.Timestamp("2024-03-31")
+    assert (ts.groupby("date", observed=True).size() == 3).all()
+
+def test_generate_inventory_is_reproducible():
+    a, b = generate_inventory(n_skus=500, days=10, seed=3)[0], generate_inventory(n_skus=500, days=10, seed=3)[0]
+    pd.testing.assert_frame_equal(a, b)
+
+def test_iter_inventory_partition_sizes():
+    parts = list(iter_inventory(1_050, regions=2, chunk_size=250, sku_start=0))
+    assert [len(p) for p in parts] == [250, 250, 250, 250, 50]
+    whole = pd.concat(parts, ignore_index=True)
+    assert (whole["sku"].to_numpy() == np.arange(1_050)).all()
+    assert all(p.dtypes.equals(parts[0].dtypes) for p in parts)
+    again = pd.concat(iter_inventory(1_050, regions=2, chunk_size=250, sku_start=0), ignore_index=True)
+    pd.testing.assert_frame_equal(whole, again)
+
+def test_iter_inv_ts_partitions_cover_all_days():
+    parts = list(iter_inv_ts(regions=4, days=200, chunk_days=90, end=date(2024, 1, 1)))
+    assert [len(p) for p in parts] == [90 * 4, 90 * 4, 20 * 4]
+    dates = pd.concat(parts)["date"].drop_duplicates()
+    assert len(dates) == 200 and dates.is_monotonic_increasing and dates.iloc[-1] == pd.Timestamp("2024-01-01")
+
+def test_many_regions_become_stores():
+    assert resolve_regions(6) == [f"Tienda-{i:04d}" for i in range(1, 7)]
+    assert resolve_regions(["A", "B"]) == ["A", "B"]
+
+def test_sku_labels_round_trip():
+    labels = sku_labels(np.array([7, 120, 123456]))
+    assert labels.tolist() == ["SKU-00007", "SKU-00120", "SKU-123456"]
+    assert sku_ids(labels).tolist() == [7, 120, 123456]
+    assert sku_ids(["SKU-00009", "basura"]).tolist() == [9, -1]
+
+def test_memory_report_compares_against_naive_dtypes():
+    inv, ts, _, _ = generate_inventory(n_skus=20_000, regions=3, days=30)
+    report = memory_report(inv, sample=5_000)
+    assert list(report.index) == INV_COLUMNS and list(report.columns) == ["dtype", "bytes", "naive_bytes", "saved"]
+    assert (report["bytes"] == inv.memory_usage(index=False, deep=True)).all()
+    assert report.loc["stock", "naive_bytes"] == 8 * len(inv) and report.loc["daily_demand", "saved"] == 6 * len(inv)
+    assert report.loc["sku", "dtype"] == "int32" and report.loc["sku", "naive_bytes"] > 40 * len(inv)   # texto como objetos
+    assert report.loc["region", "saved"] > 0 and (report["saved"] == report["naive_bytes"] - report["bytes"]).all()
+    whole = memory_report(inv, sample=len(inv))
+    assert abs(report.loc["sku", "naive_bytes"] / whole.loc["sku", "naive_bytes"] - 1) < 0.02   # muestra escalada
+    assert memory_report(ts)["bytes"].sum() == ts.memory_usage(index=False, deep=True).sum()
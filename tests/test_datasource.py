@@ -0,0 +1,87 @@
+# tests/test_datasource.py
+# Backends de datos: caída al stand-in local, paridad SQLite/memoria y caché TTL.
+
+import time
+
+import pandas as pd
+import pytest
+
+from datagen import generate_inventory, with_sku_labels
+from datasource import MemorySource, ResultCache, SQLiteSource, open_source
+
+@pytest.fixture(scope="module")
+def sources():
+    inventory, inv_ts, _, _ = generate_inventory(n_skus=600, regions=3, days=10)
+    mem, sql = MemorySource(inventory, inv_ts), SQLiteSource(inventory, inv_ts)
+    yield mem, sql
+    mem.close()
+    sql.close()
+
+def _frame(df:pd.DataFrame):
+    """Para comparar entre motores: SKU como texto, categóricas como texto, índice limpio."""
+    df = with_sku_labels(df).reset_index(drop=True)
+    return df.astype({c: str for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+def test_open_source_falls_back_to_local_stand_in(monkeypatch):
+    monkeypatch.delenv("ATLAS_PG_DSN", raising=False)
+    inventory, inv_ts, _, _ = generate_inventory(n_skus=50, regions=2, days=3)
+    src = open_source("Postgres", lambda: (inventory, inv_ts), local="sqlite")
+    try:
+        assert isinstance(src, SQLiteSource)
+        assert src.label == "Postgres (local SQLite — sin DSN configurado)"
+        assert len(src.inventory()) == len(inventory)
+    finally:
+        src.close()
+
+def test_sqlite_and_memory_return_the_same_rows(sources):
+    mem, sql = sources
+    regions, cats = mem.dimensions()
+    assert sql.dimensions() == (regions, cats)
+    for f in [((), ()), (regions[:1], cats[:2])]:
+        key = ["sku"]
+        pd.testing.assert_frame_equal(_frame(sql.inventory(*f)).sort_values(key, ignore_index=True),
+                                      _frame(mem.inventory(*f)).sort_values(key, ignore_index=True), check_dtype=False)
+        key = ["region", "category"]
+        pd.testing.assert_frame_equal(_frame(sql.summary(*f)).sort_values(key, ignore_index=True),
+                                      _frame(mem.summary(*f)).sort_values(key, ignore_index=True),
+                                      check_dtype=False, check_exact=False, rtol=1e-4)
+        for col, asc in [("days_cover", True), ("stock", False), ("category", True), ("sku", False)]:
+            pd.testing.assert_frame_equal(_frame(sql.rows(*f, col, asc, 20, 40)), _frame(mem.rows(*f, col, asc, 20, 40)),
+                                          check_dtype=False)
+    since = mem.max_date() - pd.Timedelta(days=3)
+    key = ["date", "region"]
+    pd.testing.assert_frame_equal(_frame(sql.inv_ts(regions[:2], since)).sort_values(key, ignore_index=True),
+                                  _frame(mem.inv_ts(regions[:2], since)).sort_values(key, ignore_index=True), check_dtype=False)
+
+def test_rows_rejects_unknown_order_column(sources):
+    with pytest.raises(ValueError):
+        sources[1].rows(order_by="stock; DROP TABLE inventory")
+
+def test_result_cache_counts_hits_and_misses_and_expires():
+    cache = ResultCache(ttl=0.05)
+    assert cache.get("k") is None
+    cache.put("k", 1)
+    assert cache.get("k") == 1
+    time.sleep(0.06)
+    assert cache.get("k") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_result_cache_is_capped_by_bytes():
+    frame = pd.DataFrame({"x": range(1000)})        # ~8 KB
+    cache = ResultCache(max_bytes=20_000)
+    cache.put("a", frame)
+    cache.put("b", frame)
+    cache.put("c", frame)                            # expulsa "a", la que vence primero
+    assert cache.get("a") is None and cache.get("c") is not None
+    assert cache.nbytes <= cache.max_bytes
+    cache.put("grande", pd.DataFrame({"x": range(10_000)}))
+    assert cache.get("grande") is None              # mayor que el tope: no se guarda
+
+def test_source_query_is_served_from_cache_until_ttl(sources):
+    sql = sources[1]
+    sql.cache.clear()
+    hits, misses = sql.cache.hits, sql.cache.misses
+    sql.inventory(["Norte"])
+    sql.inventory(["Norte"])
+    assert (sql.cache.hits - hits, sql.cache.misses - misses) == (1, 1)
+    assert sql.stats.summary()["inventory"]["count"] >= 1
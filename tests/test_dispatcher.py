@@ -0,0 +1,55 @@
+# tests/test_dispatcher.py
+# Envíos reales contra el stub HTTP local (stubs.MockWebhookServer).
+
+import time
+
+from analytics import _columns
+from datagen import generate_inventory
+from dispatcher import SENT, Dispatcher, JiraConnector, Outbox, SlackConnector
+from replenish import jira_payloads, plan
+from stubs import MockWebhookServer
+
+def _wait(pred, timeout:float=10.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if pred():
+            return True
+        time.sleep(0.05)
+    return False
+
+def test_jira_issue_body_excludes_chained_action(tmp_path):
+    srv = MockWebhookServer().start()
+    try:
+        conns = {c.name: c for c in [JiraConnector(srv.url, project="OPS"), SlackConnector(srv.url + "/slack")]}
+        disp = Dispatcher(Outbox(str(tmp_path / "outbox.db")), conns, poll=0.05).start()
+        disp.enqueue("jira", "OPS", {"summary": "Reabasto", "description": "d", "labels": ["reabasto"],
+                                     "then": {"connector": "slack", "target": "logistica",
+                                              "payload": {"text": "Creado ticket {key} {\"sla\": \"24h\"} {}."}}})
+        assert _wait(lambda: any(r["path"] == "/slack" for r in srv.requests))
+        disp.stop()
+    finally:
+        srv.stop()
+    jira = [r for r in srv.requests if r["path"] == "/rest/api/2/issue"]
+    assert len(jira) == 1
+    assert jira[0]["body"] == {"fields": {"project": {"key": "OPS"}, "issuetype": {"name": "Task"},
+                                          "summary": "Reabasto", "description": "d", "labels": ["reabasto"]}}
+    slack = next(r for r in srv.requests if r["path"] == "/slack")
+    assert slack["body"] == {"channel": "#logistica", "text": "Creado ticket PROD-1001 {\"sla\": \"24h\"} {}."}   # llaves literales intactas
+    assert disp.outbox.status_counts() == {SENT: 2}
+
+def test_restock_tickets_post_only_issue_fields(tmp_path):
+    inventory, _, regions, cats = generate_inventory(n_skus=2_000, regions=3, days=5)
+    tickets = jira_payloads(plan(_columns(inventory), regions, cats, [0] * len(regions)), "logistica")
+    srv = MockWebhookServer().start()
+    try:
+        conns = {c.name: c for c in [JiraConnector(srv.url), SlackConnector(srv.url + "/slack")]}
+        disp = Dispatcher(Outbox(str(tmp_path / "outbox.db")), conns, poll=0.05).start()
+        for t in tickets:   # como create_jira_issue del botón de reabasto
+            disp.enqueue("jira", "PROD", t)
+        assert _wait(lambda: disp.outbox.status_counts() == {SENT: 2 * len(tickets)})   # Slack agrupa avisos
+        disp.stop()
+    finally:
+        srv.stop()
+    jira = [r["body"]["fields"] for r in srv.requests if r["path"] == "/rest/api/2/issue"]
+    assert len(jira) == len(tickets)
+    assert all(set(f) == {"project", "issuetype", "summary", "description", "labels"} for f in jira)
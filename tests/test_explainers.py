@@ -0,0 +1,84 @@
+# tests/test_explainers.py
+# Explicaciones contra el stub chat-completion local (stubs.MockLLMServer): streaming SSE,
+# caché, deduplicación en curso y caída a la plantilla.
+
+import asyncio
+import socket
+import threading
+
+from explainers import ExplainerHub, HTTPChatExplainer, TemplateExplainer
+from stubs import MockLLMServer
+
+STATS = {"engine": "Postgres", "below": 12, "cover": 3.5, "regions": ["Norte"], "categories": []}
+
+def _drain(tokens):
+    return "".join(tokens)
+
+def _closed_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}/v1"
+
+def test_http_backend_streams_sse_tokens():
+    srv = MockLLMServer(token_delay=0).start()
+    try:
+        async def collect():
+            return [t async for t in HTTPChatExplainer(srv.url).astream("kpi", STATS)]
+        tokens = asyncio.run(collect())
+    finally:
+        srv.stop()
+    assert len(tokens) > 5
+    assert "".join(tokens).startswith("**Explicación del LLM:** (mock)")
+    body = srv.requests[0]
+    assert body["stream"] is True and '"below": 12' in body["messages"][-1]["content"]
+
+def test_identical_stats_are_served_from_cache():
+    srv = MockLLMServer(token_delay=0).start()
+    try:
+        hub = ExplainerHub(HTTPChatExplainer(srv.url))
+        key, tokens = hub.explain_all({"kpi": STATS})["kpi"]
+        first = _drain(tokens)
+        key2, tokens = hub.explain_all({"kpi": dict(STATS)})["kpi"]
+        assert key2 == key and _drain(tokens) == first
+    finally:
+        srv.stop()
+    assert len(srv.requests) == 1
+    assert hub.metrics()["cache_hits"] == 1 and hub.llm_calls == 1
+
+def test_concurrent_identical_requests_share_one_call():
+    srv = MockLLMServer(token_delay=0.02).start()
+    try:
+        hub = ExplainerHub(HTTPChatExplainer(srv.url))
+        texts, start = [], threading.Barrier(3)
+        def reader():
+            start.wait()
+            texts.append(_drain(hub.explain_all({"table": {"worst": [["SKU-000001", "Norte", "Hogar", 0.5]]}})["table"][1]))
+        threads = [threading.Thread(target=reader) for _ in range(3)]
+        for t in threads: t.start()
+        for t in threads: t.join(30)
+    finally:
+        srv.stop()
+    assert len(srv.requests) == 1 and hub.llm_calls == 1
+    assert len(texts) == 3 and len(set(texts)) == 1 and "(mock)" in texts[0]
+
+def test_connection_failure_falls_back_to_template_uncached():
+    hub = ExplainerHub(HTTPChatExplainer(_closed_url(), timeout=2))
+    expected = TemplateExplainer().render("kpi", STATS)
+    assert _drain(hub.explain_all({"kpi": STATS})["kpi"][1]) == expected
+    assert _drain(hub.explain_all({"kpi": STATS})["kpi"][1]) == expected
+    assert hub.llm_calls == 2 and hub.metrics()["cache_hits"] == 0
+
+def test_empty_stats_skip_the_backend():
+    srv = MockLLMServer(token_delay=0).start()
+    try:
+        hub = ExplainerHub(HTTPChatExplainer(srv.url))
+        text = _drain(hub.explain_all({"heat": {"empty": True}})["heat"][1])
+    finally:
+        srv.stop()
+    assert text == TemplateExplainer().render("heat", {"empty": True})
+    assert srv.requests == [] and hub.llm_calls == 0
+
+def test_template_backend_is_not_counted_as_llm_call():
+    hub = ExplainerHub(TemplateExplainer())
+    assert _drain(hub.explain_all({"kpi": STATS})["kpi"][1]) == TemplateExplainer().render("kpi", STATS)
+    assert hub.llm_calls == 0
@@ -0,0 +1,74 @@
+# tests/test_ingest.py
+# Diario de deltas: consumidores atrasados fuera del tope y recarga completa.
+
+import pandas as pd
+
+from cube import build_cube
+from datagen import generate_inventory
+from datasource import MemorySource
+from ingest import DeltaJournal, DeltaSimulator, LiveInventory, StockSnapshot
+
+def _batch(n:int=1):
+    return pd.DataFrame({"sku": ["SKU-000001"] * n, "qty": [1] * n})
+
+def test_stale_consumer_is_dropped_and_backlog_stays_bounded():
+    journal = DeltaJournal(max_batches=5)
+    journal.register("activo")
+    journal.register("olvidado")
+    for _ in range(20):
+        seq = journal.put(_batch())
+        assert [s for s, _ in journal.pending("activo")] == [seq]
+        journal.ack("activo", seq)
+    assert journal.is_stale("olvidado") and not journal.is_stale("activo")
+    assert journal.backlog() == 0 and journal.pending("olvidado") == []
+    journal.ack("olvidado", seq)            # un sync a medias no lo vuelve a dar de alta
+    assert journal.is_stale("olvidado")
+    journal.register("olvidado")            # recarga completa: empieza de nuevo en la cabeza
+    assert not journal.is_stale("olvidado") and journal.pending("olvidado") == []
+
+def test_consumer_too_old_is_marked_stale():
+    journal = DeltaJournal(max_age=0.0)
+    journal.register("lento")
+    journal.put(_batch())
+    journal.put(_batch())
+    assert journal.is_stale("lento") and journal.backlog() == 0
+
+def test_live_inventory_reports_stale():
+    inventory, inv_ts, _, _ = generate_inventory(n_skus=200, regions=2, days=5)
+    journal = DeltaJournal(max_batches=1)
+    live = LiveInventory(MemorySource(inventory, inv_ts), journal, "Memoria")
+    journal.put(_batch())
+    assert not live.stale
+    journal.put(_batch())
+    assert live.stale
+
+def test_late_or_reloaded_backend_catches_up_with_every_movement():
+    inventory, inv_ts, _, _ = generate_inventory(n_skus=500, regions=2, days=5)
+    skus = inventory["sku"].to_numpy()
+    journal = DeltaJournal(max_batches=3, snapshot=StockSnapshot(skus, inventory["stock"].to_numpy()))
+    sim = DeltaSimulator(journal, skus, rows=400)
+    live = LiveInventory(MemorySource(inventory, inv_ts), journal, "vivo")
+    stale = LiveInventory(MemorySource(inventory, inv_ts), journal, "olvidado")
+    for _ in range(10):   # ventas grandes: el stock toca 0 y el recorte importa
+        journal.put(sim.batch())
+        live.sync(build_cube(live.source))
+    assert stale.stale
+    reloaded = LiveInventory(MemorySource(inventory, inv_ts), journal, "olvidado")
+    late = LiveInventory(MemorySource(inventory, inv_ts), journal, "nuevo")
+    expected = live.source.inv_index.frame[["stock", "days_cover", "below_reorder"]]
+    for other in (reloaded, late):
+        assert not other.stale and other.caught_up
+        pd.testing.assert_frame_equal(other.source.inv_index.frame[["stock", "days_cover", "below_reorder"]], expected)
+
+def test_memory_sources_never_write_the_shared_seed_frames():
+    inventory, inv_ts, _, _ = generate_inventory(n_skus=300, regions=2, days=5)
+    before, ts_before = inventory.copy(deep=True), inv_ts.copy(deep=True)
+    journal = DeltaJournal()
+    lives = [LiveInventory(MemorySource(inventory, inv_ts), journal, name) for name in ("a", "b")]
+    journal.put(DeltaSimulator(journal, inventory["sku"].to_numpy(), rows=200).batch())
+    for live in lives:
+        live.sync(build_cube(live.source))
+    pd.testing.assert_frame_equal(inventory, before)
+    pd.testing.assert_frame_equal(inv_ts, ts_before)
+    a, b = (live.source.inv_index.frame["stock"] for live in lives)
+    assert a.equals(b) and not a.equals(before["stock"])   # cada motor aplicó el lote una sola vez
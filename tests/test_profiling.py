@@ -0,0 +1,59 @@
+# tests/test_profiling.py
+# Perfil de reruns: secciones anidadas, acumulados y exposición Prometheus.
+
+import re
+
+import pandas as pd
+
+from profiling import ProfileRegistry
+
+SAMPLE = re.compile(r'^[a-z_]+(\{[a-z]+="(?:[^"\\]|\\.)*"(,[a-z]+="(?:[^"\\]|\\.)*")*\})? \S+$')
+
+def _run(reg, session="s"):
+    run = reg.start(session)
+    with run.section("filter"):
+        with run.section("cube"):
+            pass
+    with run.section("filter"):
+        pass
+    run.payload("grid", pd.DataFrame({"x": range(10)}))
+    run.cache("explainer", hits=3, misses=1)
+    return reg.record(run)
+
+def test_nested_sections_and_totals():
+    reg = ProfileRegistry()
+    run = _run(reg)
+    assert set(run.sections) == {"filter", "filter/cube"} and run.calls["filter"] == 2
+    assert run.payloads["grid"] == 80 and run.total >= run.sections["filter"]
+    _run(reg, "otra")
+    assert reg.reruns == 2 and reg.totals["filter"][1] == 4
+    assert [r.session for r in reg.history("s")] == ["s"] and reg.last().session == "otra"
+
+def test_prometheus_exposition_format():
+    reg = ProfileRegistry()
+    _run(reg)
+    run = reg.start()
+    with run.section('raro "x"\ny'):
+        pass
+    reg.record(run)
+    text = reg.to_prometheus()
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    for line in lines:
+        assert line.startswith(("# HELP ", "# TYPE ")) or SAMPLE.match(line), line
+    assert "# TYPE atlas_reruns_total counter" in lines and "atlas_reruns_total 2" in lines
+    assert 'atlas_section_calls_total{section="filter"} 2' in lines
+    assert 'atlas_section_calls_total{section="filter/cube"} 1' in lines
+    assert any(line.startswith('atlas_last_section_seconds{section="raro \\"x\\"\\ny"} ') for line in lines)
+    assert "# TYPE atlas_last_rerun_seconds gauge" in lines
+
+def test_prometheus_cache_ratio_and_payload_of_last_run():
+    reg = ProfileRegistry()
+    _run(reg)
+    lines = reg.to_prometheus().splitlines()
+    assert 'atlas_cache_hit_ratio{cache="explainer"} 0.75' in lines
+    assert 'atlas_last_payload_bytes{element="grid"} 80' in lines
+
+def test_empty_registry_exports_counters_only():
+    text = ProfileRegistry().to_prometheus()
+    assert "atlas_reruns_total 0" in text and "atlas_last_rerun_seconds" not in text
@@ -0,0 +1,55 @@
+# tests/test_replenish.py
+# Capacidad por región (ATLAS_REPLENISH_CAPACITY), asignación bajo capacidad y tickets de reabasto.
+
+import numpy as np
+import pytest
+
+from analytics import _columns
+from datagen import generate_inventory, sku_labels
+from replenish import jira_payloads, order_quantities, parse_capacity, plan, region_label
+
+REGIONS = ["Norte", "Centro", "Sur"]
+
+def test_parse_capacity_forms():
+    assert parse_capacity("250000", REGIONS) == [250000] * 3
+    assert parse_capacity("", REGIONS) == [0] * 3
+    assert parse_capacity(" Norte=40000, Sur = 5 ,Oeste=9", REGIONS) == [40000, 0, 5]
+
+@pytest.mark.parametrize("spec", ["abc", "-5", "Norte=-1", "Norte=mucho", "Norte=1,Centro", "=10"])
+def test_parse_capacity_rejects_malformed(spec):
+    with pytest.raises(ValueError, match="capacidad"):
+        parse_capacity(spec, REGIONS)
+
+def test_region_label_is_a_valid_jira_label():
+    assert region_label("Ciudad de México") == "ciudad-de-mexico"
+    assert region_label("Norte") == "norte"
+
+def test_payloads_have_slug_labels_and_chain_slack():
+    inventory, _, regions, cats = generate_inventory(n_skus=2_000, regions=3, days=5)
+    result = plan(_columns(inventory), regions, cats, [0] * len(regions))
+    tickets = jira_payloads(result, "logistica")
+    assert tickets
+    for t in tickets:
+        assert all(" " not in label for label in t["labels"])
+        assert t["then"]["connector"] == "slack" and "{key}" in t["then"]["payload"]["text"]
+
+def test_finite_capacity_allocates_a_priority_prefix():
+    inventory, _, regions, cats = generate_inventory(n_skus=5_000, regions=3, days=5)
+    cols = _columns(inventory)
+    want = order_quantities(cols["reorder_point"], cols["daily_demand"], cols["days_cover"], 14, 10)
+    need = np.bincount(cols["region"], weights=want, minlength=len(regions)).astype(np.int64)
+    capacity = [int(n // d) for n, d in zip(need, (3, 5, 2))]
+    result = plan(cols, regions, cats, capacity, target_days=14, pack=10, lines=len(inventory))
+    pos = {s: i for i, s in enumerate(sku_labels(cols["sku"]))}
+    key = list(zip(cols["days_cover"].tolist(), (-cols["daily_demand"].astype(np.int64)).tolist()))   # cobertura asc., demanda desc.
+    for i, r in enumerate(result["regions"]):
+        assert r["region"] == regions[i] and r["capacity"] == capacity[i]
+        rows = np.array([pos[line[0]] for line in r["lines"]])
+        units = np.array([line[-1] for line in r["lines"]])
+        assert len(rows) == r["skus"] and units.sum() == r["units"]
+        assert capacity[i] - 10 < r["units"] <= capacity[i]
+        assert (units[:-1] == want[rows[:-1]]).all() and 0 < units[-1] <= want[rows[-1]]
+        assert r["deferred_units"] == need[i] - r["units"]
+        rest = np.setdiff1d(np.flatnonzero((cols["region"] == i) & (want > 0)), rows)
+        assert max(key[j] for j in rows) <= min(key[j] for j in rest)   # lo asignado precede a todo lo diferido
+    assert result["deferred_units"] == need.sum() - result["units"]
@@ -0,0 +1,59 @@
+# tests/test_streaming.py
+# StreamRenderer: troceo por palabra, ritmo por cuadro y una sola animación por hash de contenido.
+
+from streaming import StreamRenderer, content_hash, word_chunks
+
+class Placeholder:
+    """Registra cada st.empty().markdown."""
+    def __init__(self):
+        self.calls = []
+
+    def markdown(self, text, **kw):
+        self.calls.append(text)
+
+TEXT = "**Explicación del LLM:** hay  12 SKUs\nbajo punto de pedido."
+
+def test_word_chunks_keep_every_character():
+    chunks = list(word_chunks(TEXT))
+    assert "".join(chunks) == TEXT
+    assert chunks[:2] == ["**Explicación ", "del "] and "SKUs\n" in chunks
+
+def test_text_is_animated_a_few_words_per_frame():
+    ph = Placeholder()
+    r = StreamRenderer(fps=1000, words_per_sec=2000)   # 2 palabras por cuadro
+    r.add(ph, TEXT, suffix=" _(fin)_")
+    r.flush()
+    words = list(word_chunks(TEXT))
+    assert ph.calls[0] == "".join(words[:2])
+    assert ph.calls[-1] == TEXT + " _(fin)_"
+    assert len(ph.calls) == -(-len(words) // 2) + 1           # un cuadro por par + el cierre con sufijo
+    assert all(b.startswith(a) for a, b in zip(ph.calls, ph.calls[1:]))
+
+def test_generator_tokens_are_rechunked_and_empty_polls_skip_frames():
+    ph = Placeholder()
+    r = StreamRenderer(fps=1000, words_per_sec=1000)   # 1 palabra por cuadro
+    r.add(ph, iter(["", "uno dos tres", "", "cuatro"]), key="k")
+    r.flush()
+    assert ph.calls[:4] == ["uno ", "uno dos ", "uno dos tres", "uno dos trescuatro"]
+    assert ph.calls[-1] == "uno dos trescuatro" and "k" in r.seen
+
+def test_seen_content_renders_once_without_animation():
+    seen, first, again = set(), Placeholder(), Placeholder()
+    r = StreamRenderer(seen, fps=1000, words_per_sec=1000)
+    r.add(first, TEXT)
+    r.add(first, iter(["uno ", "dos"]), key="tokens")
+    r.flush()
+    assert len(first.calls) > 2 and seen == {content_hash(TEXT), "tokens"}
+    r = StreamRenderer(seen, fps=1000, words_per_sec=1000)      # siguiente rerun: mismo contenido
+    r.add(again, TEXT)
+    r.add(again, iter(["uno ", "dos"]), key="tokens")
+    r.flush()
+    assert again.calls == [TEXT, "uno dos"]
+
+def test_animate_off_renders_each_source_once():
+    ph = Placeholder()
+    r = StreamRenderer(animate=False)
+    r.add(ph, TEXT)
+    r.add(ph, iter(["a ", "b"]))
+    r.flush()
+    assert ph.calls == [TEXT, "a b"]